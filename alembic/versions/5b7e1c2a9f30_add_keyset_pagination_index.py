@@ -0,0 +1,26 @@
+"""add_keyset_pagination_index
+
+Revision ID: 5b7e1c2a9f30
+Revises: d423b0c684dd
+Create Date: 2025-02-03 21:14:05.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e1c2a9f30'
+down_revision: Union[str, None] = 'd423b0c684dd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_recipes_job_level_id', 'recipes', ['job', 'recipe_level', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recipes_job_level_id', table_name='recipes')
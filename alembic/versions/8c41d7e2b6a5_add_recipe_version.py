@@ -0,0 +1,26 @@
+"""add_recipe_version
+
+Revision ID: 8c41d7e2b6a5
+Revises: 5b7e1c2a9f30
+Create Date: 2025-02-17 20:41:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c41d7e2b6a5'
+down_revision: Union[str, None] = '5b7e1c2a9f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('recipes', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('recipes', 'version')
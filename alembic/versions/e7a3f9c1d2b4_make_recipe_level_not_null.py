@@ -0,0 +1,29 @@
+"""make_recipe_level_not_null
+
+Revision ID: e7a3f9c1d2b4
+Revises: 8c41d7e2b6a5
+Create Date: 2025-03-04 19:52:11.604218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3f9c1d2b4'
+down_revision: Union[str, None] = '8c41d7e2b6a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # キーセットページネーションの (recipe_level, id) の比較は NULL に一致しないため、
+    # 既存の NULL は昇順で先頭になる 0 にしてから NOT NULL にする
+    op.execute("UPDATE recipes SET recipe_level = 0 WHERE recipe_level IS NULL")
+    op.alter_column('recipes', 'recipe_level', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade() -> None:
+    op.alter_column('recipes', 'recipe_level', existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,46 @@
+"""
+交差検証によるハイパーパラメータ探索のベンチマーク
+
+合成データのスナップショットで、次数 × ジョブごとの傾き × alpha の全組み合わせを
+k分割交差検証する時間を計測する（src.models.search の既定の探索範囲）。
+
+使い方:
+    python benchmarks/bench_cv_search.py --rows 1000000 --workers 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_snapshot_load import synthetic_columns
+from src.data.snapshot import write_snapshot
+from src.models.features import FeatureSpec
+from src.models.search import DEFAULT_ALPHAS, DEFAULT_DEGREES, DEFAULT_FOLDS, search
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "snapshot")
+    write_snapshot(path, synthetic_columns(args.rows))
+    specs = [
+        FeatureSpec(degree=degree, job_interactions=job_interactions)
+        for degree in DEFAULT_DEGREES for job_interactions in (False, True)
+    ]
+
+    start = time.perf_counter()
+    candidates = search(path, specs, DEFAULT_ALPHAS, folds=args.folds, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"rows={args.rows}  candidates={len(candidates)}  folds={args.folds}  "
+          f"total={elapsed:.2f} s  per candidate={elapsed / len(candidates) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+リクエストロギング用ミドルウェアのオーバーヘッドのベンチマーク
+
+何もしないエンドポイントを持つアプリケーションを用意し、ASGIアプリケーションを直接呼び出して
+1リクエストあたりの時間を計測する（HTTPクライアント・サーバーの時間は含まない）。
+
+    none      ミドルウェアなし（基準）
+    base      従来の実装（app.middleware("http") による BaseHTTPMiddleware）
+    asgi      LoggingMiddleware（ASGIミドルウェア）
+
+base と asgi はどちらも同じ関数でログ出力・例外の変換を行うため、差はミドルウェアの仕組みの分になる。
+既定ではログの出力先（ファイル・コンソール）への書き込みを止めて計測する（--with-logging で有効）。
+
+使い方:
+    python benchmarks/bench_middleware_overhead.py --requests 20000
+    python benchmarks/bench_middleware_overhead.py --with-logging
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from src.backend.api.logging_config import logger
+from src.backend.api.middleware import (
+    LoggingMiddleware,
+    exception_response,
+    log_request_completed,
+    log_request_started,
+)
+
+
+async def base_http_logging(request: Request, call_next):
+    """従来の logging_middleware と同じ処理（BaseHTTPMiddleware 用）"""
+    method, path = request.method, request.url.path
+    request_id = log_request_started(method, path, request.client.host if request.client else None)
+    start_time = time.time()
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        return exception_response(e, method, path)
+    log_request_completed(request_id, method, path, response.status_code, start_time)
+    return response
+
+
+def make_app(mode: str) -> FastAPI:
+    app = FastAPI()
+    if mode == "base":
+        app.middleware("http")(base_http_logging)
+    elif mode == "asgi":
+        app.add_middleware(LoggingMiddleware)
+
+    @app.get("/noop")
+    async def noop():
+        return Response(b"")
+
+    return app
+
+
+async def run(app, requests: int) -> float:
+    """requests 件を順に処理し、1リクエストあたりの時間（µs）を返す"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/noop", "raw_path": b"/noop", "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 12345), "server": ("bench", 80),
+    }
+
+    def make_receive():
+        # 本文を渡した後はサーバーと同じく切断されるまで待つ
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Event().wait()
+
+        return receive
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+
+    # ミドルウェアスタックの構築と初回のルーティングを計測から除く
+    for _ in range(100):
+        await app(dict(scope), make_receive(), send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), make_receive(), send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Number of requests per case")
+    parser.add_argument("--with-logging", action="store_true", help="Keep the file / console log handlers enabled")
+    args = parser.parse_args()
+
+    if not args.with_logging:
+        for handler in logger.handlers:
+            handler.setLevel(logging.CRITICAL)
+        logger.propagate = False
+
+    results = {mode: asyncio.run(run(make_app(mode), args.requests)) for mode in ("none", "base", "asgi")}
+    baseline = results["none"]
+    for mode, per_request in results.items():
+        overhead = per_request - baseline
+        print(f"{mode:<5} {per_request:8.1f} µs/request  overhead={overhead:7.1f} µs")
+    print(f"middleware overhead: base / asgi = {(results['base'] - baseline) / max(results['asgi'] - baseline, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+MySQLConnector.bulk_insert_recipes のベンチマーク
+
+1件ずつ3回コミットする従来方式と、バッチごとに1トランザクションで
+executemany する方式で、合成レシピの登録速度を比較する。
+MySQLの接続情報は MySQLConnector と同じ環境変数（MYSQL_HOST, MYSQL_PASSWORD など）から読み込む。
+従来方式は遅いため --legacy-rows 件だけ計測し、件数あたりの速度で比較する。
+
+使い方:
+    python benchmarks/bench_mysql_bulk_insert.py --rows 100000 --batch-size 1000
+"""
+import argparse
+import os
+import sys
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.mysql_connector import MySQLConnector
+
+JOBS = ["CRP", "BSM", "ARM", "GSM", "LTW", "WVR", "ALC", "CUL"]
+
+
+def synthetic_recipes(prefix: str, rows: int):
+    """合成レシピを1件ずつ生成する"""
+    for i in range(rows):
+        yield {
+            "name": f"{prefix}_{i}",
+            "job": JOBS[i % len(JOBS)],
+            "recipe_level": 1 + i % 90,
+            "master_book_level": i % 12,
+            "stars": i % 5,
+            "patch_version": "6.4",
+            "max_durability": 80,
+            "max_quality": 10000,
+            "required_durability": 40,
+            "required_craftsmanship": 3000 + i % 1000,
+            "required_control": 2800 + i % 1000,
+            "progress_per_100": 200.0,
+            "quality_per_100": 180.0,
+        }
+
+
+def legacy_bulk_insert(connector: MySQLConnector, recipes) -> int:
+    """変更前の実装（1レシピあたり3回のINSERTと3回のコミット）"""
+    count = 0
+    for recipe in recipes:
+        recipe_id = connector.insert_recipe(
+            name=recipe["name"], job=recipe["job"], recipe_level=recipe["recipe_level"],
+            master_book_level=recipe["master_book_level"], stars=recipe["stars"],
+            patch_version=recipe["patch_version"])
+        if recipe_id:
+            connector.insert_recipe_stats(recipe_id, recipe["max_durability"],
+                                          recipe["max_quality"], recipe["required_durability"])
+            connector.insert_training_data(recipe_id, recipe["required_craftsmanship"],
+                                           recipe["required_control"], recipe["progress_per_100"],
+                                           recipe["quality_per_100"])
+            count += 1
+    return count
+
+
+def cleanup(connector: MySQLConnector, prefix: str) -> None:
+    """ベンチマークで登録したレシピを削除する"""
+    pattern = f"{prefix}%"
+    connector.execute_query(
+        "DELETE t FROM training_data t JOIN recipes r ON r.id = t.id WHERE r.name LIKE %s", (pattern,))
+    connector.execute_query(
+        "DELETE s FROM recipe_stats s JOIN recipes r ON r.id = s.id WHERE r.name LIKE %s", (pattern,))
+    connector.execute_query("DELETE FROM recipes WHERE name LIKE %s", (pattern,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MySQLConnector bulk insert benchmark")
+    parser.add_argument("--rows", type=int, default=100000, help="一括登録するレシピ数")
+    parser.add_argument("--legacy-rows", type=int, default=2000, help="従来方式で登録するレシピ数")
+    parser.add_argument("--batch-size", type=int, default=1000, help="1トランザクションあたりの件数")
+    args = parser.parse_args()
+
+    connector = MySQLConnector()
+    if not connector.connect():
+        sys.exit("MySQLに接続できません")
+
+    prefix = f"bench_{uuid.uuid4().hex[:8]}"
+    try:
+        start = time.perf_counter()
+        legacy = legacy_bulk_insert(connector, synthetic_recipes(f"{prefix}_legacy", args.legacy_rows))
+        legacy_rate = legacy / (time.perf_counter() - start)
+        print(f"before: {legacy:>7} rows  {legacy_rate:10.1f} rows/s"
+              f"  (100k rows ≈ {100000 / legacy_rate:8.1f} s)")
+
+        start = time.perf_counter()
+        ids = connector.bulk_insert_recipes(synthetic_recipes(f"{prefix}_batch", args.rows),
+                                            batch_size=args.batch_size).ids
+        batch_rate = len(ids) / (time.perf_counter() - start)
+        print(f"after:  {len(ids):>7} rows  {batch_rate:10.1f} rows/s"
+              f"  (100k rows ≈ {100000 / batch_rate:8.1f} s, x{batch_rate / legacy_rate:.1f})")
+    finally:
+        cleanup(connector, prefix)
+        connector.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+OFFSET方式とキーセット（カーソル）方式のページ取得時間ベンチマーク
+
+浅いページと深いページを取得し、OFFSET方式ではページ位置に比例して
+遅くなる一方、カーソル方式では一定であることを確認する。
+
+使い方:
+    python benchmarks/bench_pagination.py --rows 1000000 --limit 100
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.api import crud, pagination
+from src.backend.api.database import Base, RecipeDB, RecipeStatsDB, TrainingDataDB
+
+JOBS = ["CRP", "BSM", "ARM", "GSM", "LTW", "WVR", "ALC", "CUL"]
+
+
+def seed(engine, rows: int, batch: int = 50000) -> None:
+    """ベンチマーク用のレシピを一括登録する"""
+    with engine.begin() as conn:
+        for start in range(0, rows, batch):
+            ids = range(start + 1, min(start + batch, rows) + 1)
+            conn.execute(insert(RecipeDB), [
+                {"id": i, "name": f"bench_{i}", "job": JOBS[i % len(JOBS)],
+                 "recipe_level": 1 + i % 90, "master_book_level": 1 + i % 10,
+                 "stars": 1 + i % 5, "patch_version": "6.4"}
+                for i in ids
+            ])
+            conn.execute(insert(RecipeStatsDB), [
+                {"id": i, "max_durability": 80, "max_quality": 10000, "required_durability": 40}
+                for i in ids
+            ])
+            conn.execute(insert(TrainingDataDB), [
+                {"id": i, "required_craftsmanship": 3000, "required_control": 2800,
+                 "progress_per_100": 200.0, "quality_per_100": 180.0}
+                for i in ids
+            ])
+
+
+async def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+async def run(args) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    seed(engine, args.rows)
+    engine.dispose()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession,
+                                     expire_on_commit=False)
+    print(f"rows={args.rows} limit={args.limit}")
+
+    async with AsyncSessionLocal() as session:
+        # 件数取得を除いたページ取得のみを計測する
+        depths = [0, args.rows // 10, args.rows // 2, args.rows - args.limit]
+        for depth in depths:
+            offset_ms = await timed(
+                lambda: crud._fetch_page(session, [], skip=depth, limit=args.limit), args.repeat)
+            if depth:
+                previous = (await crud._fetch_page(session, [], skip=depth - 1, limit=1))[-1]
+                cursor = pagination.encode_cursor(previous["recipe_level"], previous["id"])
+            else:
+                cursor = None
+            cursor_ms = await timed(
+                lambda: crud._fetch_page(session, [], skip=0, limit=args.limit, cursor=cursor),
+                args.repeat)
+            print(f"page at row {depth:>8}: offset {offset_ms:8.2f} ms   cursor {cursor_ms:8.2f} ms")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offset vs keyset pagination benchmark")
+    parser.add_argument("--rows", type=int, default=200000, help="登録するレシピ数")
+    parser.add_argument("--limit", type=int, default=100, help="1ページの件数")
+    parser.add_argument("--repeat", type=int, default=5, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+パーティションごとの並列学習ベンチマーク
+
+合成データのスナップショットで、全パーティションの学習（初回）と、1ジョブ分の行だけを
+変更した後の再学習（変更のあったパーティションと全体モデルだけを学習）の時間を計測する。
+行数を10倍にしても再学習の予算（5分）に収まるかを確認する。
+
+使い方:
+    python benchmarks/bench_partitioned_train.py --rows 1000000 --workers 4
+    python benchmarks/bench_partitioned_train.py --rows 10000000 --by master_book
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from bench_snapshot_load import synthetic_columns
+from src.data.snapshot import write_snapshot
+from src.models.partitioned import PARTITION_SCHEMES, train_partitioned
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--by", choices=PARTITION_SCHEMES, default="job")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "snapshot")
+    columns = synthetic_columns(args.rows)
+    write_snapshot(path, columns)
+
+    start = time.perf_counter()
+    model, retrained = train_partitioned(path, by=args.by, workers=args.workers)
+    print(f"rows={args.rows}  full train: {time.perf_counter() - start:.2f} s  ({len(retrained)} partitions)")
+
+    # 先頭のパーティション（job: CRP / master_book: 秘伝書なし）の行だけ変更する
+    changed = columns["job_code"] == 0 if args.by == "job" else columns["master_book_level"] == 0
+    columns["required_control"] = np.where(changed, columns["required_control"] + 1, columns["required_control"])
+    write_snapshot(path, columns)
+
+    start = time.perf_counter()
+    _, retrained = train_partitioned(path, by=args.by, previous=model, workers=args.workers)
+    print(f"rows={args.rows}  incremental retrain: {time.perf_counter() - start:.2f} s  (retrained: {', '.join(retrained)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+バッチ推論のベンチマーク
+
+合成データで学習したモデルを使い、1件ずつ predict_batch を呼ぶ場合と、
+全件を1回の predict_batch（NumPyの行列演算1回）で推論する場合、事前計算グリッドを
+参照する場合（GridPredictor）の時間を比較する。
+
+使い方:
+    python benchmarks/bench_predict_batch.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.data.snapshot import JOBS
+from src.models.engine import LinearModel
+from src.models.features import FeatureSpec
+from src.models.grid import GridPredictor
+
+
+def synthetic_columns(rows: int):
+    rng = np.random.default_rng(0)
+    level = rng.integers(1, 101, rows)
+    columns = {
+        "job_code": rng.integers(0, len(JOBS), rows).astype(np.int8),
+        "recipe_level": level.astype(np.int16),
+        "master_book_level": rng.integers(0, 13, rows).astype(np.int16),
+        "stars": rng.integers(0, 6, rows).astype(np.int8),
+    }
+    columns["required_craftsmanship"] = 50 * np.exp(level / 25)
+    columns["required_control"] = 40 * np.exp(level / 26)
+    columns["progress_per_100"] = 300 * np.exp(-level / 120)
+    columns["quality_per_100"] = 280 * np.exp(-level / 110)
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--loop-rows", type=int, default=2000, help="Rows scored one by one (extrapolated)")
+    parser.add_argument("--degree", type=int, default=3)
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.rows)
+    model = LinearModel.fit(columns, spec=FeatureSpec(degree=args.degree))
+    inputs = {name: columns[name] for name in ("job_code", "recipe_level", "master_book_level", "stars")}
+
+    start = time.perf_counter()
+    for i in range(args.loop_rows):
+        model.predict_batch({name: values[i:i + 1] for name, values in inputs.items()})
+    loop_ms = (time.perf_counter() - start) * 1000 * args.rows / args.loop_rows
+
+    def best_of(fn, repeat=5):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+
+    batch_ms = best_of(lambda: model.predict_batch(inputs))
+    start = time.perf_counter()
+    grid = GridPredictor(model)
+    build_ms = (time.perf_counter() - start) * 1000
+    grid_ms = best_of(lambda: grid.predict_batch(inputs))
+    single = {name: values[:1] for name, values in inputs.items()}
+    single_live_us = best_of(lambda: model.predict_batch(single), 1000) * 1000
+    single_grid_us = best_of(lambda: grid.predict_batch(single), 1000) * 1000
+
+    print(f"rows={args.rows}  features={model.spec.n_features}")
+    print(f"per-row loop   : {loop_ms:10.1f} ms (extrapolated from {args.loop_rows} rows)")
+    print(f"predict_batch  : {batch_ms:10.2f} ms ({loop_ms / batch_ms:.0f}x)")
+    print(f"grid lookup    : {grid_ms:10.2f} ms ({loop_ms / grid_ms:.0f}x, build {build_ms:.1f} ms, "
+          f"{grid.nbytes / 1024 / 1024:.1f} MB)")
+    print(f"single row     : live {single_live_us:.1f} us / grid {single_grid_us:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
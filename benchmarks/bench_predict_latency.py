@@ -0,0 +1,113 @@
+"""
+推論エンドポイントのレイテンシベンチマーク
+
+合成データで学習したモデルを読み込ませ、同時実行数を変えながら POST /predict と
+POST /predict/batch（--batch-size 件）を実行し、p50 / p99 レイテンシを計測する。
+要件: 単一レシピの推論は1秒以内。
+--no-micro-batching を指定すると /predict を1件ずつ推論する（マイクロバッチとの比較用）。
+
+使い方:
+    python benchmarks/bench_predict_latency.py --requests 2000 --concurrency 1 16 64
+    python benchmarks/bench_predict_latency.py --no-micro-batching
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from httpx import AsyncClient
+
+from src.backend.api import predictor
+from src.backend.api.logging_config import logger
+from src.backend.api.main import app
+from src.data.snapshot import JOBS
+from src.models.engine import LinearModel
+
+
+def train_model() -> LinearModel:
+    rng = np.random.default_rng(0)
+    level = rng.integers(1, 101, 10000)
+    return LinearModel.fit({
+        "job_code": rng.integers(0, len(JOBS), 10000),
+        "recipe_level": level,
+        "master_book_level": rng.integers(0, 13, 10000),
+        "stars": rng.integers(0, 6, 10000),
+        "required_craftsmanship": 50 * np.exp(level / 25),
+        "required_control": 40 * np.exp(level / 26),
+        "progress_per_100": 300 * np.exp(-level / 120),
+        "quality_per_100": 280 * np.exp(-level / 110),
+    })
+
+
+async def run_level(client: AsyncClient, path: str, make_body, total: int, concurrency: int):
+    """指定した同時実行数で total 件のリクエストを処理し、各リクエストの所要時間(ms)を返す"""
+    queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(i)
+    latencies = []
+
+    async def worker():
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            response = await client.post(path, json=make_body(i))
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return np.array(latencies), total / (time.perf_counter() - start)
+
+
+async def run(args) -> None:
+    def single(i):
+        return {"job": JOBS[i % len(JOBS)], "recipe_level": 1 + i % 100,
+                "master_book_level": 1 + i % 12, "stars": 1 + i % 5}
+
+    def batch(i):
+        return {"recipes": [single(i + j) for j in range(args.batch_size)]}
+
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        for label, path, make_body, total in (
+            ("predict", "/predict", single, args.requests),
+            (f"batch({args.batch_size})", "/predict/batch", batch, max(1, args.requests // 20)),
+        ):
+            await run_level(client, path, make_body, 20, 1)  # ウォームアップ
+            for concurrency in args.concurrency:
+                batches = predictor.prediction_batcher.batches
+                items = predictor.prediction_batcher.items
+                latencies, rps = await run_level(client, path, make_body, total, concurrency)
+                batching = ""
+                if path == "/predict" and predictor.prediction_batcher.batches > batches:
+                    mean = (predictor.prediction_batcher.items - items) / (predictor.prediction_batcher.batches - batches)
+                    batching = f"  mean micro-batch={mean:5.1f}"
+                print(f"{label:<12} in-flight={concurrency:>4}  {rps:8.1f} req/s  "
+                      f"p50={np.percentile(latencies, 50):7.2f} ms  p99={np.percentile(latencies, 99):7.2f} ms{batching}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--no-micro-batching", action="store_true", help="Score each /predict request on its own")
+    args = parser.parse_args()
+
+    # リクエストログの出力はベンチマーク対象外
+    logger.setLevel(logging.WARNING)
+    predictor.set_model(train_model())
+    if args.no_micro_batching:
+        predictor.prediction_batcher.max_batch_size = 1
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
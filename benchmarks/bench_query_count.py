@@ -0,0 +1,143 @@
+"""
+レシピ一覧・検索・詳細取得のクエリ発行回数ベンチマーク
+
+遅延ロードによる 1 + 2N 回のクエリ（変更前）と、
+3テーブルを結合した射影による1回のクエリ（変更後）を比較する。
+
+使い方:
+    python benchmarks/bench_query_count.py --rows 1000 --limit 100
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.backend.api import crud
+from src.backend.api.database import Base, RecipeDB, RecipeStatsDB, TrainingDataDB
+from src.backend.api.models import RecipeSearchParams
+
+JOBS = ["CRP", "BSM", "ARM", "GSM", "LTW", "WVR", "ALC", "CUL"]
+
+
+class QueryCounter:
+    """エンジンに発行されたSQL文の数を数える"""
+
+    def __init__(self, *engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def seed(session, rows: int) -> None:
+    """ベンチマーク用のレシピを登録する"""
+    for i in range(rows):
+        recipe = RecipeDB(
+            name=f"bench_{i}",
+            job=JOBS[i % len(JOBS)],
+            recipe_level=1 + i % 90,
+            master_book_level=1 + i % 10,
+            stars=1 + i % 5,
+            patch_version="6.4",
+            collected_at=datetime.utcnow(),
+        )
+        session.add(recipe)
+        session.flush()
+        session.add(RecipeStatsDB(id=recipe.id, max_durability=80,
+                                  max_quality=10000, required_durability=40))
+        session.add(TrainingDataDB(id=recipe.id, required_craftsmanship=3000 + i,
+                                   required_control=2800 + i,
+                                   progress_per_100=200.0, quality_per_100=180.0))
+    session.commit()
+
+
+def legacy_get_recipes(session, skip: int, limit: int):
+    """変更前の実装（遅延ロードで作業情報・学習データを取得）"""
+    total = session.query(RecipeDB).count()
+    items = []
+    for recipe in session.query(RecipeDB).offset(skip).limit(limit).all():
+        stats = recipe.stats
+        training = recipe.training_data
+        if stats and training:
+            items.append((recipe.id, stats.max_quality, training.progress_per_100))
+    return total, items
+
+
+def measure(label: str, counter: QueryCounter, fn, repeat: int) -> None:
+    counter.reset()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"{label:<28} queries/request={counter.count / repeat:>6.0f}  {elapsed_ms:8.2f} ms/request")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query count benchmark for recipe list/search/detail")
+    parser.add_argument("--rows", type=int, default=1000, help="登録するレシピ数")
+    parser.add_argument("--limit", type=int, default=100, help="1ページの件数")
+    parser.add_argument("--repeat", type=int, default=20, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    AsyncSessionLocal = sessionmaker(bind=async_engine, class_=AsyncSession,
+                                     expire_on_commit=False)
+    counter = QueryCounter(engine, async_engine.sync_engine)
+
+    with Session() as session:
+        seed(session, args.rows)
+
+    params = RecipeSearchParams(min_level=1, skip=0, limit=args.limit)
+    print(f"rows={args.rows} limit={args.limit}")
+
+    loop = asyncio.new_event_loop()
+
+    def run(coro_fn):
+        async def _session_run():
+            async with AsyncSessionLocal() as session:
+                await coro_fn(session)
+
+        def _run():
+            loop.run_until_complete(_session_run())
+        return _run
+
+    def legacy():
+        with Session() as session:
+            legacy_get_recipes(session, 0, args.limit)
+
+    measure("before: get_recipes", counter, legacy, args.repeat)
+    measure("after:  get_recipes", counter,
+            run(lambda s: crud.get_recipes(s, skip=0, limit=args.limit)), args.repeat)
+
+    async def uncached_search(session):
+        # 検索結果キャッシュにヒットするとクエリが発行されないため、毎回空にしてDBアクセスを計測する
+        crud.search_cache.clear()
+        await crud.search_recipes(session, params)
+
+    measure("after:  search_recipes", counter, run(uncached_search), args.repeat)
+    measure("after:  get_recipe", counter,
+            run(lambda s: crud.get_recipe(s, 1)), args.repeat)
+    loop.run_until_complete(async_engine.dispose())
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
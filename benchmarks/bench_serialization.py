@@ -0,0 +1,94 @@
+"""
+レスポンスのシリアライズのベンチマーク
+
+/recipes/ と同じ形の行（日時・浮動小数点数・日本語を含む）を1ページ分用意し、
+従来の経路（jsonable_encoder でコピーしてから JSONResponse で json.dumps）と、
+FastJSONResponse（orjson で1回だけ走査、orjson がない場合は標準の json）の時間を比較する。
+
+使い方:
+    python benchmarks/bench_serialization.py --page-sizes 10 100 10000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.backend.api import serialization
+from src.backend.api.serialization import FastJSONResponse
+
+
+def make_page(rows: int):
+    collected_at = datetime(2024, 1, 9, 12, 0, 0)
+    return [
+        {
+            "id": i,
+            "name": f"テストレシピ{i}",
+            "job": "CRP",
+            "recipe_level": 1 + i % 100,
+            "master_book_level": i % 13 or None,
+            "stars": i % 6 or None,
+            "patch_version": "6.4",
+            "collected_at": collected_at + timedelta(seconds=i, microseconds=i),
+            "max_durability": 80,
+            "max_quality": 10000 + i,
+            "required_durability": 70,
+            "required_craftsmanship": 3000 + i,
+            "required_control": 2800 + i,
+            "progress_per_100": 230.5 + i / 7,
+            "quality_per_100": 200.25 + i / 3,
+        }
+        for i in range(rows)
+    ]
+
+
+def current_path(page):
+    return JSONResponse(content={"success": True, "data": jsonable_encoder(page), "meta": {"total": len(page)}}).body
+
+
+def fast_path(page):
+    return FastJSONResponse(content={"success": True, "data": page, "meta": {"total": len(page)}}).body
+
+
+def measure(func, page, min_seconds: float) -> float:
+    """1回あたりの時間（ms）"""
+    count, start = 0, time.perf_counter()
+    while True:
+        func(page)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 10000])
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Minimum measuring time per case")
+    args = parser.parse_args()
+
+    orjson = serialization.orjson
+    for rows in args.page_sizes:
+        page = make_page(rows)
+        assert fast_path(page) == current_path(page)
+        current = measure(current_path, page, args.min_seconds)
+        results = [f"current={current:9.3f} ms"]
+        if orjson is not None:
+            fast = measure(fast_path, page, args.min_seconds)
+            results.append(f"orjson={fast:9.3f} ms ({current / fast:4.1f}x)")
+        serialization.orjson = None
+        try:
+            stdlib = measure(fast_path, page, args.min_seconds)
+        finally:
+            serialization.orjson = orjson
+        results.append(f"stdlib single pass={stdlib:9.3f} ms ({current / stdlib:4.1f}x)")
+        print(f"rows={rows:<6} " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+学習用スナップショットの読み込み時間ベンチマーク
+
+合成データでスナップショットを作成し、メモリマップでの読み込み（要件: モデル/データのロード2秒以内）と、
+全列を1回走査するまでの時間を計測する。比較として mmap なし（全体をメモリに読み込み）も計測する。
+
+使い方:
+    python benchmarks/bench_snapshot_load.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.data.snapshot import JOBS, SNAPSHOT_COLUMNS, load_snapshot, write_snapshot
+
+
+def synthetic_columns(rows: int):
+    """ベンチマーク用の列データを作成する"""
+    rng = np.random.default_rng(0)
+    columns = {
+        "id": np.arange(1, rows + 1),
+        "job_code": rng.integers(0, len(JOBS), rows),
+        "recipe_level": rng.integers(1, 101, rows),
+        "master_book_level": rng.integers(0, 13, rows),
+        "stars": rng.integers(0, 6, rows),
+        "max_durability": rng.choice([35, 40, 70, 80], rows),
+        "max_quality": rng.integers(1000, 20000, rows),
+        "required_durability": rng.integers(20, 80, rows),
+        "required_craftsmanship": rng.integers(100, 5000, rows),
+        "required_control": rng.integers(100, 5000, rows),
+        "progress_per_100": rng.uniform(50, 300, rows),
+        "quality_per_100": rng.uniform(50, 300, rows),
+    }
+    return {name: columns[name].astype(dtype) for name, dtype in SNAPSHOT_COLUMNS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "snapshot")
+    start = time.perf_counter()
+    write_snapshot(path, synthetic_columns(args.rows))
+    size_mb = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1024 / 1024
+    print(f"rows={args.rows}  size={size_mb:.1f} MB  write={time.perf_counter() - start:.2f} s")
+
+    for mmap in (True, False):
+        open_ms, scan_ms = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            snapshot = load_snapshot(path, mmap=mmap)
+            open_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            for column in snapshot.columns.values():
+                column.sum()
+            scan_ms.append((time.perf_counter() - start) * 1000)
+        label = "mmap " if mmap else "eager"
+        print(f"{label}  open={min(open_ms):8.2f} ms  first full scan={min(scan_ms):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
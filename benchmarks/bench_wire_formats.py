@@ -0,0 +1,52 @@
+"""
+レスポンス形式（JSON / MessagePack / Arrow IPC）ごとのサイズとエンコード・デコード時間のベンチマーク
+
+/recipes/search と同じ形の行を rows_response で各形式にエンコードし、レスポンスのサイズと
+エンコード時間、クライアント側でデコードする時間（JSON: orjson.loads、MessagePack: msgpack.unpackb、
+Arrow: pyarrow.ipc.open_stream().read_all()）を計測する。インストールされていない形式は飛ばす。
+
+使い方:
+    python benchmarks/bench_wire_formats.py --page-sizes 100 10000 100000
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_serialization import make_page, measure
+from src.backend.api import wire
+
+
+def decoder(media_type: str):
+    if media_type == wire.MSGPACK:
+        return wire.msgpack.unpackb
+    if media_type == wire.ARROW:
+        return lambda body: wire.pyarrow.ipc.open_stream(body).read_all()
+    try:
+        import orjson
+        return orjson.loads
+    except ImportError:
+        return json.loads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[100, 10000, 100000])
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Minimum measuring time per case")
+    args = parser.parse_args()
+
+    for rows in args.page_sizes:
+        page = make_page(rows)
+        meta = {"total": rows, "count_mode": "exact", "next_cursor": None}
+        for media_type in wire.available_formats():
+            body = wire.rows_response(media_type, page, meta).body
+            encode = measure(lambda data: wire.rows_response(media_type, data, meta), page, args.min_seconds)
+            decode = measure(decoder(media_type), body, args.min_seconds)
+            print(f"rows={rows:<7} {media_type:<36} size={len(body) / 1024:10.1f} KiB  "
+                  f"encode={encode:9.3f} ms  decode={decode:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,18 @@ setup(
         "mysql-connector-python==8.0.33",
         "python-dotenv==0.19.2",
         "pydantic==1.10.13",
+        "aiomysql==0.2.0",
+        "aiosqlite==0.20.0",
+        "numpy==1.26.4",
+        "orjson==3.8.3",
         "pytest==6.2.5",
         "httpx==0.24.1",
     ],
+    extras_require={
+        # API の MessagePack / Arrow レスポンス（Accept ヘッダーで指定）
+        "binary": [
+            "msgpack==1.0.7",
+            "pyarrow==26.0.0",
+        ],
+    },
 )
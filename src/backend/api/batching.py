@@ -0,0 +1,85 @@
+import asyncio
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+class MicroBatcher(Generic[T, R]):
+    """同時に届いた1件ずつの処理をまとめて、1回のベクトル化した呼び出しで処理する
+
+    submit() で登録した項目は、待ち時間（max_wait_ms）が過ぎるか max_batch_size 件たまった時点で
+    handler にまとめて渡され、結果はそれぞれの呼び出し元に返される。
+
+    直前のバッチが1件だけだった（同時アクセスがない）場合は待ち時間を設けず、イベントループの
+    次の周回で処理する。同じ周回で届いた項目はまとめて処理されるため、負荷が低いときの遅延は増えず、
+    負荷が高いときだけ待ち時間の分だけ項目を集める。
+
+    handler はイベントループ上で同期的に呼ばれるため、短時間で終わる処理（事前計算グリッドの参照など）に使う。
+    """
+
+    def __init__(self, handler: Callable[[List[T]], Sequence[R]],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be greater than or equal to 1")
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._last_batch_size = 0
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def submit(self, item: T) -> R:
+        """項目を登録し、バッチで処理された結果を待つ"""
+        if self.max_batch_size == 1:
+            self._record(1)
+            return self.handler([item])[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            if self._last_batch_size > 1 and self.max_wait > 0:
+                self._flush_handle = loop.call_later(self.max_wait, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        # 応答を待たずに切断したリクエストの項目は処理しない
+        batch = [(item, future) for item, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        self._record(len(batch))
+        try:
+            results = self.handler([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _record(self, size: int) -> None:
+        self._last_batch_size = size
+        self.batches += 1
+        self.items += size
+        self.largest_batch = max(self.largest_batch, size)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else None,
+            "largest_batch": self.largest_batch,
+        }
@@ -1,13 +1,171 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy import and_, delete, func, insert, select, text
 from sqlalchemy.exc import IntegrityError
+import asyncio
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Union, Tuple
-from . import models
+from typing import AsyncIterator, Optional, List, Dict, Any, Union, Tuple
+from . import models, pagination
 from .database import RecipeDB, RecipeStatsDB, TrainingDataDB
 from fastapi import HTTPException
+from src.utils.lru import LRUCache
 
-async def create_recipe(db: Session, recipe: models.RecipeCreate) -> Union[Dict[str, Any], Tuple[str, int]]:
+# レスポンスに含める列（recipes + recipe_stats + training_data）
+RECIPE_COLUMNS = (
+    RecipeDB.id,
+    RecipeDB.name,
+    RecipeDB.job,
+    RecipeDB.recipe_level,
+    RecipeDB.master_book_level,
+    RecipeDB.stars,
+    RecipeDB.patch_version,
+    RecipeDB.collected_at,
+    RecipeStatsDB.max_durability,
+    RecipeStatsDB.max_quality,
+    RecipeStatsDB.required_durability,
+    TrainingDataDB.required_craftsmanship,
+    TrainingDataDB.required_control,
+    TrainingDataDB.progress_per_100,
+    TrainingDataDB.quality_per_100,
+)
+
+# エクスポート時の列名（RECIPE_COLUMNS と同じ順序）
+EXPORT_FIELDS = tuple(column.key for column in RECIPE_COLUMNS)
+# エクスポート時の列名と値の型（0件の場合もバイナリ形式の列を決められるようにする）
+EXPORT_TYPES = {column.key: column.type.python_type for column in RECIPE_COLUMNS}
+
+# エクスポート時にDBから1回に受け取る行数
+EXPORT_BATCH_SIZE = 1000
+
+def _join_recipe_tables(stmt):
+    """recipes に recipe_stats と training_data を内部結合する"""
+    return (
+        stmt.select_from(RecipeDB)
+        .join(RecipeStatsDB, RecipeStatsDB.id == RecipeDB.id)
+        .join(TrainingDataDB, TrainingDataDB.id == RecipeDB.id)
+    )
+
+def _recipe_select():
+    """3テーブルを1回のSELECTで取得する射影を作成する
+
+    ORMオブジェクトを経由せず、結果行をそのままレスポンス用の辞書に変換できる。
+    """
+    return _join_recipe_tables(select(*RECIPE_COLUMNS))
+
+def _count_select():
+    """_recipe_select と同じ結合条件で件数を数えるSELECTを作成する"""
+    return _join_recipe_tables(select(func.count(RecipeDB.id)))
+
+# 件数の取得方法
+COUNT_MODES = ("exact", "estimate", "none")
+
+# estimate モードで使う絞り込み条件ごとの件数キャッシュ
+ESTIMATE_TTL_SECONDS = 60.0
+ESTIMATE_CACHE_SIZE = 1024
+estimate_cache: LRUCache[int] = LRUCache(ESTIMATE_CACHE_SIZE, ttl=ESTIMATE_TTL_SECONDS)
+
+# データのバージョン（crud のすべての書き込みで1増やす。検索結果キャッシュのキーに含める）
+_data_version = 0
+
+def data_version() -> int:
+    """このプロセスから書き込むたびに増えるデータのバージョン"""
+    return _data_version
+
+def _bump_data_version() -> None:
+    global _data_version
+    _data_version += 1
+
+# 検索結果のキャッシュ（キーは (データのバージョン, 正規化した検索条件)）
+# データのバージョンはこのプロセスの書き込みしか反映しないため、他のワーカーやローダーによる
+# 書き込みは有効期限が切れるまで反映されない
+SEARCH_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL_SECONDS = 5.0
+search_cache: LRUCache[Dict[str, Any]] = LRUCache(SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL_SECONDS)
+# 実行中の検索（同じ条件の検索が同時に来た場合は1回のDBアクセスの結果を共有する）
+_search_inflight: Dict[Any, "asyncio.Task[Dict[str, Any]]"] = {}
+
+async def _table_rows_estimate(db: AsyncSession) -> Optional[int]:
+    """MySQLのテーブル統計から recipes の概算行数を取得する（MySQL以外はNone）"""
+    if db.bind is None or db.bind.dialect.name != "mysql":
+        return None
+    return await db.scalar(text(
+        "SELECT TABLE_ROWS FROM information_schema.TABLES "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'recipes'"
+    ))
+
+async def _count_total(db: AsyncSession, conditions: List[Any], mode: str, cache_key: Any) -> Optional[int]:
+    """件数を指定されたモードで取得する
+
+    exact: 絞り込み後の件数を COUNT で数える
+    estimate: 絞り込みなしならテーブル統計、それ以外は条件ごとにキャッシュした件数を使う
+    none: 件数を数えない
+    """
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        if not conditions:
+            estimate = await _table_rows_estimate(db)
+            if estimate is not None:
+                return estimate
+        cached = estimate_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    total = await db.scalar(_count_select().where(*conditions))
+    if mode == "estimate":
+        estimate_cache.put(cache_key, total)
+    return total
+
+async def _fetch_page(db: AsyncSession, conditions: List[Any], skip: int, limit: int,
+                cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+    """(recipe_level, id) 順に1ページ分のレシピを取得する
+
+    cursor がある場合はキーセット方式で取得するため、ページの深さに関わらず
+    インデックスのレンジスキャンだけで済む。cursor がない場合は従来通り
+    skip/limit（OFFSET）で取得する。
+    """
+    stmt = _recipe_select().where(*conditions).order_by(*pagination.SORT_COLUMNS)
+    if cursor:
+        stmt = stmt.where(pagination.after_cursor(cursor))
+    else:
+        stmt = stmt.offset(skip)
+    stmt = stmt.limit(limit)
+    result = await db.execute(stmt)
+    return [dict(row) for row in result.mappings()]
+
+def _search_conditions(params: models.RecipeSearchParams) -> List[Any]:
+    """検索パラメータからWHERE条件のリストを作成する"""
+    conditions = []
+
+    # 検索条件の適用
+    if params.name:
+        conditions.append(RecipeDB.name.like(f"%{params.name}%"))
+    if params.job:
+        conditions.append(RecipeDB.job == params.job)
+    if params.min_level is not None:
+        conditions.append(RecipeDB.recipe_level >= params.min_level)
+    if params.max_level is not None:
+        conditions.append(RecipeDB.recipe_level <= params.max_level)
+    if params.master_book_level is not None:
+        conditions.append(RecipeDB.master_book_level == params.master_book_level)
+    if params.stars is not None:
+        conditions.append(RecipeDB.stars == params.stars)
+    if params.patch_version:
+        conditions.append(RecipeDB.patch_version == params.patch_version)
+
+    # トレーニングデータの条件
+    if params.min_craftsmanship is not None:
+        conditions.append(TrainingDataDB.required_craftsmanship >= params.min_craftsmanship)
+    if params.max_craftsmanship is not None:
+        conditions.append(TrainingDataDB.required_craftsmanship <= params.max_craftsmanship)
+    if params.min_control is not None:
+        conditions.append(TrainingDataDB.required_control >= params.min_control)
+    if params.max_control is not None:
+        conditions.append(TrainingDataDB.required_control <= params.max_control)
+
+    return conditions
+
+async def create_recipe(db: AsyncSession, recipe: models.RecipeCreate) -> Union[Dict[str, Any], Tuple[str, int]]:
     """レシピを新規登録する"""
     try:
         # レシピ基本情報の作成
@@ -21,7 +179,7 @@ async def create_recipe(db: Session, recipe: models.RecipeCreate) -> Union[Dict[
             collected_at=datetime.utcnow()
         )
         db.add(db_recipe)
-        db.flush()  # IDを生成するためにflush
+        await db.flush()  # IDを生成するためにflush
 
         # レシピ作業情報の作成
         db_stats = RecipeStatsDB(
@@ -42,10 +200,8 @@ async def create_recipe(db: Session, recipe: models.RecipeCreate) -> Union[Dict[
         )
         db.add(db_training)
 
-        db.commit()
-        db.refresh(db_recipe)
-        db.refresh(db_stats)
-        db.refresh(db_training)
+        await db.commit()
+        _bump_data_version()
 
         return {
             "id": db_recipe.id,
@@ -65,179 +221,297 @@ async def create_recipe(db: Session, recipe: models.RecipeCreate) -> Union[Dict[
             "quality_per_100": db_training.quality_per_100
         }
     except IntegrityError as e:
-        db.rollback()
+        await db.rollback()
         if "Duplicate entry" in str(e):
             return "Recipe with this name and job already exists", 409
         return str(e), 400
 
-async def get_recipes(db: Session, skip: int = 0, limit: int = 10) -> Dict[str, Any]:
-    """レシピ一覧を取得する"""
-    total = db.query(RecipeDB).count()
-    recipes = db.query(RecipeDB).offset(skip).limit(limit).all()
-    
-    items = []
-    for recipe in recipes:
-        stats = recipe.stats
-        training = recipe.training_data
-        if stats and training:
-            item = {
-                "id": recipe.id,
-                "name": recipe.name,
-                "job": recipe.job,
-                "recipe_level": recipe.recipe_level,
-                "master_book_level": recipe.master_book_level,
-                "stars": recipe.stars,
-                "patch_version": recipe.patch_version,
-                "collected_at": recipe.collected_at,
-                "max_durability": stats.max_durability,
-                "max_quality": stats.max_quality,
-                "required_durability": stats.required_durability,
-                "required_craftsmanship": training.required_craftsmanship,
-                "required_control": training.required_control,
-                "progress_per_100": training.progress_per_100,
-                "quality_per_100": training.quality_per_100
-            }
-            items.append(item)
-    
+async def _existing_recipe_keys(db: AsyncSession, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+    """(name, job) の組のうち登録済みのものとそのIDを返す"""
+    if not keys:
+        return {}
+    names = {name for name, _ in keys}
+    jobs = {job for _, job in keys}
+    result = await db.execute(
+        select(RecipeDB.id, RecipeDB.name, RecipeDB.job)
+        .where(RecipeDB.name.in_(names), RecipeDB.job.in_(jobs))
+    )
+    wanted = set(keys)
+    return {(name, job): recipe_id for recipe_id, name, job in result if (name, job) in wanted}
+
+def _is_duplicate_error(e: IntegrityError) -> bool:
+    """uix_recipe_name_job（名前と職業の組）の一意制約違反か"""
+    message = str(e.orig)
+    return "Duplicate entry" in message or "UNIQUE constraint failed" in message
+
+async def bulk_create_recipes(db: AsyncSession,
+                              recipes: List[Tuple[int, models.RecipeCreate]]) -> List[Dict[str, Any]]:
+    """レシピをまとめて登録する（1回の呼び出しが1トランザクション）
+
+    recipes / recipe_stats / training_data をそれぞれ複数行INSERTで登録する。
+    uix_recipe_name_job に重複する行（登録済み、または同じバッチ内で先に出現）は登録しない。
+    事前の確認をすり抜けた重複（同時に登録された行や、MySQLの照合順序では同じとみなされる名前）で
+    一意制約違反になった場合は、そのバッチをロールバックして1行ずつ登録し直す。
+
+    Args:
+        recipes: (行番号, レシピ) のリスト
+
+    Returns:
+        List[Dict[str, Any]]: 行ごとの結果（status は created / duplicate / invalid）
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    pending: Dict[Tuple[str, str], Tuple[int, models.RecipeCreate]] = {}
+    for line, recipe in recipes:
+        key = (recipe.name, recipe.job)
+        if key in pending:
+            results[line] = {"line": line, "status": "duplicate", "id": None}
+        else:
+            pending[key] = (line, recipe)
+
+    try:
+        existing = await _existing_recipe_keys(db, list(pending))
+        for key, recipe_id in existing.items():
+            line, _ = pending.pop(key)
+            results[line] = {"line": line, "status": "duplicate", "id": recipe_id}
+
+        if pending:
+            ids = await _insert_recipe_rows(db, [recipe for _, recipe in pending.values()])
+            for key, (line, _) in pending.items():
+                results[line] = {"line": line, "status": "created", "id": ids[key]}
+
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        for line, recipe in pending.values():
+            results[line] = await _create_recipe_row(db, line, recipe)
+    except Exception:
+        await db.rollback()
+        raise
+    if any(result["status"] == "created" for result in results.values()):
+        _bump_data_version()
+
+    return [results[line] for line, _ in recipes]
+
+async def _insert_recipe_rows(db: AsyncSession, recipes: List[models.RecipeCreate]) -> Dict[Tuple[str, str], int]:
+    """3テーブルに複数行INSERTで登録し、(name, job) ごとのIDを返す（コミットしない）"""
+    collected_at = datetime.utcnow()
+    await db.execute(insert(RecipeDB), [
+        {
+            "name": recipe.name,
+            "job": recipe.job,
+            "recipe_level": recipe.recipe_level,
+            "master_book_level": recipe.master_book_level,
+            "stars": recipe.stars,
+            "patch_version": recipe.patch_version,
+            "collected_at": collected_at
+        }
+        for recipe in recipes
+    ])
+    # 複数行INSERTでは各行のIDが返らないため、一意キーで引き直す
+    ids = await _existing_recipe_keys(db, [(recipe.name, recipe.job) for recipe in recipes])
+    await db.execute(insert(RecipeStatsDB), [
+        {
+            "id": ids[(recipe.name, recipe.job)],
+            "max_durability": recipe.max_durability,
+            "max_quality": recipe.max_quality,
+            "required_durability": recipe.required_durability
+        }
+        for recipe in recipes
+    ])
+    await db.execute(insert(TrainingDataDB), [
+        {
+            "id": ids[(recipe.name, recipe.job)],
+            "required_craftsmanship": recipe.required_craftsmanship,
+            "required_control": recipe.required_control,
+            "progress_per_100": recipe.progress_per_100,
+            "quality_per_100": recipe.quality_per_100
+        }
+        for recipe in recipes
+    ])
+    return ids
+
+async def _create_recipe_row(db: AsyncSession, line: int, recipe: models.RecipeCreate) -> Dict[str, Any]:
+    """1行を1トランザクションで登録する（一意制約違反は duplicate として返す）"""
+    try:
+        ids = await _insert_recipe_rows(db, [recipe])
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_duplicate_error(e):
+            return {"line": line, "status": "duplicate", "id": None}
+        return {"line": line, "status": "invalid", "errors": [{"msg": str(e.orig)}]}
+    except Exception:
+        await db.rollback()
+        raise
+    return {"line": line, "status": "created", "id": ids[(recipe.name, recipe.job)]}
+
+async def get_recipes(db: AsyncSession, skip: int = 0, limit: int = 10,
+                      cursor: Optional[str] = None, count: str = "exact") -> Dict[str, Any]:
+    """レシピ一覧を取得する
+
+    cursor を指定した場合は skip を無視し、カーソル位置の続きから取得する。
+    count で件数の取得方法（exact / estimate / none）を指定する。
+    """
+    if count not in COUNT_MODES:
+        raise ValueError(f"count must be one of {', '.join(COUNT_MODES)}")
+    total = await _count_total(db, [], count, cache_key=())
+    items = await _fetch_page(db, [], skip=skip, limit=limit, cursor=cursor)
+
     return {
         "total": total,
-        "items": items
+        "count_mode": count,
+        "items": items,
+        "next_cursor": pagination.next_cursor(items, limit)
     }
 
-async def get_recipe(db: Session, recipe_id: int) -> Optional[Dict[str, Any]]:
-    """指定されたIDのレシピを取得する"""
-    recipe = db.query(RecipeDB).filter(RecipeDB.id == recipe_id).first()
-    if recipe is None:
-        return None
+async def get_prediction_inputs(db: AsyncSession, recipe_ids: List[int]) -> Dict[int, Any]:
+    """登録済みレシピの推論入力（job, recipe_level, master_book_level, stars）を1回のINクエリで取得する
 
-    stats = recipe.stats
-    training = recipe.training_data
-    if not stats or not training:
-        return None
+    Returns:
+        Dict[int, Any]: IDごとの結果行（列は属性として参照できる）
+    """
+    if not recipe_ids:
+        return {}
+    result = await db.execute(
+        select(RecipeDB.id, RecipeDB.job, RecipeDB.recipe_level, RecipeDB.master_book_level, RecipeDB.stars)
+        .where(RecipeDB.id.in_(set(recipe_ids)))
+    )
+    return {row.id: row for row in result}
 
-    return {
-        "id": recipe.id,
-        "name": recipe.name,
-        "job": recipe.job,
-        "recipe_level": recipe.recipe_level,
-        "master_book_level": recipe.master_book_level,
-        "stars": recipe.stars,
-        "patch_version": recipe.patch_version,
-        "collected_at": recipe.collected_at,
-        "max_durability": stats.max_durability,
-        "max_quality": stats.max_quality,
-        "required_durability": stats.required_durability,
-        "required_craftsmanship": training.required_craftsmanship,
-        "required_control": training.required_control,
-        "progress_per_100": training.progress_per_100,
-        "quality_per_100": training.quality_per_100
-    }
+async def get_recipe(db: AsyncSession, recipe_id: int) -> Optional[Dict[str, Any]]:
+    """指定されたIDのレシピを取得する（行のバージョンを含む）"""
+    stmt = _recipe_select().add_columns(RecipeDB.version).where(RecipeDB.id == recipe_id)
+    result = await db.execute(stmt)
+    row = result.mappings().first()
+    if row is None:
+        return None
+    return dict(row)
 
-async def update_recipe(db: Session, recipe_id: int, recipe_update: models.RecipeUpdate) -> Optional[Dict[str, Any]]:
+async def update_recipe(db: AsyncSession, recipe_id: int, recipe_update: models.RecipeUpdate) -> Optional[Dict[str, Any]]:
     """レシピを更新する"""
-    recipe = db.query(RecipeDB).filter(RecipeDB.id == recipe_id).first()
+    recipe = await db.get(
+        RecipeDB,
+        recipe_id,
+        options=[selectinload(RecipeDB.stats), selectinload(RecipeDB.training_data)]
+    )
     if recipe is None:
         return None
 
+    update_data = recipe_update.dict(exclude_unset=True)
+    # 同時に更新された場合も取りこぼさないよう、DB側で加算する
+    recipe.version = RecipeDB.version + 1
+
     # レシピ基本情報の更新
-    for key, value in recipe_update.dict(exclude_unset=True).items():
+    for key, value in update_data.items():
         if hasattr(recipe, key):
             setattr(recipe, key, value)
 
     # レシピ作業情報の更新
     if recipe.stats:
-        for key, value in recipe_update.dict(exclude_unset=True).items():
+        for key, value in update_data.items():
             if hasattr(recipe.stats, key):
                 setattr(recipe.stats, key, value)
 
     # トレーニングデータの更新
     if recipe.training_data:
-        for key, value in recipe_update.dict(exclude_unset=True).items():
+        for key, value in update_data.items():
             if hasattr(recipe.training_data, key):
                 setattr(recipe.training_data, key, value)
 
-    db.commit()
-    db.refresh(recipe)
-    db.refresh(recipe.stats)
-    db.refresh(recipe.training_data)
+    await db.commit()
+    _bump_data_version()
 
     return await get_recipe(db, recipe_id)
 
-async def delete_recipe(db: Session, recipe_id: int) -> bool:
+async def delete_recipe(db: AsyncSession, recipe_id: int) -> bool:
     """レシピを削除する"""
-    recipe = db.query(RecipeDB).filter(RecipeDB.id == recipe_id).first()
-    if recipe is None:
+    exists = await db.scalar(select(RecipeDB.id).where(RecipeDB.id == recipe_id))
+    if exists is None:
         return False
 
     # 関連するレコードを削除
-    db.query(TrainingDataDB).filter(TrainingDataDB.id == recipe_id).delete()
-    db.query(RecipeStatsDB).filter(RecipeStatsDB.id == recipe_id).delete()
-    db.query(RecipeDB).filter(RecipeDB.id == recipe_id).delete()
-    
-    db.commit()
+    await db.execute(delete(TrainingDataDB).where(TrainingDataDB.id == recipe_id))
+    await db.execute(delete(RecipeStatsDB).where(RecipeStatsDB.id == recipe_id))
+    await db.execute(delete(RecipeDB).where(RecipeDB.id == recipe_id))
+
+    await db.commit()
+    _bump_data_version()
     return True
 
-async def search_recipes(db: Session, params: models.RecipeSearchParams) -> Dict[str, Any]:
-    """レシピを検索する"""
-    query = db.query(RecipeDB)
+def _search_cache_key(params: models.RecipeSearchParams) -> Tuple:
+    """検索条件を正規化したキャッシュキー（空文字の条件は未指定と同じ扱い）"""
+    return tuple(sorted(
+        (name, None if value == "" else value) for name, value in params.dict().items()
+    ))
 
-    # 検索条件の適用
-    if params.name:
-        query = query.filter(RecipeDB.name.like(f"%{params.name}%"))
-    if params.job:
-        query = query.filter(RecipeDB.job == params.job)
-    if params.min_level is not None:
-        query = query.filter(RecipeDB.recipe_level >= params.min_level)
-    if params.max_level is not None:
-        query = query.filter(RecipeDB.recipe_level <= params.max_level)
-    if params.master_book_level is not None:
-        query = query.filter(RecipeDB.master_book_level == params.master_book_level)
-    if params.stars is not None:
-        query = query.filter(RecipeDB.stars == params.stars)
-    if params.patch_version:
-        query = query.filter(RecipeDB.patch_version == params.patch_version)
+async def search_recipes(db: AsyncSession, params: models.RecipeSearchParams) -> Dict[str, Any]:
+    """レシピを検索する
 
-    # トレーニングデータの条件
-    if any([params.min_craftsmanship, params.max_craftsmanship, 
-            params.min_control, params.max_control]):
-        query = query.join(TrainingDataDB)
-        if params.min_craftsmanship is not None:
-            query = query.filter(TrainingDataDB.required_craftsmanship >= params.min_craftsmanship)
-        if params.max_craftsmanship is not None:
-            query = query.filter(TrainingDataDB.required_craftsmanship <= params.max_craftsmanship)
-        if params.min_control is not None:
-            query = query.filter(TrainingDataDB.required_control >= params.min_control)
-        if params.max_control is not None:
-            query = query.filter(TrainingDataDB.required_control <= params.max_control)
-
-    total = query.count()
-    recipes = query.offset(params.skip).limit(params.limit).all()
-
-    items = []
-    for recipe in recipes:
-        stats = recipe.stats
-        training = recipe.training_data
-        if stats and training:
-            item = {
-                "id": recipe.id,
-                "name": recipe.name,
-                "job": recipe.job,
-                "recipe_level": recipe.recipe_level,
-                "master_book_level": recipe.master_book_level,
-                "stars": recipe.stars,
-                "patch_version": recipe.patch_version,
-                "collected_at": recipe.collected_at,
-                "max_durability": stats.max_durability,
-                "max_quality": stats.max_quality,
-                "required_durability": stats.required_durability,
-                "required_craftsmanship": training.required_craftsmanship,
-                "required_control": training.required_control,
-                "progress_per_100": training.progress_per_100,
-                "quality_per_100": training.quality_per_100
-            }
-            items.append(item)
+    結果はデータのバージョンと検索条件をキーに SEARCH_CACHE_TTL_SECONDS 秒キャッシュする
+    （このプロセスから書き込みがあればバージョンが変わり、古い結果は使われなくなる）。同じ条件の検索が実行中なら、その結果を待って共有する。
+    返す辞書はキャッシュと共有されるため、呼び出し側で変更しないこと。
+    """
+    key = (_data_version, _search_cache_key(params))
+    cached = search_cache.get(key)
+    if cached is not None:
+        return cached
+    task = _search_inflight.get(key)
+    if task is None:
+        task = asyncio.get_running_loop().create_task(_search_and_cache(db, params, key))
+        _search_inflight[key] = task
+        task.add_done_callback(lambda done: _finish_search(key, done))
+    # 呼び出し元が切断されてもタスクはキャンセルせず、同じ条件を待つ他の呼び出し元には結果を返す
+    return await asyncio.shield(task)
+
+async def _search_and_cache(db: AsyncSession, params: models.RecipeSearchParams, key: Any) -> Dict[str, Any]:
+    """検索を実行して結果をキャッシュに登録する（呼び出し元とは別のタスクで実行する）
+
+    最初の呼び出し元のセッションはその呼び出し元が切断すると閉じられるため、同じ接続先の別のセッションを使う。
+    """
+    async with AsyncSession(db.bind, expire_on_commit=False) as session:
+        result = await _execute_search(session, params)
+    search_cache.put(key, result)
+    return result
+
+def _finish_search(key: Any, task: "asyncio.Task[Dict[str, Any]]") -> None:
+    """検索タスクの終了時に実行中の一覧から外す"""
+    if _search_inflight.get(key) is task:
+        del _search_inflight[key]
+    if not task.cancelled():
+        # 待っている呼び出し元がいなくても警告を出さない
+        task.exception()
+
+async def _execute_search(db: AsyncSession, params: models.RecipeSearchParams) -> Dict[str, Any]:
+    """検索条件に一致するレシピの件数と1ページ分を取得する"""
+    conditions = _search_conditions(params)
+
+    filters = params.dict(exclude={"skip", "limit", "cursor", "count"})
+    total = await _count_total(db, conditions, params.count, cache_key=tuple(sorted(filters.items())))
+    items = await _fetch_page(db, conditions, skip=params.skip, limit=params.limit, cursor=params.cursor)
 
     return {
         "total": total,
-        "items": items
-    } 
\ No newline at end of file
+        "count_mode": params.count,
+        "items": items,
+        "next_cursor": pagination.next_cursor(items, params.limit)
+    }
+
+async def iter_recipe_batches(db: AsyncSession, params: models.RecipeSearchParams,
+                              batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[List[Dict[str, Any]]]:
+    """検索条件に一致するレシピを (recipe_level, id) 順に batch_size 件ずつ返す
+
+    サーバーサイドカーソル（yield_per）で読み出すため、結果全体をAPI側にもDBクライアント側にも
+    保持しない。skip / limit / cursor / count は無視する。
+    """
+    stmt = (
+        _recipe_select()
+        .where(*_search_conditions(params))
+        .order_by(*pagination.SORT_COLUMNS)
+        .execution_options(yield_per=batch_size)
+    )
+    result = await db.stream(stmt)
+    try:
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+    finally:
+        await result.close()
@@ -1,27 +1,60 @@
-from fastapi import FastAPI, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
-from typing import Optional, Union
+from fastapi import BackgroundTasks, FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, List, Optional, Union
 from datetime import datetime
-from .database import get_db
+import asyncio
+import json
+from .database import AsyncSessionLocal, get_db
 from .crud import (
+    EXPORT_FIELDS,
+    EXPORT_TYPES,
     create_recipe,
+    bulk_create_recipes,
     get_recipes,
     get_recipe,
     update_recipe,
     delete_recipe,
-    search_recipes
+    search_recipes,
+    iter_recipe_batches,
+    get_prediction_inputs,
+    estimate_cache,
+    search_cache
 )
 from .models import (
     RecipeCreate,
     RecipeUpdate,
     RecipeSearchParams,
-    Recipe
+    Recipe,
+    PredictionInput,
+    PredictionBatchRequest
 )
 from .models.responses import StandardResponse, ErrorResponse
 from .logging_config import logger
-from .middleware import setup_error_handlers, logging_middleware
+from .predictor import (
+    MODEL_REFIT_INTERVAL_SECONDS,
+    PREDICTION_FIELDS,
+    ModelUnavailableError,
+    activate_version,
+    compare_with_shadow,
+    fold_in_recipes,
+    get_predictor,
+    get_shadow,
+    list_model_versions,
+    predict_inputs,
+    prediction_batcher,
+    prediction_cache,
+    refit_from_database,
+    set_shadow_version,
+    shadow_comparison
+)
+from .recipe_cache import RecipeCache, etag_matches
+from .wire import negotiate, not_acceptable_response, rows_response
+from .streaming import encode_csv, encode_ndjson, iter_ndjson_lines
+from .middleware import LoggingMiddleware, setup_error_handlers
 from pydantic import ValidationError
-from fastapi.encoders import jsonable_encoder
 
 app = FastAPI(
     title="FF14 レシピレベル推論API",
@@ -30,40 +63,59 @@ app = FastAPI(
 )
 
 # ミドルウェアの設定
-app.middleware("http")(logging_middleware)
+app.add_middleware(LoggingMiddleware)
 setup_error_handlers(app)
 
+async def _periodic_refit():
+    """一定間隔で全データから推論モデルを学習し直す（追加学習の整合性チェック）"""
+    while True:
+        await asyncio.sleep(MODEL_REFIT_INTERVAL_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                await refit_from_database(db)
+        except Exception as e:
+            logger.error(f"Periodic model refit failed: {e}")
+
+_background_tasks = []
+
 @app.on_event("startup")
 async def startup_event():
     """アプリケーション起動時の処理"""
     logger.info("Application startup")
+    if MODEL_REFIT_INTERVAL_SECONDS > 0:
+        _background_tasks.append(asyncio.create_task(_periodic_refit()))
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """アプリケーション終了時の処理"""
+    for task in _background_tasks:
+        task.cancel()
+    _background_tasks.clear()
     logger.info("Application shutdown")
 
 @app.post("/recipes/")
-async def create_recipe_endpoint(request: Request, db: Session = Depends(get_db)):
-    """レシピを新規登録する"""
+async def create_recipe_endpoint(request: Request, background_tasks: BackgroundTasks,
+                                 db: AsyncSession = Depends(get_db)):
+    """レシピを新規登録する（登録後、推論モデルに追加学習する）"""
     try:
         # リクエストボディのパース
         body = await request.json()
         recipe = RecipeCreate(**body)
         
         logger.info(f"Creating new recipe: {recipe.name}")
-        with db as session:
-            result = await create_recipe(db=session, recipe=recipe)
-            if isinstance(result, tuple):
-                error_message, status_code = result
-                error = ErrorResponse(
-                    code=status_code,
-                    message=error_message,
-                    type="database_error" if status_code == 409 else "validation_error",
-                    details={"error_code": status_code}
-                )
-                return StandardResponse.error_response(error=error)
-            return StandardResponse.success_response(data=jsonable_encoder(result))
+        result = await create_recipe(db=db, recipe=recipe)
+        if isinstance(result, tuple):
+            error_message, status_code = result
+            error = ErrorResponse(
+                code=status_code,
+                message=error_message,
+                type="database_error" if status_code == 409 else "validation_error",
+                details={"error_code": status_code}
+            )
+            return StandardResponse.error_response(error=error)
+        # レスポンスを返した後に推論モデルへの追加学習を予約する（一定間隔でまとめて反映される）
+        background_tasks.add_task(fold_in_recipes, [recipe], [result["id"]])
+        return StandardResponse.success_response(data=result)
     except ValidationError as e:
         logger.error(
             "Validation error: Invalid recipe data",
@@ -95,19 +147,124 @@ async def create_recipe_endpoint(request: Request, db: Session = Depends(get_db)
         )
         return StandardResponse.error_response(error=error)
 
+# 一括登録のレスポンスに含める、登録しなかった行の上限（超えた分は件数だけを返す）
+BULK_MAX_REPORTED_ROWS = 1000
+
+@app.post("/recipes/bulk")
+async def bulk_create_recipes_endpoint(
+    request: Request,
+    batch_size: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db)
+):
+    """NDJSON形式（1行1レシピ）でレシピを一括登録する
+
+    本文は受信しながら1行ずつ検証し、batch_size 件ごとに1トランザクションで登録する。
+    アップロードの大きさに関わらずメモリ使用量が一定になるよう、レスポンスの data には
+    登録しなかった行（duplicate / invalid）だけを最大 BULK_MAX_REPORTED_ROWS 件返し、
+    meta に件数を返す（data にない行は登録済み）。
+    途中でデータベースエラーが発生した場合は 500 を返し、details に committed_through
+    （その行までのバッチはコミット済み）とそれまでの件数・結果を含める。
+    """
+    logger.info(f"Bulk creating recipes with batch_size={batch_size}")
+    reported = []
+    batch = []
+    summary = {"created": 0, "duplicate": 0, "invalid": 0, "omitted": 0}
+    committed_through = 0
+
+    def report(result):
+        summary[result["status"]] += 1
+        if result["status"] == "created":
+            return
+        if len(reported) < BULK_MAX_REPORTED_ROWS:
+            reported.append(result)
+        else:
+            summary["omitted"] += 1
+
+    async def flush():
+        nonlocal committed_through
+        recipes = dict(batch)
+        created, created_ids = [], []
+        for result in await bulk_create_recipes(db=db, recipes=batch):
+            report(result)
+            if result["status"] == "created":
+                created.append(recipes[result["line"]])
+                created_ids.append(result["id"])
+        committed_through = batch[-1][0]
+        batch.clear()
+        # 登録したレシピはバッチごとに推論モデルへの追加学習を予約する
+        await run_in_threadpool(fold_in_recipes, created, created_ids)
+
+    try:
+        async for line_no, line in iter_ndjson_lines(request.stream()):
+            try:
+                if line is None:
+                    raise ValueError("Line is too long")
+                body = json.loads(line)
+                if not isinstance(body, dict):
+                    raise ValueError("Each line must be a JSON object")
+                batch.append((line_no, RecipeCreate(**body)))
+            except ValidationError as e:
+                report({"line": line_no, "status": "invalid", "errors": e.errors()})
+            except ValueError as e:
+                report({"line": line_no, "status": "invalid", "errors": [{"msg": str(e)}]})
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+    except SQLAlchemyError as e:
+        logger.error(
+            f"Bulk create stopped by a database error: {str(e)}",
+            extra={"error": str(e), "error_type": "database_error", "committed_through": committed_through}
+        )
+        error = ErrorResponse(
+            code=500,
+            message="Bulk create stopped by a database error",
+            type="database_error",
+            details={
+                "error": str(e),
+                "committed_through": committed_through,
+                "summary": summary,
+                "results": sorted(reported, key=lambda result: result["line"])
+            }
+        )
+        return StandardResponse.error_response(error=error)
+
+    logger.info(f"Bulk create finished: {summary}")
+    reported.sort(key=lambda result: result["line"])
+    return StandardResponse.success_response(data=reported, meta=summary)
+
 @app.get("/recipes/")
-async def read_recipes(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """レシピ一覧を取得する"""
-    logger.info(f"Fetching recipes with skip={skip}, limit={limit}")
-    with db as session:
-        result = await get_recipes(db=session, skip=skip, limit=limit)
-        return StandardResponse.success_response(
-            data=jsonable_encoder(result["items"]),
-            meta={"total": result["total"]}
+async def read_recipes(request: Request, skip: int = 0, limit: int = 10, cursor: Optional[str] = None,
+                       count: str = "exact", db: AsyncSession = Depends(get_db)):
+    """レシピ一覧を取得する（Accept ヘッダーで MessagePack / Arrow も指定できる）"""
+    logger.info(f"Fetching recipes with skip={skip}, limit={limit}, cursor={cursor}, count={count}")
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type is None:
+        return not_acceptable_response()
+    try:
+        result = await get_recipes(db=db, skip=skip, limit=limit, cursor=cursor, count=count)
+    except ValueError as e:
+        logger.warning(f"Invalid list parameters: {e}")
+        error = ErrorResponse(
+            code=400,
+            message=str(e),
+            type="validation_error"
         )
+        return StandardResponse.error_response(error=error)
+    return rows_response(
+        media_type,
+        result["items"],
+        meta={
+            "total": result["total"],
+            "count_mode": result["count_mode"],
+            "next_cursor": result["next_cursor"]
+        },
+        fields=EXPORT_TYPES
+    )
 
 @app.get("/recipes/search")
 async def search_recipes_endpoint(
+    request: Request,
     name: Optional[str] = None,
     job: Optional[str] = None,
     min_level: Optional[str] = None,
@@ -121,9 +278,14 @@ async def search_recipes_endpoint(
     max_control: Optional[str] = None,
     skip: str = "0",
     limit: str = "10",
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    db: AsyncSession = Depends(get_db)
 ):
-    """レシピを検索する"""
+    """レシピを検索する（Accept ヘッダーで MessagePack / Arrow も指定できる）"""
+    media_type = negotiate(request.headers.get("accept"))
+    if media_type is None:
+        return not_acceptable_response()
     try:
         params = RecipeSearchParams(
             name=name,
@@ -138,14 +300,21 @@ async def search_recipes_endpoint(
             min_control=min_control,
             max_control=max_control,
             skip=skip,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            count=count
         )
         logger.info(f"Searching recipes with params: {params}")
-        with db as session:
-            result = await search_recipes(db=session, params=params)
-        return StandardResponse.success_response(
-            data=jsonable_encoder(result["items"]),
-            meta={"total": result["total"]}
+        result = await search_recipes(db=db, params=params)
+        return rows_response(
+            media_type,
+            result["items"],
+            meta={
+                "total": result["total"],
+                "count_mode": result["count_mode"],
+                "next_cursor": result["next_cursor"]
+            },
+            fields=EXPORT_TYPES
         )
     except ValidationError as e:
         logger.error(
@@ -164,28 +333,103 @@ async def search_recipes_endpoint(
             }
         )
 
+@app.get("/recipes/export")
+async def export_recipes_endpoint(
+    name: Optional[str] = None,
+    job: Optional[str] = None,
+    min_level: Optional[str] = None,
+    max_level: Optional[str] = None,
+    master_book_level: Optional[str] = None,
+    stars: Optional[str] = None,
+    patch_version: Optional[str] = None,
+    min_craftsmanship: Optional[str] = None,
+    max_craftsmanship: Optional[str] = None,
+    min_control: Optional[str] = None,
+    max_control: Optional[str] = None,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_db)
+):
+    """検索条件に一致するレシピをすべてNDJSONまたはCSVで出力する
+
+    件数は数えず、(recipe_level, id) 順にサーバーサイドカーソルから読み出しながら送信する。
+    """
+    try:
+        params = RecipeSearchParams(
+            name=name,
+            job=job,
+            min_level=min_level,
+            max_level=max_level,
+            master_book_level=master_book_level,
+            stars=stars,
+            patch_version=patch_version,
+            min_craftsmanship=min_craftsmanship,
+            max_craftsmanship=max_craftsmanship,
+            min_control=min_control,
+            max_control=max_control,
+            count="none"
+        )
+    except ValidationError as e:
+        logger.error(
+            "Validation error: Invalid export parameters",
+            extra={
+                "error": str(e),
+                "error_type": "validation_error",
+                "details": e.errors()
+            }
+        )
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "message": "Invalid search parameters",
+                "errors": e.errors()
+            }
+        )
+
+    logger.info(f"Exporting recipes as {format} with params: {params}")
+    batches = iter_recipe_batches(db=db, params=params)
+    if format == "csv":
+        body, media_type = encode_csv(batches, EXPORT_FIELDS), "text/csv; charset=utf-8"
+    else:
+        body, media_type = encode_ndjson(batches), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="recipes.{format}"'}
+    )
+
+recipe_cache = RecipeCache()
+
 @app.get("/recipes/{recipe_id}")
-async def read_recipe(recipe_id: int, db: Session = Depends(get_db)):
-    """指定されたIDのレシピを取得する"""
+async def read_recipe(recipe_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    """指定されたIDのレシピを取得する
+
+    レスポンスはシリアライズ済みのままキャッシュし、行のバージョンから決まる ETag を付ける。
+    If-None-Match が一致すれば 304 を返す（キャッシュ済みならDBにアクセスしない）。
+    """
     logger.info(f"Fetching recipe with id={recipe_id}")
-    with db as session:
-        recipe = await get_recipe(db=session, recipe_id=recipe_id)
-    if recipe is None:
-        logger.warning(f"Recipe not found: id={recipe_id}")
-        error = ErrorResponse(
-            code=404,
-            message="Recipe not found",
-            type="not_found"
-        )
-        return StandardResponse.error_response(error=error)
-    return StandardResponse.success_response(data=jsonable_encoder(recipe))
+    cached = recipe_cache.get(recipe_id)
+    if cached is None:
+        generation = recipe_cache.generation
+        recipe = await get_recipe(db=db, recipe_id=recipe_id)
+        if recipe is None:
+            logger.warning(f"Recipe not found: id={recipe_id}")
+            error = ErrorResponse(
+                code=404,
+                message="Recipe not found",
+                type="not_found"
+            )
+            return StandardResponse.error_response(error=error)
+        cached = recipe_cache.put(recipe, generation)
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers={"ETag": cached.etag})
+    return Response(content=cached.body, media_type="application/json", headers={"ETag": cached.etag})
 
 @app.put("/recipes/{recipe_id}")
-async def update_recipe_endpoint(recipe_id: int, recipe_update: RecipeUpdate, db: Session = Depends(get_db)):
+async def update_recipe_endpoint(recipe_id: int, recipe_update: RecipeUpdate, db: AsyncSession = Depends(get_db)):
     """レシピを更新する"""
     logger.info(f"Updating recipe: id={recipe_id}")
-    with db as session:
-        recipe = await update_recipe(db=session, recipe_id=recipe_id, recipe_update=recipe_update)
+    recipe = await update_recipe(db=db, recipe_id=recipe_id, recipe_update=recipe_update)
+    recipe_cache.invalidate(recipe_id)
     if recipe is None:
         logger.warning(f"Recipe not found: id={recipe_id}")
         error = ErrorResponse(
@@ -194,14 +438,14 @@ async def update_recipe_endpoint(recipe_id: int, recipe_update: RecipeUpdate, db
             type="not_found"
         )
         return StandardResponse.error_response(error=error)
-    return StandardResponse.success_response(data=jsonable_encoder(recipe))
+    return StandardResponse.success_response(data=recipe)
 
 @app.delete("/recipes/{recipe_id}")
-async def delete_recipe_endpoint(recipe_id: int, db: Session = Depends(get_db)):
+async def delete_recipe_endpoint(recipe_id: int, db: AsyncSession = Depends(get_db)):
     """レシピを削除する"""
     logger.info(f"Deleting recipe: id={recipe_id}")
-    with db as session:
-        success = await delete_recipe(db=session, recipe_id=recipe_id)
+    success = await delete_recipe(db=db, recipe_id=recipe_id)
+    recipe_cache.invalidate(recipe_id)
     if not success:
         logger.warning(f"Recipe not found: id={recipe_id}")
         error = ErrorResponse(
@@ -211,3 +455,141 @@ async def delete_recipe_endpoint(recipe_id: int, db: Session = Depends(get_db)):
         )
         return StandardResponse.error_response(error=error)
     return StandardResponse.success_response(data={"success": True})
+
+def _model_unavailable_response():
+    """推論モデルが読み込まれていない場合のレスポンス"""
+    logger.warning("Prediction requested but no model is loaded")
+    error = ErrorResponse(
+        code=503,
+        message="Prediction model is not available",
+        type="model_unavailable"
+    )
+    return StandardResponse.error_response(error=error)
+
+@app.post("/predict")
+async def predict_endpoint(recipe: PredictionInput):
+    """レシピ1件の必要作業精度・加工精度・進捗量・品質進捗量を推論する
+
+    同時に届いたリクエストはマイクロバッチにまとめて1回の行列演算で推論する。
+    """
+    try:
+        prediction, model_version = await prediction_batcher.submit(recipe)
+    except ModelUnavailableError:
+        return _model_unavailable_response()
+    return StandardResponse.success_response(data=prediction, meta={"model_version": model_version})
+
+@app.post("/predict/batch")
+async def predict_batch_endpoint(request: PredictionBatchRequest, http_request: Request,
+                                 db: AsyncSession = Depends(get_db)):
+    """複数のレシピをまとめて推論する
+
+    recipes の推論結果を先に、recipe_ids の推論結果をその後に、それぞれ指定順で返す。
+    存在しないIDは結果に含めず、meta.missing_ids で返す。
+    Accept ヘッダーで MessagePack / Arrow も指定できる。
+    """
+    media_type = negotiate(http_request.headers.get("accept"))
+    if media_type is None:
+        return not_acceptable_response()
+    predictor = get_predictor()
+    if predictor is None:
+        return _model_unavailable_response()
+    logger.info(f"Batch prediction: recipes={len(request.recipes)}, recipe_ids={len(request.recipe_ids)}")
+
+    inputs: List[Any] = list(request.recipes)
+    ids: List[Optional[int]] = [None] * len(inputs)
+    stored = await get_prediction_inputs(db=db, recipe_ids=request.recipe_ids)
+    missing_ids = []
+    for recipe_id in request.recipe_ids:
+        if recipe_id in stored:
+            inputs.append(stored[recipe_id])
+            ids.append(recipe_id)
+        else:
+            missing_ids.append(recipe_id)
+
+    # 一括推論はグリッドの参照だけで十分速いため、推論結果のキャッシュを使わない
+    predictions = predict_inputs(predictor, inputs, cache=None)
+    compare_with_shadow(inputs, predictions)
+    data = [{"id": recipe_id, **prediction} for recipe_id, prediction in zip(ids, predictions)]
+    return rows_response(
+        media_type,
+        data,
+        meta={
+            "model_version": predictor.version,
+            "count": len(data),
+            "missing_ids": missing_ids
+        },
+        fields=PREDICTION_FIELDS
+    )
+
+@app.get("/admin/cache/stats")
+async def cache_stats_endpoint():
+    """推論・レシピ詳細・検索結果・件数推定キャッシュの件数・ヒット・ミス・追い出し回数を取得する"""
+    return StandardResponse.success_response(data={
+        "prediction": prediction_cache.stats(),
+        "recipe": recipe_cache.stats(),
+        "search": search_cache.stats(),
+        "estimate": estimate_cache.stats()
+    })
+
+def _model_not_found_response(version: str):
+    """レジストリにないモデルバージョンを指定された場合のレスポンス"""
+    logger.warning(f"Model version not found: {version}")
+    error = ErrorResponse(
+        code=404,
+        message=f"Model version not found: {version}",
+        type="not_found"
+    )
+    return StandardResponse.error_response(error=error)
+
+def _serving_status():
+    """稼働中・シャドウのモデルバージョン"""
+    predictor = get_predictor()
+    shadow = get_shadow()
+    return {
+        "active": predictor.version if predictor else None,
+        "shadow": shadow.version if shadow else None
+    }
+
+@app.get("/admin/models")
+async def list_models_endpoint():
+    """保存済みのモデルと、稼働中・シャドウのモデルを取得する"""
+    versions = await run_in_threadpool(list_model_versions)
+    return StandardResponse.success_response(
+        data=versions,
+        meta={**_serving_status(), "shadow_comparison": shadow_comparison.stats()}
+    )
+
+@app.post("/admin/models/{version}/activate")
+async def activate_model_endpoint(version: str):
+    """稼働中のモデルを切り替える（再起動不要。処理中のリクエストは切り替え前のモデルで完了する）"""
+    logger.info(f"Activating model version {version}")
+    try:
+        # モデルの読み込みとグリッドの作成はイベントループを止めないよう別スレッドで行う
+        await run_in_threadpool(activate_version, version)
+    except (KeyError, ValueError):
+        return _model_not_found_response(version)
+    return StandardResponse.success_response(data=_serving_status())
+
+@app.post("/admin/models/{version}/shadow")
+async def shadow_model_endpoint(version: str):
+    """シャドウモデルを設定する（推論結果は返さず、稼働中モデルとの差を集計する）"""
+    logger.info(f"Setting shadow model version {version}")
+    try:
+        await run_in_threadpool(set_shadow_version, version)
+    except (KeyError, ValueError):
+        return _model_not_found_response(version)
+    return StandardResponse.success_response(data=_serving_status())
+
+@app.delete("/admin/models/shadow")
+async def clear_shadow_model_endpoint():
+    """シャドウモデルを解除する"""
+    await run_in_threadpool(set_shadow_version, None)
+    return StandardResponse.success_response(data=_serving_status())
+
+@app.post("/admin/models/refit")
+async def refit_model_endpoint(db: AsyncSession = Depends(get_db)):
+    """全データで推論モデルを学習し直し、追加学習の結果との差を返す"""
+    report = await refit_from_database(db=db)
+    if report is None:
+        return _model_unavailable_response()
+    return StandardResponse.success_response(data=report)
@@ -3,6 +3,8 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 import traceback
 from time import time
+from typing import Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from .logging_config import logger, get_request_id, bind_request_context
 from .models.responses import StandardResponse, ErrorResponse
 from pydantic import ValidationError
@@ -17,118 +19,141 @@ def create_error_response(status_code: int, message: str, error_type: str, detai
     )
     return StandardResponse.error_response(error=error)
 
-async def logging_middleware(request: Request, call_next):
-    """ロギングミドルウェア"""
-    # リクエストIDの生成
+def log_request_started(method: str, path: str, ip_address: Optional[str]) -> str:
+    """リクエストIDを発行してロガーにバインドし、開始ログを出力する"""
     request_id = get_request_id()
-    
-    # リクエスト情報をログに追加
     bind_request_context(
         logger,
         request_id=request_id,
-        method=request.method,
-        path=request.url.path,
-        ip_address=request.client.host if request.client else None
+        method=method,
+        path=path,
+        ip_address=ip_address
     )
-    
-    # リクエスト開始時刻
-    start_time = time()
-    
-    try:
-        # リクエストの処理
-        logger.info(
-            f"Request started: {request.method} {request.url.path}",
+    logger.info(
+        f"Request started: {method} {path}",
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "ip_address": ip_address
+        }
+    )
+    return request_id
+
+def log_request_completed(request_id: str, method: str, path: str, status_code: int, start_time: float) -> None:
+    """完了ログ（ステータスコードと所要時間）を出力する"""
+    duration_ms = round((time() - start_time) * 1000, 2)
+    logger.info(
+        f"Request completed: {method} {path}",
+        extra={
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "duration_ms": duration_ms
+        }
+    )
+
+def exception_response(e: Exception, method: str, path: str) -> JSONResponse:
+    """ルートで処理されなかった例外をエラーレスポンスに変換する"""
+    if isinstance(e, ValidationError):
+        errors = []
+        for error in e.errors():
+            errors.append({
+                "field": error.get("loc", ["unknown"])[0],
+                "message": error.get("msg", "Unknown validation error"),
+                "type": error.get("type", "unknown_error")
+            })
+
+        logger.warning(
+            f"Validation error occurred: {str(e)}",
             extra={
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "ip_address": request.client.host if request.client else None
+                "path": path,
+                "method": method,
+                "error_type": "validation_error",
+                "errors": errors
             }
         )
-        response = await call_next(request)
-        
-        # レスポンスタイムの計算
-        duration_ms = round((time() - start_time) * 1000, 2)
-        
-        # レスポンス情報をログに追加
-        logger.info(
-            f"Request completed: {request.method} {request.url.path}",
+        return create_error_response(
+            status_code=400,
+            message="入力値が不正です",
+            error_type="validation_error",
+            details={"errors": errors}
+        )
+    if isinstance(e, SQLAlchemyError):
+        error_message = str(e)
+        status_code = 500
+        error_type = "database_error"
+
+        # 一意性制約違反の検出
+        if "Duplicate entry" in error_message and "uix_recipe_name_job" in error_message:
+            status_code = 409
+            error_type = "conflict_error"
+            error_message = "同じ名前と職業の組み合わせのレシピが既に存在します"
+
+        logger.error(
+            f"Database error occurred: {error_message}",
             extra={
-                "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "duration_ms": duration_ms
+                "path": path,
+                "method": method,
+                "error_type": error_type,
+                "error": str(e),
+                "traceback": traceback.format_exc()
             }
         )
-        
-        return response
-        
-    except Exception as e:
-        # エラー情報をログに追加
-        duration_ms = round((time() - start_time) * 1000, 2)
-        error_type = "internal_error"
-        
-        if isinstance(e, HTTPException):
-            error_type = "http_error"
-        elif isinstance(e, ValidationError):
-            errors = []
-            for error in e.errors():
-                errors.append({
-                    "field": error.get("loc", ["unknown"])[0],
-                    "message": error.get("msg", "Unknown validation error"),
-                    "type": error.get("type", "unknown_error")
-                })
-
-            logger.warning(
-                f"Validation error occurred: {str(e)}",
-                extra={
-                    "path": request.url.path,
-                    "method": request.method,
-                    "error_type": "validation_error",
-                    "errors": errors
-                }
-            )
-            return create_error_response(
-                status_code=400,
-                message="入力値が不正です",
-                error_type="validation_error",
-                details={"errors": errors}
-            )
-        elif isinstance(e, SQLAlchemyError):
-            error_message = str(e)
-            status_code = 500
-            error_type = "database_error"
-
-            # 一意性制約違反の検出
-            if "Duplicate entry" in error_message and "uix_recipe_name_job" in error_message:
-                status_code = 409
-                error_type = "conflict_error"
-                error_message = "同じ名前と職業の組み合わせのレシピが既に存在します"
-
-            logger.error(
-                f"Database error occurred: {error_message}",
-                extra={
-                    "path": request.url.path,
-                    "method": request.method,
-                    "error_type": error_type,
-                    "error": str(e),
-                    "traceback": traceback.format_exc()
-                }
-            )
-            return create_error_response(
-                status_code=status_code,
-                message=error_message,
-                error_type=error_type,
-                details={"error": str(e)}
-            )
-        else:
-            return create_error_response(
-                status_code=500,
-                message="An unexpected error occurred",
-                error_type="internal_error",
-                details={"error": str(e)}
-            )
+        return create_error_response(
+            status_code=status_code,
+            message=error_message,
+            error_type=error_type,
+            details={"error": str(e)}
+        )
+    return create_error_response(
+        status_code=500,
+        message="An unexpected error occurred",
+        error_type="internal_error",
+        details={"error": str(e)}
+    )
+
+class LoggingMiddleware:
+    """リクエストのロギング・時間計測・例外のエラーレスポンスへの変換を行うASGIミドルウェア
+
+    BaseHTTPMiddleware（app.middleware("http")）と違い、リクエストごとにタスクやストリームを
+    作らず、send をラップしてステータスコードを受け取るだけなので、ストリーミングレスポンスも
+    そのまま流れる。所要時間はレスポンスの送信が終わるまでの時間。
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope.get("root_path", "") + scope["path"]
+        client = scope.get("client")
+        request_id = log_request_started(method, path, client[0] if client else None)
+        start_time = time()
+        status_code = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            # レスポンスを送り始めた後はエラーレスポンスに差し替えられない
+            if status_code is not None:
+                raise
+            response = exception_response(e, method, path)
+            await response(scope, receive, send)
+            return
+
+        log_request_completed(request_id, method, path, status_code, start_time)
 
 def setup_error_handlers(app: FastAPI) -> None:
     """エラーハンドラーの設定"""
@@ -9,5 +9,9 @@ from .recipe import (
     Recipe,
     RecipeSearchParams
 )
+from .prediction import (
+    PredictionInput,
+    PredictionBatchRequest
+)
 
 __all__ = ['ErrorResponse', 'StandardResponse'] 
\ No newline at end of file
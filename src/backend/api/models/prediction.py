@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field, root_validator, validator
+from typing import List, Optional
+
+# /predict/batch で1回に受け付ける件数の上限
+MAX_BATCH_SIZE = 10000
+
+class PredictionInput(BaseModel):
+    """推論リクエスト（RecipeBase から目的変数を除いた形。余分なフィールドは無視する）"""
+    name: Optional[str] = Field(None, description="レシピ名")
+    job: str = Field(..., description="クラフタージョブ")
+    recipe_level: int = Field(..., ge=1, description="レシピレベル")
+    master_book_level: Optional[int] = Field(None, ge=1, description="秘伝書レベル")
+    stars: Optional[int] = Field(None, ge=1, le=5, description="星の数")
+    patch_version: Optional[str] = Field(None, description="パッチバージョン")
+    crafter_level: Optional[int] = Field(None, ge=1, description="クラフターレベル")
+    craftsmanship: Optional[int] = Field(None, ge=0, description="作業精度")
+    control: Optional[int] = Field(None, ge=0, description="加工精度")
+
+    @validator('job')
+    def validate_job(cls, v):
+        valid_jobs = {'CRP', 'BSM', 'ARM', 'GSM', 'LTW', 'WVR', 'ALC', 'CUL'}
+        if v not in valid_jobs:
+            raise ValueError('Invalid job code')
+        return v
+
+class PredictionBatchRequest(BaseModel):
+    """一括推論リクエスト（recipes と登録済みレシピの recipe_ids を併用できる）"""
+    recipes: List[PredictionInput] = Field(default_factory=list, description="推論するレシピ")
+    recipe_ids: List[int] = Field(default_factory=list, description="推論する登録済みレシピのID")
+
+    @root_validator(skip_on_failure=True)
+    def validate_size(cls, values):
+        total = len(values.get('recipes', [])) + len(values.get('recipe_ids', []))
+        if total == 0:
+            raise ValueError('recipes or recipe_ids is required')
+        if total > MAX_BATCH_SIZE:
+            raise ValueError(f'At most {MAX_BATCH_SIZE} recipes can be predicted at once')
+        return values
@@ -3,6 +3,7 @@ from pydantic.types import constr
 from typing import Optional, Union, Annotated
 from datetime import datetime
 import re
+from ..pagination import decode_cursor
 
 class RecipeBase(BaseModel):
     """レシピの基本情報"""
@@ -47,10 +48,18 @@ class RecipeUpdate(BaseModel):
     progress_per_100: Optional[float] = Field(None, gt=0)
     quality_per_100: Optional[float] = Field(None, gt=0)
 
+    @validator('recipe_level', pre=True)
+    def validate_recipe_level(cls, v):
+        # 省略は可能だが、null で消すことはできない（recipes.recipe_level は NOT NULL）
+        if v is None:
+            raise ValueError('recipe_level cannot be null')
+        return v
+
 class Recipe(RecipeBase):
     """レシピレスポンス"""
     id: int
     collected_at: datetime
+    version: int = Field(1, description="行のバージョン（更新のたびに増える）")
 
     class Config:
         orm_mode = True
@@ -70,6 +79,8 @@ class RecipeSearchParams(BaseModel):
     max_control: Optional[int] = Field(None, description="最大加工精度")
     skip: int = Field(0, ge=0, description="スキップ数")
     limit: int = Field(10, ge=1, le=100, description="取得件数")
+    cursor: Optional[str] = Field(None, description="続きから取得するためのカーソル（指定時はskipを無視）")
+    count: str = Field("exact", description="件数の取得方法（exact / estimate / none）")
 
     @validator('min_level', 'max_level', 'master_book_level', 'stars',
               'min_craftsmanship', 'max_craftsmanship', 'min_control', 'max_control',
@@ -137,6 +148,21 @@ class RecipeSearchParams(BaseModel):
             raise ValueError("Invalid patch version format")
         return v
 
+    @validator("cursor")
+    def validate_cursor(cls, v):
+        if v is None or (isinstance(v, str) and v.strip() == ""):
+            return None
+        decode_cursor(v)
+        return v
+
+    @validator("count", pre=True)
+    def validate_count(cls, v):
+        if v is None or (isinstance(v, str) and v.strip() == ""):
+            return "exact"
+        if v not in ("exact", "estimate", "none"):
+            raise ValueError("count must be one of exact, estimate, none")
+        return v
+
     @validator("max_level")
     def validate_max_level(cls, v, values):
         if v is not None and values.get("min_level") is not None:
@@ -1,6 +1,7 @@
 from typing import TypeVar, Generic, Optional, Dict, Any
 from pydantic import BaseModel
 from fastapi.responses import JSONResponse
+from ..serialization import FastJSONResponse
 
 T = TypeVar("T")
 
@@ -20,8 +21,8 @@ class StandardResponse(BaseModel, Generic[T]):
 
     @classmethod
     def success_response(cls, data: Optional[T] = None, meta: Optional[Dict[str, Any]] = None) -> JSONResponse:
-        """成功レスポンスを生成"""
-        return JSONResponse(
+        """成功レスポンスを生成（data は日時などを含んだまま渡してよい）"""
+        return FastJSONResponse(
             content={
                 "success": True,
                 "data": data,
@@ -32,7 +33,7 @@ class StandardResponse(BaseModel, Generic[T]):
     @classmethod
     def error_response(cls, error: ErrorResponse) -> JSONResponse:
         """エラーレスポンスを生成"""
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=error.code,
             content={
                 "success": False,
@@ -0,0 +1,50 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from .database import RecipeDB
+
+# キーセットページネーションの並び順（recipe_level, id）
+# job で絞り込む場合は ix_recipes_job_level_id がこの並び順をそのまま提供する
+# recipes.recipe_level は NOT NULL（NULL の行は after_cursor の比較に一致せず、カーソルでは辿れないため）
+SORT_COLUMNS = (RecipeDB.recipe_level, RecipeDB.id)
+
+def encode_cursor(recipe_level: int, recipe_id: int) -> str:
+    """ページ末尾のソートキーから不透明なカーソル文字列を作成する"""
+    raw = json.dumps([recipe_level, recipe_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[int, int]:
+    """カーソル文字列をソートキー（recipe_level, id）に戻す
+
+    Raises:
+        ValueError: カーソルの形式が不正な場合
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        recipe_level, recipe_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(recipe_level, int) or not isinstance(recipe_id, int):
+        raise ValueError("Invalid cursor")
+    return recipe_level, recipe_id
+
+def after_cursor(cursor: str):
+    """カーソル位置より後ろの行を選ぶWHERE条件を作成する
+
+    行値比較 (recipe_level, id) > (x, y) と同値だが、先頭に recipe_level >= x を
+    置くことで MySQL / SQLite ともにインデックスのレンジスキャンの開始位置として使われる。
+    """
+    recipe_level, recipe_id = decode_cursor(cursor)
+    return and_(
+        RecipeDB.recipe_level >= recipe_level,
+        or_(RecipeDB.recipe_level > recipe_level, RecipeDB.id > recipe_id)
+    )
+
+def next_cursor(items: List[Dict[str, Any]], limit: int) -> Optional[str]:
+    """次ページのカーソルを返す（最終ページの場合はNone）"""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last["recipe_level"], last["id"])
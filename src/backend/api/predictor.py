@@ -0,0 +1,431 @@
+import os
+import threading
+from time import monotonic
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from src.data.snapshot import columns_from_batches
+from src.models.cache import PredictionCache
+from src.models.engine import DEFAULT_MODEL_PATH, LinearModel
+from src.models.features import TARGETS, encode_jobs
+from src.models.grid import GridPredictor
+from src.models.incremental import StatsAccumulator, coefficient_drift, recipes_to_columns
+from src.models.registry import DEFAULT_REGISTRY_PATH, ModelRegistry
+from .batching import MicroBatcher
+from .crud import iter_recipe_batches
+from .logging_config import logger
+from .models import RecipeSearchParams
+
+# モデルの保存場所（レジストリに ACTIVE がなければ MODEL_PATH の単体モデルを使う）
+MODEL_REGISTRY_PATH = os.getenv('MODEL_REGISTRY_PATH', DEFAULT_REGISTRY_PATH)
+MODEL_PATH = os.getenv('MODEL_PATH', DEFAULT_MODEL_PATH)
+
+# モデルが見つからなかった場合に、次にディスクを確認するまでの秒数
+MODEL_RETRY_SECONDS = 5.0
+
+# 全データでの再学習（整合性チェック）の間隔（秒、0なら定期実行しない）
+MODEL_REFIT_INTERVAL_SECONDS = float(os.getenv('MODEL_REFIT_INTERVAL_SECONDS', '3600'))
+
+# 再学習のたびにレジストリに保存するモデルを残す件数（ACTIVE / SHADOW は件数によらず残す）
+MODEL_REGISTRY_KEEP_VERSIONS = int(os.getenv('MODEL_REGISTRY_KEEP_VERSIONS', '10'))
+
+# 登録されたレシピをまとめて追加学習するまでの待ち時間（秒、0なら登録ごとに反映する）
+MODEL_FOLD_INTERVAL_SECONDS = float(os.getenv('MODEL_FOLD_INTERVAL_SECONDS', '1'))
+
+# 一括推論のレスポンスの列名と値の型
+PREDICTION_FIELDS = {'id': int, **dict.fromkeys(TARGETS, float)}
+
+# 推論結果のキャッシュ件数
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', '10000'))
+
+# 同時に届いた /predict をまとめて推論する件数の上限と待ち時間（1件ならまとめない）
+PREDICT_BATCH_MAX_SIZE = int(os.getenv('PREDICT_BATCH_MAX_SIZE', '64'))
+PREDICT_BATCH_WAIT_MS = float(os.getenv('PREDICT_BATCH_WAIT_MS', '2'))
+
+class ShadowComparison:
+    """シャドウモデルと稼働中モデルの推論値の差（相対差の平均）を集計する"""
+
+    def __init__(self):
+        self.reset(None, None)
+
+    def reset(self, active_version: Optional[str], shadow_version: Optional[str]) -> None:
+        self.active_version = active_version
+        self.shadow_version = shadow_version
+        self.count = 0
+        self._sums = {target: 0.0 for target in TARGETS}
+
+    def record(self, predictions: List[Dict[str, float]], shadow_predictions: List[Dict[str, float]]) -> None:
+        for target in TARGETS:
+            active = np.array([p[target] for p in predictions])
+            shadow = np.array([p[target] for p in shadow_predictions])
+            with np.errstate(divide='ignore', invalid='ignore'):
+                diff = np.abs(shadow - active) / np.abs(active)
+            self._sums[target] += float(np.nansum(diff))
+        self.count += len(predictions)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active_version": self.active_version,
+            "shadow_version": self.shadow_version,
+            "count": self.count,
+            "mean_relative_difference": {
+                target: self._sums[target] / self.count if self.count else None for target in TARGETS
+            },
+        }
+
+registry = ModelRegistry(MODEL_REGISTRY_PATH)
+prediction_cache = PredictionCache(maxsize=PREDICTION_CACHE_SIZE)
+shadow_comparison = ShadowComparison()
+
+# 稼働中・シャドウのモデル（事前計算グリッド）。差し替えは1回の代入で行い、
+# 処理中のリクエストは取得済みの古いオブジェクトのまま最後まで推論する
+_serving: Optional[GridPredictor] = None
+_shadow: Optional[GridPredictor] = None
+_next_load_attempt = 0.0
+# 稼働中モデルを更新する処理（切り替え・追加学習・再学習）を直列化するロック
+_update_lock = threading.Lock()
+
+# 追加学習を待っているレシピ（(レシピID, レシピ) のリスト）と、反映を予約したタイマー
+_pending_folds: List[Tuple[int, Any]] = []
+_fold_timer: Optional[threading.Timer] = None
+_pending_lock = threading.Lock()
+# 追加学習の通し番号と、再学習中に追加学習した (通し番号, レシピID, 列) の記録
+# （再学習したモデルに、読み込み後に登録されたレシピを反映し直すために使う）
+_fold_seq = 0
+_fold_log: List[Tuple[int, np.ndarray, Dict[str, np.ndarray]]] = []
+_refits_running = 0
+# 稼働中のモデルの学習に含まれている最大のレシピID（これ以下のレシピは追加学習しない）
+_included_through = 0
+
+def _publish(predictor: Optional[GridPredictor]) -> Optional[GridPredictor]:
+    """稼働中のモデルを差し替え、推論結果のキャッシュを新しいバージョンに切り替える（以前のモデルを返す）"""
+    global _serving
+    previous, _serving = _serving, predictor
+    prediction_cache.set_version(predictor.version if predictor is not None else None)
+    return previous
+
+def _discard_pending_folds() -> None:
+    """追加学習を待っているレシピを捨てる（モデルを丸ごと差し替えた場合）"""
+    global _fold_timer, _included_through
+    with _pending_lock:
+        if _fold_timer is not None:
+            _fold_timer.cancel()
+            _fold_timer = None
+        _pending_folds.clear()
+    _included_through = 0
+
+def _build_predictor(model: LinearModel) -> GridPredictor:
+    predictor = GridPredictor(model)
+    logger.debug(f"Built prediction grid for model {model.version} ({predictor.nbytes / 1024 / 1024:.1f} MB)")
+    return predictor
+
+def _load_initial() -> None:
+    """レジストリの ACTIVE / SHADOW（なければ MODEL_PATH）からモデルを読み込む"""
+    global _shadow, _next_load_attempt
+    if monotonic() < _next_load_attempt:
+        return
+    _next_load_attempt = monotonic() + MODEL_RETRY_SECONDS
+    try:
+        model = None
+        active = registry.active_version()
+        if active:
+            model = registry.load(active)
+        elif os.path.exists(MODEL_PATH):
+            model = LinearModel.load(MODEL_PATH)
+        if model is None:
+            return
+        shadow = registry.shadow_version()
+        if shadow and shadow != model.version:
+            _shadow = _build_predictor(registry.load(shadow))
+            shadow_comparison.reset(model.version, shadow)
+        _publish(_build_predictor(model))
+        logger.info(f"Loaded prediction model {model.version}")
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Failed to load prediction model: {e}")
+
+def get_predictor() -> Optional[GridPredictor]:
+    """推論に使うモデル（事前計算グリッド）を取得する（初回は遅延読み込み。未学習ならNone）"""
+    if _serving is None:
+        _load_initial()
+    return _serving
+
+def get_model() -> Optional[LinearModel]:
+    """稼働中の推論モデルを取得する"""
+    predictor = get_predictor()
+    return predictor.model if predictor else None
+
+def set_model(model: Optional[LinearModel]) -> None:
+    """推論モデルを差し替える（テスト用）"""
+    global _shadow, _next_load_attempt
+    _discard_pending_folds()
+    _publish(_build_predictor(model) if model is not None else None)
+    _shadow = None
+    _next_load_attempt = 0.0
+
+def activate_version(version: str) -> GridPredictor:
+    """レジストリのモデルを稼働中のモデルにする
+
+    読み込みとグリッドの作成を終えてから差し替えるため、切り替え中のリクエストも止まらない。
+
+    Raises:
+        KeyError: 保存されていないバージョンの場合
+    """
+    with _update_lock:
+        predictor = _build_predictor(registry.load(version))
+        registry.set_active(version)
+        previous = _publish(predictor)
+        if _shadow is not None:
+            shadow_comparison.reset(version, _shadow.version)
+        if previous is not None and previous.version != version and (
+                _shadow is None or _shadow.version != previous.version):
+            registry.unload(previous.version)
+    logger.info(f"Activated prediction model {version}")
+    return predictor
+
+def set_shadow_version(version: Optional[str]) -> Optional[GridPredictor]:
+    """シャドウモデルを設定する（Noneで解除）
+
+    シャドウモデルは稼働中のモデルと並行して推論し、結果は返さずに差だけを集計する。
+    """
+    global _shadow
+    predictor = _build_predictor(registry.load(version)) if version else None
+    registry.set_shadow(version)
+    _shadow = predictor
+    shadow_comparison.reset(_serving.version if _serving else None, version)
+    return predictor
+
+def fold_in_recipes(recipes: Sequence[Any], ids: Sequence[int]) -> Optional[str]:
+    """登録されたレシピを稼働中モデルに追加学習する
+
+    MODEL_FOLD_INTERVAL_SECONDS の間に登録されたレシピはまとめて1回で反映する（登録のたびに
+    グリッドを作り直してモデルバージョンを変えない）。間隔が0ならその場で反映する。
+
+    Args:
+        recipes: 登録したレシピ（RecipeCreate など属性で参照できるオブジェクト）
+        ids: 各レシピのID
+
+    Returns:
+        Optional[str]: その場で反映した場合は更新後のモデルバージョン（まとめて反映する場合はNone）
+    """
+    global _fold_timer
+    if not recipes:
+        return None
+    with _pending_lock:
+        _pending_folds.extend(zip(ids, recipes))
+        if MODEL_FOLD_INTERVAL_SECONDS > 0:
+            if _fold_timer is None:
+                _fold_timer = threading.Timer(MODEL_FOLD_INTERVAL_SECONDS, flush_folds)
+                _fold_timer.daemon = True
+                _fold_timer.start()
+            return None
+    return flush_folds()
+
+def flush_folds() -> Optional[str]:
+    """追加学習を待っているレシピを稼働中モデルの十分統計量に足し込み、更新したモデルに差し替える
+
+    全件を読み直さずに係数を解き直すため、数ミリ秒で反映される。追加学習したモデルは
+    レジストリには保存しない（定期的な全データでの再学習で保存される）。再学習で読み込み済みの
+    レシピは足し込まない。
+
+    Returns:
+        Optional[str]: 更新後のモデルバージョン（反映するレシピや稼働中のモデルがなければNone）
+    """
+    global _fold_timer, _fold_seq
+    with _pending_lock:
+        pending = list(_pending_folds)
+        _pending_folds.clear()
+        if _fold_timer is not None:
+            _fold_timer.cancel()
+            _fold_timer = None
+    with _update_lock:
+        current = _serving
+        pending = [(recipe_id, recipe) for recipe_id, recipe in pending if recipe_id > _included_through]
+        if current is None or not pending:
+            return None
+        ids = np.fromiter((recipe_id for recipe_id, _ in pending), dtype=np.int64, count=len(pending))
+        columns = recipes_to_columns([recipe for _, recipe in pending])
+        model = current.model.partial_fit(columns)
+        _publish(_build_predictor(model))
+        _fold_seq += 1
+        if _refits_running:
+            _fold_log.append((_fold_seq, ids, columns))
+    logger.info(f"Folded {len(pending)} recipes into prediction model {current.version} -> {model.version}")
+    return model.version
+
+def _begin_refit() -> int:
+    """再学習の開始を記録し、その時点の追加学習の通し番号を返す"""
+    global _refits_running
+    with _update_lock:
+        _refits_running += 1
+        return _fold_seq
+
+def _end_refit() -> None:
+    global _refits_running
+    with _update_lock:
+        _refits_running -= 1
+        if not _refits_running:
+            _fold_log.clear()
+
+def _publish_refit(current: GridPredictor, accumulator: StatsAccumulator, high_water: int,
+                   start_seq: int, publish: bool) -> Dict[str, Any]:
+    """再学習したモデルに読み込み後の追加学習を足し込み、稼働中のモデルと差し替える（比較結果を返す）"""
+    global _included_through
+    model = accumulator.to_model(alpha=current.model.alpha, data_version=current.model.data_version)
+    with _update_lock:
+        replayed = 0
+        for seq, ids, columns in _fold_log:
+            newer = ids > high_water
+            if seq > start_seq and newer.any():
+                model = model.partial_fit({name: values[newer] for name, values in columns.items()})
+                replayed += int(newer.sum())
+        incremental = _serving.model if _serving is not None else current.model
+        report = {
+            "previous_version": incremental.version,
+            "version": model.version,
+            "rows": model.n_samples,
+            "replayed_rows": replayed,
+            "incremental_rows": incremental.n_samples,
+            "coefficient_drift": coefficient_drift(incremental, model),
+        }
+        if publish:
+            registry.publish(model)
+            registry.set_active(model.version)
+        _publish(_build_predictor(model))
+        _included_through = max(_included_through, high_water)
+    if publish:
+        removed = registry.prune(MODEL_REGISTRY_KEEP_VERSIONS)
+        if removed:
+            logger.info(f"Removed old prediction models: {removed}")
+    return report
+
+async def refit_from_database(db: Any, publish: bool = True) -> Optional[Dict[str, Any]]:
+    """全データで稼働中モデルを学習し直し、追加学習の結果と比較する（整合性チェック）
+
+    データベースはバッチ単位で読み込み、十分統計量だけを集計する。読み込み中に追加学習した
+    レシピのうち、読み込んだ最大のIDより新しいものは再学習したモデルにも足し込んでから差し替える。
+    publish=True ならレジストリに保存して ACTIVE にし、古いバージョンを MODEL_REGISTRY_KEEP_VERSIONS
+    件まで削除する。ロックを取る処理（係数の計算・グリッドの作成・差し替え）は別スレッドで行い、
+    追加学習の反映を待つ間もイベントループを止めない。
+
+    Returns:
+        Optional[Dict[str, Any]]: 比較結果（稼働中のモデルがなければNone）
+    """
+    current = get_predictor()
+    if current is None:
+        return None
+    start_seq = await run_in_threadpool(_begin_refit)
+    try:
+        accumulator = StatsAccumulator(current.model.spec)
+        high_water = 0
+        async for batch in iter_recipe_batches(db, RecipeSearchParams(count="none")):
+            accumulator.add(columns_from_batches([batch]))
+            high_water = max([high_water] + [row['id'] for row in batch])
+        report = await run_in_threadpool(_publish_refit, current, accumulator, high_water, start_seq, publish)
+    finally:
+        await run_in_threadpool(_end_refit)
+    logger.info(f"Refitted prediction model: {report}")
+    return report
+
+def get_shadow() -> Optional[GridPredictor]:
+    return _shadow
+
+def list_model_versions() -> List[Dict[str, Any]]:
+    """レジストリに保存済みのモデルの一覧"""
+    return registry.list_versions()
+
+def _input_columns(inputs: Sequence[Any]) -> Dict[str, np.ndarray]:
+    """推論入力のリストを predict_batch の列にする"""
+    n = len(inputs)
+    return {
+        'job_code': encode_jobs([item.job for item in inputs]),
+        'recipe_level': np.fromiter((item.recipe_level for item in inputs), dtype=np.int64, count=n),
+        'master_book_level': np.fromiter((item.master_book_level or 0 for item in inputs), dtype=np.int64, count=n),
+        'stars': np.fromiter((item.stars or 0 for item in inputs), dtype=np.int64, count=n),
+    }
+
+def _predict_rows(predictor: Union[LinearModel, GridPredictor], columns: Dict[str, np.ndarray],
+                  rows: Optional[np.ndarray] = None) -> List[Dict[str, float]]:
+    """列（rows を指定した場合はその行だけ）を1回の行列演算で推論する"""
+    if rows is not None:
+        columns = {name: values[rows] for name, values in columns.items()}
+    predictions = predictor.predict_batch(columns)
+    values = [predictions[target].tolist() for target in TARGETS]
+    return [dict(zip(TARGETS, row)) for row in zip(*values)]
+
+def _predict_uncached(predictor: Union[LinearModel, GridPredictor], inputs: Sequence[Any]) -> List[Dict[str, float]]:
+    """推論入力のリストを1回の行列演算で推論する"""
+    if not inputs:
+        return []
+    return _predict_rows(predictor, _input_columns(inputs))
+
+def predict_inputs(predictor: Union[LinearModel, GridPredictor], inputs: Sequence[Any],
+                   cache: Optional[PredictionCache] = prediction_cache) -> List[Dict[str, float]]:
+    """推論入力のリストを推論する
+
+    事前計算グリッドの範囲内の入力は、キャッシュを1件ずつ引くより配列の参照の方が速いため
+    キャッシュを使わない。キャッシュはグリッドの範囲外の入力（GridPredictor 以外のモデルでは
+    すべての入力）にだけ使い、キャッシュにない入力をまとめて1回の行列演算で推論して登録する。
+
+    Args:
+        inputs: job, recipe_level, master_book_level, stars を属性に持つオブジェクト
+                （PredictionInput や SELECT結果の行）のリスト
+        cache: 推論結果のキャッシュ（Noneなら使わない）
+    """
+    if cache is None or not inputs:
+        return _predict_uncached(predictor, inputs)
+
+    columns = _input_columns(inputs)
+    results: List[Optional[Dict[str, float]]] = [None] * len(inputs)
+    if isinstance(predictor, GridPredictor):
+        covered = predictor.covers(columns)
+        if covered.all():
+            return _predict_rows(predictor, columns)
+        inside = np.flatnonzero(covered)
+        for i, prediction in zip(inside.tolist(), _predict_rows(predictor, columns, inside)):
+            results[i] = prediction
+        outside = np.flatnonzero(~covered).tolist()
+    else:
+        outside = list(range(len(inputs)))
+
+    version = predictor.version
+    keys = {i: cache.normalize(inputs[i]) for i in outside}
+    missing = []
+    for i in outside:
+        cached = cache.get(version, keys[i])
+        if cached is None:
+            missing.append(i)
+        else:
+            # 呼び出し側で変更されてもキャッシュに影響しないようコピーを返す
+            results[i] = dict(cached)
+    if missing:
+        for i, prediction in zip(missing, _predict_rows(predictor, columns, np.asarray(missing))):
+            cache.put(version, keys[i], dict(prediction))
+            results[i] = prediction
+    return results
+
+def compare_with_shadow(inputs: Sequence[Any], predictions: List[Dict[str, float]]) -> None:
+    """シャドウモデルが設定されていれば同じ入力を推論し、稼働中モデルとの差を集計する"""
+    shadow = _shadow
+    if shadow is None or not inputs or (_serving is not None and shadow.version == _serving.version):
+        return
+    shadow_comparison.record(predictions, _predict_uncached(shadow, inputs))
+
+class ModelUnavailableError(Exception):
+    """推論モデルが読み込まれていない"""
+
+def _predict_micro_batch(inputs: List[Any]) -> List[Tuple[Dict[str, float], str]]:
+    """同時に届いた /predict の入力をまとめて推論する（結果とモデルバージョンの組を返す）"""
+    predictor = get_predictor()
+    if predictor is None:
+        raise ModelUnavailableError()
+    predictions = predict_inputs(predictor, inputs)
+    compare_with_shadow(inputs, predictions)
+    return [(prediction, predictor.version) for prediction in predictions]
+
+prediction_batcher = MicroBatcher(
+    _predict_micro_batch,
+    max_batch_size=PREDICT_BATCH_MAX_SIZE,
+    max_wait_ms=PREDICT_BATCH_WAIT_MS
+)
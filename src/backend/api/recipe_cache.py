@@ -0,0 +1,67 @@
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from src.utils.lru import LRUCache
+from .serialization import dumps
+
+# レシピ詳細のキャッシュ件数
+RECIPE_CACHE_SIZE = int(os.getenv('RECIPE_CACHE_SIZE', '10000'))
+
+def recipe_etag(recipe: Dict[str, Any]) -> str:
+    """レシピの強いETag（IDと行のバージョンから決まる）"""
+    return f'"{recipe["id"]}-{recipe["version"]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダーが ETag に一致するか（GETの条件付きリクエストなので弱い比較）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+@dataclass(frozen=True)
+class CachedRecipe:
+    """キャッシュしたレシピ詳細（シリアライズ済みのレスポンスボディとETag）"""
+    etag: str
+    body: bytes
+
+class RecipeCache:
+    """GET /recipes/{id} のリードスルーキャッシュ
+
+    レシピはシリアライズ済みのレスポンスボディとして保持する。更新・削除時は invalidate() で
+    取り除く。DBの読み込み中に更新・削除された場合に古い内容を登録しないよう、
+    読み込み前に generation を控えておき、その間に invalidate() があれば登録しない。
+    """
+
+    def __init__(self, maxsize: int = RECIPE_CACHE_SIZE):
+        self.generation = 0
+        self._cache: LRUCache[CachedRecipe] = LRUCache(maxsize)
+
+    def get(self, recipe_id: int) -> Optional[CachedRecipe]:
+        return self._cache.get(recipe_id)
+
+    def put(self, recipe: Dict[str, Any], generation: Optional[int] = None) -> CachedRecipe:
+        """レシピをシリアライズして登録する（generation が古ければ登録せずに返す）"""
+        body = dumps({"success": True, "data": recipe, "meta": None})
+        cached = CachedRecipe(etag=recipe_etag(recipe), body=body)
+        if generation is None or generation == self.generation:
+            self._cache.put(recipe["id"], cached)
+        return cached
+
+    def invalidate(self, recipe_id: int) -> None:
+        self.generation += 1
+        self._cache.pop(recipe_id)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
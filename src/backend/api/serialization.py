@@ -0,0 +1,60 @@
+import json
+import math
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson がなければ標準の json を使う（値は同じ。浮動小数点数の表記は異なる場合がある）
+    orjson = None
+
+def json_default(value: Any) -> Any:
+    """JSONで直接扱えない値を変換する（jsonable_encoder を通した場合と同じ表現にする）"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _replace_non_finite(value: Any) -> Any:
+    """NaN・無限大を None にした値（標準の json 用。orjson と同じ扱いにする）"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _replace_non_finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_replace_non_finite(item) for item in value]
+    return value
+
+def dumps(content: Any) -> bytes:
+    """値をJSONのバイト列にする（日時はISO形式、非ASCII文字はそのまま）
+
+    NaN・無限大はJSONで表せないため null にする（orjson の動作。標準の json でも同じにする）。
+    出力をパースした値は orjson の有無によらず同じだが、バイト列が同じとは限らない
+    （1e16 を orjson は 1e16、標準の json は 1e+16 と書くなど、浮動小数点数の表記が異なる）。
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default)
+    return json.dumps(
+        _replace_non_finite(content),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=json_default
+    ).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """dumps でシリアライズする JSONResponse
+
+    jsonable_encoder で辞書をコピーしてから json.dumps する代わりに、
+    日時などを含んだままの値をそのままバイト列にする。
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,76 @@
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+import csv
+import io
+
+from .serialization import dumps
+
+# 1行（1レシピ）として受け付ける最大バイト数
+MAX_LINE_BYTES = 64 * 1024
+
+async def iter_ndjson_lines(chunks: AsyncIterator[bytes],
+                            max_line_bytes: int = MAX_LINE_BYTES) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """受信中のバイト列をNDJSONの行単位に分割する
+
+    本文全体をバッファせず、未完成の1行分だけを保持する。空行は読み飛ばす。
+
+    Yields:
+        Tuple[int, Optional[bytes]]: (行番号, 行の内容)。max_line_bytes を超えた行は内容をNoneで返す
+    """
+    buffer = bytearray()
+    line_no = 0
+    oversized = False
+
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end == -1:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        # 行末までの残りは読み捨てる
+                        oversized = True
+                        buffer.clear()
+                break
+
+            line_no += 1
+            if oversized:
+                oversized = False
+                yield line_no, None
+            else:
+                buffer += chunk[start:end]
+                line = bytes(buffer).strip()
+                buffer.clear()
+                if len(line) > max_line_bytes:
+                    yield line_no, None
+                elif line:
+                    yield line_no, line
+            start = end + 1
+
+    # 末尾に改行がない最終行
+    if oversized or buffer.strip():
+        line_no += 1
+        yield line_no, None if oversized else bytes(buffer).strip()
+
+async def encode_ndjson(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """行のバッチを1バッチずつNDJSONのバイト列に変換する"""
+    async for rows in batches:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+async def encode_csv(batches: AsyncIterator[List[Dict[str, Any]]],
+                     fields: Sequence[str]) -> AsyncIterator[bytes]:
+    """行のバッチを1バッチずつCSVのバイト列に変換する（先頭にヘッダー行を出力）"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue().encode("utf-8")
+    async for rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in rows:
+            writer.writerow([
+                value.isoformat() if isinstance(value, (datetime, date)) else value
+                for value in (row[field] for field in fields)
+            ])
+        yield buffer.getvalue().encode("utf-8")
@@ -0,0 +1,152 @@
+"""一覧系レスポンスの形式（Accept ヘッダーによるコンテンツネゴシエーション）
+
+    application/json                      既定。StandardResponse の形式
+    application/msgpack                   StandardResponse と同じ構造を MessagePack で表現（日時はISO形式の文字列）
+    application/vnd.apache.arrow.stream   data の行を列指向の Arrow IPC ストリームで表現
+                                          （meta はスキーマのメタデータ "meta" にJSONで格納）
+
+MessagePack は msgpack、Arrow は pyarrow が必要（pip install -e ".[binary]"）。
+インストールされていない形式は選択されず、他に受け付けられる形式がなければ 406 を返す。
+"""
+import io
+from datetime import date, datetime
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from fastapi.responses import Response
+
+from .models.responses import ErrorResponse, StandardResponse
+from .serialization import dumps, json_default
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# 同じ品質値で指定された場合は先頭を優先する
+FORMATS = (JSON, MSGPACK, ARROW)
+# 別名として受け付けるメディアタイプ
+ALIASES = {"application/x-msgpack": MSGPACK}
+
+def available_formats() -> Tuple[str, ...]:
+    """必要なライブラリがインストールされている形式"""
+    return tuple(
+        media_type for media_type in FORMATS
+        if (media_type != MSGPACK or msgpack is not None) and (media_type != ARROW or pyarrow is not None)
+    )
+
+def _parse_accept(accept: str) -> List[Tuple[str, float]]:
+    """Accept ヘッダーを (メディアレンジ, 品質値) のリストにする"""
+    ranges = []
+    for item in accept.split(","):
+        media_range, *params = (part.strip() for part in item.split(";"))
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((ALIASES.get(media_range.lower(), media_range.lower()), quality))
+    return ranges
+
+def negotiate(accept: Optional[str]) -> Optional[str]:
+    """Accept ヘッダーから返す形式を決める（受け付けられる形式がなければNone）
+
+    各形式には最も具体的に一致するメディアレンジの品質値を使い、品質値・具体性・FORMATS の順で選ぶ。
+    """
+    if not accept:
+        return JSON
+    ranges = _parse_accept(accept)
+    best = None
+    for order, media_type in enumerate(available_formats()):
+        main_type = media_type.split("/")[0]
+        match = None
+        for media_range, quality in ranges:
+            if media_range == media_type:
+                specificity = 2
+            elif media_range == f"{main_type}/*":
+                specificity = 1
+            elif media_range == "*/*":
+                specificity = 0
+            else:
+                continue
+            if match is None or specificity > match[1]:
+                match = (quality, specificity)
+        if match is None or match[0] <= 0:
+            continue
+        key = (match[0], match[1], -order)
+        if best is None or key > best[0]:
+            best = (key, media_type)
+    return best[1] if best else None
+
+def not_acceptable_response():
+    """受け付けられる形式がない場合のレスポンス（JSONで返す）"""
+    error = ErrorResponse(
+        code=406,
+        message="None of the accepted media types can be produced",
+        type="not_acceptable",
+        details={"available": list(available_formats())}
+    )
+    return StandardResponse.error_response(error=error)
+
+def _arrow_type(python_type: type):
+    """列の値の型（int / float / str / datetime など）に対応する Arrow の型"""
+    arrow_types = {
+        bool: pyarrow.bool_(),
+        int: pyarrow.int64(),
+        float: pyarrow.float64(),
+        str: pyarrow.string(),
+        datetime: pyarrow.timestamp("us"),
+        date: pyarrow.date32(),
+    }
+    return arrow_types[python_type]
+
+def _arrow_stream(data: List[Dict[str, Any]], meta: Optional[Dict[str, Any]],
+                  fields: Optional[Mapping[str, type]] = None) -> bytes:
+    """行のリストを列ごとにまとめて Arrow IPC ストリームにする
+
+    fields（列名と値の型）を指定した場合はそのスキーマにする（0件でも列を含む）。
+    指定しない場合は先頭の行の列から推定する。
+    """
+    if fields is not None:
+        schema = pyarrow.schema([(name, _arrow_type(python_type)) for name, python_type in fields.items()])
+        columns = {name: [row.get(name) for row in data] for name in fields}
+        table = pyarrow.table(columns, schema=schema)
+    else:
+        table = pyarrow.table({name: [row.get(name) for row in data] for name in (data[0] if data else ())})
+    table = table.replace_schema_metadata({"meta": dumps(meta)})
+    sink = io.BytesIO()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def rows_response(media_type: str, data: List[Dict[str, Any]], meta: Optional[Dict[str, Any]] = None,
+                  fields: Optional[Mapping[str, type]] = None):
+    """行のリストを negotiate() で決めた形式のレスポンスにする
+
+    Args:
+        fields: 行の列名と値の型（Arrow のスキーマに使う。省略時は先頭の行から推定する）
+    """
+    headers = {"Vary": "Accept"}
+    if media_type == MSGPACK:
+        content = msgpack.packb({"success": True, "data": data, "meta": meta}, default=json_default)
+    elif media_type == ARROW:
+        content = _arrow_stream(data, meta, fields)
+    else:
+        response = StandardResponse.success_response(data=data, meta=meta)
+        response.headers.update(headers)
+        return response
+    return Response(content=content, media_type=media_type, headers=headers)
@@ -0,0 +1,142 @@
+import argparse
+import glob
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.utils.csv_to_json import iter_recipes, write_json_array, write_ndjson
+
+@dataclass
+class FileResult:
+    """1ファイル分の変換結果"""
+    path: str
+    recipes: List[Dict[str, Any]] = field(default_factory=list)
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    seconds: float = 0.0
+
+@dataclass
+class IngestResult:
+    """全ファイルをマージした結果"""
+    recipes: List[Dict[str, Any]]
+    files: List[FileResult]
+    duplicates: int
+    seconds: float
+
+    @property
+    def rows(self) -> int:
+        """読み込んだ行数（スキップした行を含む）"""
+        return sum(len(f.recipes) + len(f.errors) for f in self.files)
+
+def validate_recipe(recipe: Dict[str, Any]) -> Optional[str]:
+    """値の範囲をチェックする（docs/data_collection_procedure.md の検証項目）
+
+    Returns:
+        Optional[str]: 不正な場合はエラー内容、正常ならNone
+    """
+    if not recipe['name'] or not recipe['job']:
+        return "name and job are required"
+    if recipe['recipe_level'] < 1:
+        return f"recipe_level must be positive: {recipe['recipe_level']}"
+    for key in ('max_durability', 'max_quality', 'required_durability',
+                'required_craftsmanship', 'required_control'):
+        if recipe[key] < 0:
+            return f"{key} must not be negative: {recipe[key]}"
+    for key in ('progress_per_100', 'quality_per_100'):
+        if recipe[key] <= 0:
+            return f"{key} must be positive: {recipe[key]}"
+    return None
+
+def parse_file(path: str) -> FileResult:
+    """CSVファイル1つを変換・検証する（ワーカープロセスで実行）"""
+    start = perf_counter()
+    result = FileResult(path=path)
+
+    def on_error(line_no: int, message: str) -> None:
+        result.errors.append((line_no, message))
+
+    result.recipes.extend(iter_recipes(path, on_error=on_error, validate=validate_recipe))
+    result.seconds = perf_counter() - start
+    return result
+
+def expand_inputs(inputs: Iterable[str]) -> List[str]:
+    """ディレクトリ・globパターン・ファイルパスをCSVファイルの一覧に展開する"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(glob.glob(os.path.join(item, '*.csv')))
+        else:
+            paths.extend(glob.glob(item) or [item])
+    # 同じファイルの二重指定を除き、順序を固定する
+    return sorted(set(os.path.abspath(p) for p in paths))
+
+def ingest(paths: List[str], workers: Optional[int] = None) -> IngestResult:
+    """複数のCSVファイルをプロセスプールで並列に変換し、(name, job) で重複を除いてマージする
+
+    重複した場合は、ファイル名順で先に出現したレシピを残す。
+
+    Args:
+        paths: CSVファイルのパス一覧
+        workers: ワーカープロセス数（省略時はCPUコア数）
+    """
+    start = perf_counter()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(paths) or 1))
+    if workers == 1:
+        files = [parse_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            files = list(executor.map(parse_file, paths))
+
+    merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    duplicates = 0
+    for file_result in files:
+        for recipe in file_result.recipes:
+            key = (recipe['name'], recipe['job'])
+            if key in merged:
+                duplicates += 1
+                continue
+            merged[key] = recipe
+    return IngestResult(
+        recipes=list(merged.values()),
+        files=files,
+        duplicates=duplicates,
+        seconds=perf_counter() - start
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse per-job recipe CSV exports in parallel and merge them')
+    parser.add_argument('inputs', nargs='+', help='CSV files, directories or glob patterns (e.g. "data/*.csv")')
+    parser.add_argument('output', help='Output file path')
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='ndjson',
+                        help='Output format (default: ndjson)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of worker processes (default: CPU count)')
+
+    args = parser.parse_args()
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("❌ CSVファイルが見つかりません")
+        sys.exit(1)
+
+    result = ingest(paths, workers=args.workers)
+    for file_result in result.files:
+        for line_no, message in file_result.errors[:20]:
+            logging.warning(f"{os.path.basename(file_result.path)} (line {line_no}): {message}")
+        print(f"  {os.path.basename(file_result.path)}: {len(file_result.recipes)}件"
+              f"（スキップ {len(file_result.errors)}行, {file_result.seconds:.2f}秒）")
+
+    writer = write_ndjson if args.format == 'ndjson' else write_json_array
+    with open(args.output, 'w', encoding='utf-8') as f:
+        count = writer(result.recipes, f)
+
+    rate = result.rows / result.seconds if result.seconds else 0.0
+    print(f"✅ 取り込み完了: {len(paths)}ファイル, {count}件のレシピを{args.output}に保存しました"
+          f"（重複 {result.duplicates}件）")
+    print(f"   {result.rows}行 / {result.seconds:.2f}秒 = {rate:,.0f}行/秒")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""学習用データの列指向スナップショット
+
+recipes + recipe_stats + training_data を結合した行を、列ごとに型付きの .npy ファイルとして保存する。
+読み込み時は np.load(mmap_mode="r") でメモリマップするため、ファイルサイズに関係なくほぼ一瞬で開ける。
+
+ディレクトリ構成:
+    <path>/manifest.json   データバージョン・行数・列の型
+    <path>/<列名>.npy      列ごとの配列
+
+使い方:
+    python -m src.data.snapshot build data/processed/snapshot                      # DBから作成
+    python -m src.data.snapshot build data/processed/snapshot --ndjson recipes.ndjson
+    python -m src.data.snapshot info data/processed/snapshot
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+
+from src.utils.files import atomic_directory
+
+# ジョブは JOBS のインデックス（job_code）として保存する
+JOBS = ('CRP', 'BSM', 'ARM', 'GSM', 'LTW', 'WVR', 'ALC', 'CUL')
+JOB_CODES = {job: code for code, job in enumerate(JOBS)}
+
+# 保存する列と型（job は job_code に変換して保存）
+SNAPSHOT_COLUMNS = {
+    'id': np.int64,
+    'job_code': np.int8,
+    'recipe_level': np.int16,
+    'master_book_level': np.int16,
+    'stars': np.int8,
+    'max_durability': np.int32,
+    'max_quality': np.int32,
+    'required_durability': np.int32,
+    'required_craftsmanship': np.int32,
+    'required_control': np.int32,
+    'progress_per_100': np.float64,
+    'quality_per_100': np.float64,
+}
+
+MANIFEST_FILE = 'manifest.json'
+SNAPSHOT_FORMAT_VERSION = 1
+DEFAULT_SNAPSHOT_PATH = os.path.join('data', 'processed', 'snapshot')
+
+@dataclass
+class Snapshot:
+    """読み込んだスナップショット（列は読み取り専用のメモリマップ配列）"""
+    path: str
+    data_version: str
+    rows: int
+    columns: Dict[str, np.ndarray]
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __len__(self) -> int:
+        return self.rows
+
+def _to_row(recipe: Dict[str, Any]) -> tuple:
+    """レシピの辞書を SNAPSHOT_COLUMNS の順の値に変換する"""
+    try:
+        job_code = JOB_CODES[recipe['job']]
+    except KeyError:
+        raise ValueError(f"Unknown job: {recipe['job']}")
+    return (
+        recipe.get('id') or 0,
+        job_code,
+        recipe['recipe_level'],
+        recipe.get('master_book_level') or 0,
+        recipe.get('stars') or 0,
+        recipe['max_durability'],
+        recipe['max_quality'],
+        recipe['required_durability'],
+        recipe['required_craftsmanship'],
+        recipe['required_control'],
+        recipe['progress_per_100'],
+        recipe['quality_per_100'],
+    )
+
+def columns_from_batches(batches: Iterable[List[Dict[str, Any]]]) -> Dict[str, np.ndarray]:
+    """レシピのバッチから列ごとの配列を作成する"""
+    chunks: Dict[str, List[np.ndarray]] = {name: [] for name in SNAPSHOT_COLUMNS}
+    for batch in batches:
+        if not batch:
+            continue
+        values = list(zip(*(_to_row(recipe) for recipe in batch)))
+        for (name, dtype), column in zip(SNAPSHOT_COLUMNS.items(), values):
+            chunks[name].append(np.asarray(column, dtype=dtype))
+    return {
+        name: np.concatenate(chunks[name]) if chunks[name] else np.empty(0, dtype=dtype)
+        for name, dtype in SNAPSHOT_COLUMNS.items()
+    }
+
+def compute_data_version(columns: Dict[str, np.ndarray]) -> str:
+    """列の内容から決まるデータバージョン（内容が同じなら同じ値）"""
+    digest = hashlib.sha256()
+    for name in SNAPSHOT_COLUMNS:
+        column = np.ascontiguousarray(columns[name])
+        digest.update(name.encode('utf-8'))
+        digest.update(column.dtype.str.encode('ascii'))
+        digest.update(column.tobytes())
+    return digest.hexdigest()[:16]
+
+def write_snapshot(path: str, columns: Dict[str, np.ndarray]) -> str:
+    """列ごとの配列をスナップショットとして保存する
+
+    一時ディレクトリに書き出してから置き換えるため、読み込み中のプロセスが
+    書きかけのファイルを開くことはない。
+
+    Returns:
+        str: データバージョン
+    """
+    rows = {len(columns[name]) for name in SNAPSHOT_COLUMNS}
+    if len(rows) != 1:
+        raise ValueError("All snapshot columns must have the same length")
+    data_version = compute_data_version(columns)
+
+    with atomic_directory(path) as tmp_path:
+        for name, dtype in SNAPSHOT_COLUMNS.items():
+            np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(columns[name], dtype=dtype))
+        manifest = {
+            'format_version': SNAPSHOT_FORMAT_VERSION,
+            'data_version': data_version,
+            'rows': rows.pop(),
+            'jobs': list(JOBS),
+            'columns': {name: np.dtype(dtype).str for name, dtype in SNAPSHOT_COLUMNS.items()},
+            'created_at': datetime.utcnow().isoformat(),
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return data_version
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """スナップショットのマニフェストを読み込む"""
+    with open(os.path.join(path, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format: {manifest.get('format_version')}")
+    return manifest
+
+def load_snapshot(path: str = DEFAULT_SNAPSHOT_PATH, mmap: bool = True) -> Snapshot:
+    """スナップショットを読み込む
+
+    Args:
+        path: スナップショットのディレクトリ
+        mmap: Trueならコピーせずにメモリマップで開く（読み取り専用）
+    """
+    manifest = read_manifest(path)
+    columns = {
+        name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r' if mmap else None)
+        for name in manifest['columns']
+    }
+    return Snapshot(
+        path=path,
+        data_version=manifest['data_version'],
+        rows=manifest['rows'],
+        columns=columns
+    )
+
+def iter_ndjson_batches(ndjson_file: str, batch_size: int = 10000) -> Iterator[List[Dict[str, Any]]]:
+    """NDJSONファイル（/recipes/export や src.data.ingest の出力）をバッチ単位で読み込む"""
+    batch = []
+    with open(ndjson_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+async def columns_from_database() -> Dict[str, np.ndarray]:
+    """データベースの全レシピから列ごとの配列を作成する"""
+    # API用の依存パッケージはDBから作成する場合だけ必要
+    from src.backend.api.crud import iter_recipe_batches
+    from src.backend.api.database import AsyncSessionLocal, async_engine
+    from src.backend.api.models import RecipeSearchParams
+
+    batches = []
+    try:
+        async with AsyncSessionLocal() as db:
+            async for batch in iter_recipe_batches(db, RecipeSearchParams(count='none')):
+                batches.append(columns_from_batches([batch]))
+    finally:
+        await async_engine.dispose()
+    return {
+        name: np.concatenate([batch[name] for batch in batches]) if batches else np.empty(0, dtype=dtype)
+        for name, dtype in SNAPSHOT_COLUMNS.items()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or inspect the columnar training data snapshot')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build = subparsers.add_parser('build', help='Build a snapshot from the database or an NDJSON file')
+    build.add_argument('path', nargs='?', default=DEFAULT_SNAPSHOT_PATH, help='Snapshot directory')
+    build.add_argument('--ndjson', help='Read recipes from an NDJSON file instead of the database')
+    info = subparsers.add_parser('info', help='Show snapshot metadata and load time')
+    info.add_argument('path', nargs='?', default=DEFAULT_SNAPSHOT_PATH, help='Snapshot directory')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = perf_counter()
+        if args.ndjson:
+            columns = columns_from_batches(iter_ndjson_batches(args.ndjson))
+        else:
+            columns = asyncio.run(columns_from_database())
+        data_version = write_snapshot(args.path, columns)
+        print(f"✅ スナップショット作成完了: {len(columns['id'])}行, data_version={data_version}"
+              f"（{perf_counter() - start:.2f}秒）")
+    else:
+        start = perf_counter()
+        snapshot = load_snapshot(args.path)
+        elapsed_ms = (perf_counter() - start) * 1000
+        print(f"data_version: {snapshot.data_version}")
+        print(f"rows: {snapshot.rows}")
+        print(f"columns: {', '.join(f'{name}({column.dtype})' for name, column in snapshot.columns.items())}")
+        print(f"load: {elapsed_ms:.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,63 @@
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
+from time import monotonic
+import threading
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, errorcode
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import MySQLConnectionPool
 import logging
 from dotenv import load_dotenv
 import os
 
+# bulk_insert_recipes の1トランザクションあたりの件数
+DEFAULT_BATCH_SIZE = 500
+
+# 単一接続モードでは、この秒数以上使われていない接続だけ利用前に死活確認（ping）する
+HEALTH_CHECK_INTERVAL = 30.0
+
+# プールモードで接続が空くまで待つ秒数
+CHECKOUT_TIMEOUT = 30.0
+
+INSERT_RECIPE_QUERY = """
+INSERT INTO recipes (name, job, recipe_level, master_book_level, stars, 
+                   patch_version, collected_at)
+VALUES (%s, %s, %s, %s, %s, %s, NOW())
+"""
+
+INSERT_RECIPE_STATS_QUERY = """
+INSERT INTO recipe_stats (id, max_durability, max_quality, required_durability)
+VALUES (%s, %s, %s, %s)
+"""
+
+INSERT_TRAINING_DATA_QUERY = """
+INSERT INTO training_data (id, required_craftsmanship, required_control,
+                         progress_per_100_efficiency, quality_per_100_efficiency)
+VALUES (%s, %s, %s, %s, %s)
+"""
+
+@dataclass
+class BulkInsertResult:
+    """bulk_insert_recipes の結果（行番号は入力の何件目か、0始まり）
+
+    ids は登録した行の行番号からレシピIDへの対応、duplicates は重複で登録しなかった行の行番号、
+    failed は登録に失敗した行の行番号からエラーへの対応。
+    """
+    ids: Dict[int, int] = field(default_factory=dict)
+    duplicates: List[int] = field(default_factory=list)
+    failed: Dict[int, str] = field(default_factory=dict)
+
 class MySQLConnector:
-    def __init__(self):
-        """データベース接続用クラスの初期化"""
+    def __init__(self, pool_size: Optional[int] = None):
+        """データベース接続用クラスの初期化
+        
+        Args:
+            pool_size: コネクションプールの接続数。省略時は環境変数 MYSQL_POOL_SIZE、
+                       どちらもなければプールを使わず1本の接続を使う（スレッドセーフではない）
+        """
         # .envファイルから環境変数を読み込み
         load_dotenv()
         
@@ -17,23 +67,50 @@ class MySQLConnector:
         self.user = os.getenv('MYSQL_USER', 'root')
         self.password = os.getenv('MYSQL_PASSWORD')
         self.connection = None
+        self.pool: Optional[MySQLConnectionPool] = None
+        
+        if pool_size is None and os.getenv('MYSQL_POOL_SIZE'):
+            pool_size = int(os.getenv('MYSQL_POOL_SIZE'))
+        self.pool_size = pool_size
+        
+        # 接続（サーバー側の接続ID）ごとの最終利用時刻とプリペアドステートメント
+        self._lock = threading.Lock()
+        self._last_used: Dict[int, float] = {}
+        self._prepared: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        # プールの接続数までしかチェックアウトさせない（プールは空きがないと待たずに PoolError を送出するため）
+        self._checkout_slots = threading.BoundedSemaphore(pool_size) if pool_size else None
+        # スレッドごとの作業単位（session() のブロック）で使っている接続
+        self._local = threading.local()
         
         if not self.password:
             raise ValueError("Database password not set in environment variables")
     
     def connect(self) -> bool:
-        """データベースに接続
+        """データベースに接続（プールモードではコネクションプールを作成）
         
         Returns:
             bool: 接続成功ならTrue
         """
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password
-            )
+            if self.pool_size:
+                # プールへ返却時にセッションをリセットすると
+                # プリペアドステートメントが破棄されるため、リセットしない
+                self.pool = MySQLConnectionPool(
+                    pool_name=f"ff14_recipe_{id(self)}",
+                    pool_size=self.pool_size,
+                    pool_reset_session=False,
+                    host=self.host,
+                    database=self.database,
+                    user=self.user,
+                    password=self.password
+                )
+            else:
+                self.connection = mysql.connector.connect(
+                    host=self.host,
+                    database=self.database,
+                    user=self.user,
+                    password=self.password
+                )
             return True
         except Error as e:
             logging.error(f"Error connecting to MySQL: {e}")
@@ -41,8 +118,94 @@ class MySQLConnector:
             
     def disconnect(self):
         """データベース接続を閉じる"""
+        with self._lock:
+            self._last_used.clear()
+            self._prepared.clear()
         if self.connection and self.connection.is_connected():
             self.connection.close() 
+        # プール内の接続は参照がなくなった時点で閉じられる
+        self.pool = None
+    
+    @contextmanager
+    def session(self) -> Iterator[Any]:
+        """1つの作業単位で使う接続を取得する
+        
+        ブロック内で呼んだメソッドはすべて同じ接続を使うため、チェックアウトと死活確認は1回で済む。
+        プールモードでは空いている接続がなければ CHECKOUT_TIMEOUT 秒まで待つ。
+        
+        例:
+            with connector.session():
+                recipe_id = connector.insert_recipe(...)
+                connector.insert_recipe_stats(recipe_id, ...)
+        """
+        cnx = getattr(self._local, 'cnx', None)
+        if cnx is not None:
+            yield cnx
+            return
+        with self._checkout() as cnx:
+            self._local.cnx = cnx
+            try:
+                yield cnx
+            finally:
+                self._local.cnx = None
+    
+    @contextmanager
+    def _checkout(self) -> Iterator[Any]:
+        """接続を取得する（プールモードではチェックアウトし、終了時に返却する）"""
+        if self.pool_size:
+            if self.pool is None and not self.connect():
+                raise Error("Connection pool is not available")
+            if not self._checkout_slots.acquire(timeout=CHECKOUT_TIMEOUT):
+                raise PoolError("Timed out waiting for a pooled connection")
+            try:
+                # プールがチェックアウト時に is_connected() で死活確認し、切れていれば再接続する
+                cnx = self.pool.get_connection()
+                try:
+                    yield cnx
+                finally:
+                    cnx.close()  # プールへ返却
+            finally:
+                self._checkout_slots.release()
+        else:
+            if not self.connection and not self.connect():
+                raise Error("Connection is not available")
+            self._check_health(self.connection)
+            yield self.connection
+    
+    def _check_health(self, cnx) -> None:
+        """しばらく使われていない接続を ping し、必要なら再接続する（単一接続モード）"""
+        connection_id = cnx.connection_id
+        now = monotonic()
+        with self._lock:
+            last_used = self._last_used.get(connection_id)
+        if last_used is None or now - last_used >= HEALTH_CHECK_INTERVAL:
+            cnx.ping(reconnect=True, attempts=3, delay=1)
+            if cnx.connection_id != connection_id:
+                # 再接続した場合、旧接続のプリペアドステートメントは使えない
+                with self._lock:
+                    self._prepared.pop(connection_id, None)
+                    self._last_used.pop(connection_id, None)
+                connection_id = cnx.connection_id
+        with self._lock:
+            self._last_used[connection_id] = now
+    
+    def _prepared_cursor(self, cnx, query: str):
+        """接続ごとにキャッシュしたプリペアドステートメント用カーソルを返す
+        
+        同じカーソルで同じSQLを実行すると、サーバー側で準備済みの文が再利用される。
+        """
+        with self._lock:
+            statements = self._prepared.setdefault(cnx.connection_id, {})
+            self._prepared.move_to_end(cnx.connection_id)
+            # プールが再接続すると接続IDが変わり、旧IDの文は使われなくなるため古いものから捨てる
+            while len(self._prepared) > 2 * (self.pool_size or 1):
+                self._prepared.popitem(last=False)
+            cursor = statements.get(query)
+        if cursor is None:
+            cursor = cnx.cursor(prepared=True)
+            with self._lock:
+                statements[query] = cursor
+        return cursor
     
     def execute_query(self, query: str, params: tuple = None) -> Optional[List[tuple]]:
         """SQLクエリを実行し、結果を返す
@@ -55,20 +218,18 @@ class MySQLConnector:
             Optional[List[tuple]]: SELECT文の場合は結果を返す、それ以外はNone
         """
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
+            with self.session() as cnx:
+                cursor = cnx.cursor()
+                cursor.execute(query, params)
                 
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            
-            if query.strip().upper().startswith('SELECT'):
-                result = cursor.fetchall()
-                cursor.close()
-                return result
-            else:
-                self.connection.commit()
-                cursor.close()
-                return None
+                if query.strip().upper().startswith('SELECT'):
+                    result = cursor.fetchall()
+                    cursor.close()
+                    return result
+                else:
+                    cnx.commit()
+                    cursor.close()
+                    return None
                 
         except Error as e:
             logging.error(f"Error executing query: {e}")
@@ -90,24 +251,15 @@ class MySQLConnector:
         Returns:
             Optional[int]: 登録されたレシピのID。失敗時はNone
         """
-        query = """
-        INSERT INTO recipes (name, job, recipe_level, master_book_level, stars, 
-                           patch_version, collected_at)
-        VALUES (%s, %s, %s, %s, %s, %s, NOW())
-        """
+        query = INSERT_RECIPE_QUERY
         params = (name, job, recipe_level, master_book_level, stars, patch_version)
         
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
-                
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            self.connection.commit()
-            
-            recipe_id = cursor.lastrowid
-            cursor.close()
-            return recipe_id
+            with self.session() as cnx:
+                cursor = self._prepared_cursor(cnx, query)
+                cursor.execute(query, params)
+                cnx.commit()
+                return cursor.lastrowid
             
         except Error as e:
             logging.error(f"Error inserting recipe: {e}")
@@ -126,21 +278,15 @@ class MySQLConnector:
         Returns:
             bool: 登録成功ならTrue
         """
-        query = """
-        INSERT INTO recipe_stats (id, max_durability, max_quality, required_durability)
-        VALUES (%s, %s, %s, %s)
-        """
+        query = INSERT_RECIPE_STATS_QUERY
         params = (recipe_id, max_durability, max_quality, required_durability)
         
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
-                
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            self.connection.commit()
-            cursor.close()
-            return True
+            with self.session() as cnx:
+                cursor = self._prepared_cursor(cnx, query)
+                cursor.execute(query, params)
+                cnx.commit()
+                return True
             
         except Error as e:
             logging.error(f"Error inserting recipe stats: {e}")
@@ -161,23 +307,16 @@ class MySQLConnector:
         Returns:
             bool: 登録成功ならTrue
         """
-        query = """
-        INSERT INTO training_data (id, required_craftsmanship, required_control,
-                                 progress_per_100_efficiency, quality_per_100_efficiency)
-        VALUES (%s, %s, %s, %s, %s)
-        """
+        query = INSERT_TRAINING_DATA_QUERY
         params = (recipe_id, required_craftsmanship, required_control,
                  progress_per_100, quality_per_100)
         
         try:
-            if not self.connection or not self.connection.is_connected():
-                self.connect()
-                
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            self.connection.commit()
-            cursor.close()
-            return True
+            with self.session() as cnx:
+                cursor = self._prepared_cursor(cnx, query)
+                cursor.execute(query, params)
+                cnx.commit()
+                return True
             
         except Error as e:
             logging.error(f"Error inserting training data: {e}")
@@ -216,7 +355,11 @@ class MySQLConnector:
             params.append(stars)
             
         try:
-            result = self.execute_query(query, tuple(params))
+            # 条件の組み合わせごとのSQLをプリペアドステートメントとして再利用する
+            with self.session() as cnx:
+                cursor = self._prepared_cursor(cnx, query)
+                cursor.execute(query, tuple(params))
+                result = cursor.fetchall()
             if result:
                 # 結果を辞書のリストに変換
                 columns = ['id', 'name', 'job', 'recipe_level', 
@@ -229,9 +372,15 @@ class MySQLConnector:
             logging.error(f"Error searching recipes: {e}")
             return []
     
-    def bulk_insert_recipes(self, recipes: List[Dict[str, Any]]) -> List[int]:
+    def bulk_insert_recipes(self, recipes: Iterable[Dict[str, Any]],
+                            batch_size: int = DEFAULT_BATCH_SIZE) -> BulkInsertResult:
         """レシピを一括登録する
         
+        batch_size 件ごとに1トランザクションで、recipes / recipe_stats / training_data を
+        それぞれ executemany（複数行INSERT）で登録する。バッチ内でエラーが発生した場合は
+        そのバッチをロールバックし、1件ずつのトランザクションで登録し直して失敗した行だけを記録する。
+        同じ名前と職種のレシピが登録済み（またはバッチ内で重複）の場合は登録しない。
+        
         Args:
             recipes: 登録するレシピのリスト。各レシピは以下のキーを含む辞書：
                     - name: レシピ名
@@ -247,52 +396,127 @@ class MySQLConnector:
                     - required_control: 必要加工精度
                     - progress_per_100: 作業効率100あたりの工数進捗量
                     - quality_per_100: 加工効率100あたりの品質進捗量
+            batch_size: 1トランザクションで登録する件数
         
         Returns:
-            List[int]: 登録されたレシピのIDリスト
+            BulkInsertResult: 行番号ごとの登録されたレシピのID、重複で登録しなかった行、登録に失敗した行とエラー
         """
-        registered_ids = []
-        
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than or equal to 1")
+
+        result = BulkInsertResult()
+        iterator = enumerate(recipes)
+        while True:
+            batch = list(islice(iterator, batch_size))
+            if not batch:
+                break
+            self._insert_recipe_batch(batch, result)
+        return result
+
+    def _insert_recipe_batch(self, batch: List[Tuple[int, Dict[str, Any]]], result: BulkInsertResult) -> None:
+        """1バッチ分のレシピを1トランザクションで登録する"""
         try:
-            for recipe in recipes:
-                # 1. レシピ基本情報の登録
-                recipe_id = self.insert_recipe(
-                    name=recipe['name'],
-                    job=recipe['job'],
-                    recipe_level=recipe['recipe_level'],
-                    master_book_level=recipe.get('master_book_level', 0),
-                    stars=recipe.get('stars', 0),
-                    patch_version=recipe.get('patch_version', '6.4')
-                )
-                
-                if recipe_id:
-                    # 2. レシピ作業情報の登録
-                    stats_success = self.insert_recipe_stats(
-                        recipe_id=recipe_id,
-                        max_durability=recipe['max_durability'],
-                        max_quality=recipe['max_quality'],
-                        required_durability=recipe['required_durability']
-                    )
-                    
-                    # 3. 学習データの登録
-                    training_success = self.insert_training_data(
-                        recipe_id=recipe_id,
-                        required_craftsmanship=recipe['required_craftsmanship'],
-                        required_control=recipe['required_control'],
-                        progress_per_100=recipe['progress_per_100'],
-                        quality_per_100=recipe['quality_per_100']
-                    )
-                    
-                    if stats_success and training_success:
-                        registered_ids.append(recipe_id)
-                    else:
-                        # 登録に失敗した場合は、そのレシピのデータを削除
-                        self.execute_query("DELETE FROM training_data WHERE id = %s", (recipe_id,))
-                        self.execute_query("DELETE FROM recipe_stats WHERE id = %s", (recipe_id,))
-                        self.execute_query("DELETE FROM recipes WHERE id = %s", (recipe_id,))
-            
-            return registered_ids
-            
+            with self.session() as cnx:
+                self._insert_recipe_batch_on(cnx, batch, result)
         except Error as e:
             logging.error(f"Error in bulk insert: {e}")
-            return registered_ids 
\ No newline at end of file
+            for index, _ in batch:
+                result.failed.setdefault(index, str(e))
+
+    def _insert_recipe_batch_on(self, cnx, batch: List[Tuple[int, Dict[str, Any]]],
+                                result: BulkInsertResult) -> None:
+        """取得済みの接続上で1バッチ分のレシピを登録する"""
+        cursor = cnx.cursor()
+        try:
+            keyed = []
+            for index, recipe in batch:
+                try:
+                    keyed.append((index, (recipe['name'], recipe['job']), recipe))
+                except KeyError as e:
+                    result.failed[index] = f"Missing field: {e}"
+
+            # 登録済み・バッチ内で重複するレシピを除外
+            existing = self._find_recipe_ids(cursor, [key for _, key, _ in keyed])
+            pending: Dict[Tuple[str, str], Tuple[int, Dict[str, Any]]] = {}
+            for index, key, recipe in keyed:
+                if key in existing or key in pending:
+                    logging.warning(f"Skipping duplicate recipe: {key[0]} ({key[1]})")
+                    result.duplicates.append(index)
+                    continue
+                pending[key] = (index, recipe)
+            if not pending:
+                return
+
+            try:
+                ids = self._insert_rows(cursor, [r for _, r in pending.values()])
+                cnx.commit()
+            except (Error, KeyError) as e:
+                # バッチ全体をロールバックし、どの行が原因かを1件ずつ登録して確かめる
+                cnx.rollback()
+                logging.error(f"Error in bulk insert (batch of {len(batch)} rolled back, retrying row by row): {e}")
+                self._insert_rows_one_by_one(cnx, cursor, list(pending.values()), result)
+                return
+            for key, (index, _) in pending.items():
+                result.ids[index] = ids[key]
+
+        except Error as e:
+            cnx.rollback()
+            logging.error(f"Error in bulk insert (batch of {len(batch)} rolled back): {e}")
+            for index, _ in batch:
+                result.failed.setdefault(index, str(e))
+        finally:
+            cursor.close()
+
+    def _insert_rows(self, cursor, rows: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+        """3テーブルに複数行INSERTで登録し、(name, job) ごとのレシピIDを返す（コミットしない）"""
+        # 1. レシピ基本情報の登録
+        cursor.executemany(INSERT_RECIPE_QUERY, [
+            (r['name'], r['job'], r['recipe_level'], r.get('master_book_level', 0),
+             r.get('stars', 0), r.get('patch_version', '6.4'))
+            for r in rows
+        ])
+        # 複数行INSERTでは各行のIDが返らないため、一意キーで引き直す
+        ids = self._find_recipe_ids(cursor, [(r['name'], r['job']) for r in rows])
+
+        # 2. レシピ作業情報の登録
+        cursor.executemany(INSERT_RECIPE_STATS_QUERY, [
+            (ids[(r['name'], r['job'])], r['max_durability'], r['max_quality'], r['required_durability'])
+            for r in rows
+        ])
+
+        # 3. 学習データの登録
+        cursor.executemany(INSERT_TRAINING_DATA_QUERY, [
+            (ids[(r['name'], r['job'])], r['required_craftsmanship'], r['required_control'],
+             r['progress_per_100'], r['quality_per_100'])
+            for r in rows
+        ])
+        return ids
+
+    def _insert_rows_one_by_one(self, cnx, cursor, rows: List[Tuple[int, Dict[str, Any]]],
+                                result: BulkInsertResult) -> None:
+        """失敗したバッチの行を1件ずつのトランザクションで登録する"""
+        for index, recipe in rows:
+            try:
+                ids = self._insert_rows(cursor, [recipe])
+                cnx.commit()
+            except (Error, KeyError) as e:
+                cnx.rollback()
+                if isinstance(e, Error) and e.errno == errorcode.ER_DUP_ENTRY:
+                    # 他の接続が同じレシピを先に登録した
+                    result.duplicates.append(index)
+                else:
+                    result.failed[index] = str(e) if isinstance(e, Error) else f"Missing field: {e}"
+                continue
+            result.ids[index] = ids[(recipe['name'], recipe['job'])]
+
+    def _find_recipe_ids(self, cursor, keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], int]:
+        """(name, job) の組に対応するレシピIDを取得する"""
+        if not keys:
+            return {}
+        placeholders = ", ".join(["(%s, %s)"] * len(keys))
+        params = [value for key in keys for value in key]
+        cursor.execute(
+            f"SELECT id, name, job FROM recipes WHERE (name, job) IN ({placeholders})",
+            params
+        )
+        return {(name, job): recipe_id for recipe_id, name, job in cursor.fetchall()}
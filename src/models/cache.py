@@ -0,0 +1,74 @@
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from src.utils.lru import LRUCache
+
+class PredictionCache:
+    """推論結果のLRUキャッシュ
+
+    キーは正規化した入力。稼働中のモデルバージョンは set_version() で切り替え、その時点で
+    キャッシュを空にする。稼働中以外のバージョンでの取得・登録は無視するため、切り替え前のモデルで
+    推論中のリクエストがあっても古い結果が返ったり、キャッシュが空にされ続けたりすることはない。
+    ヒット・ミス・追い出しの回数は切り替えをまたいで累積する。
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self.invalidations = 0
+        # 稼働中以外のバージョンで取得・登録しようとして無視した回数
+        self.stale = 0
+        self._version: Optional[str] = None
+        self._cache: LRUCache[Dict[str, float]] = LRUCache(maxsize)
+        # バージョンの確認と取得・登録を、切り替えに対して不可分に行う
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(item: Any) -> Tuple:
+        """入力（属性で参照できるオブジェクト）をキャッシュキー用のタプルにする
+
+        モデルが使う特徴量（ジョブ・レベル・秘伝書レベル・☆）だけを含める。クラフターレベル・
+        作業精度・加工精度などは推論結果に影響しないためキーに含めない。未指定の秘伝書レベル・☆は
+        推論時と同じく0として扱う。
+        """
+        return (
+            item.job,
+            int(item.recipe_level),
+            int(item.master_book_level or 0),
+            int(item.stars or 0),
+        )
+
+    def set_version(self, model_version: Optional[str]) -> None:
+        """稼働中のモデルバージョンを切り替え、以前の結果を捨てる"""
+        with self._lock:
+            if model_version == self._version:
+                return
+            if self._version is not None:
+                self.invalidations += 1
+            self._version = model_version
+            self._cache.clear()
+
+    def get(self, model_version: str, key: Hashable) -> Optional[Dict[str, float]]:
+        with self._lock:
+            if model_version != self._version:
+                self.stale += 1
+                return None
+            return self._cache.get(key)
+
+    def put(self, model_version: str, key: Hashable, prediction: Dict[str, float]) -> None:
+        with self._lock:
+            if model_version != self._version:
+                self.stale += 1
+                return
+            self._cache.put(key, prediction)
+
+    def clear(self) -> None:
+        """結果を捨てる（稼働中のバージョンはそのまま）"""
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "model_version": self._version,
+            "invalidations": self.invalidations,
+            "stale": self.stale,
+        }
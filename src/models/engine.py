@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+from src.utils.files import atomic_directory
+from .features import INPUT_COLUMNS, TARGETS, FeatureSpec, encode_jobs
+
+MODEL_FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+DEFAULT_MODEL_PATH = os.path.join('data', 'processed', 'model')
+
+def _solve(spec: FeatureSpec, xtx: np.ndarray, xty: np.ndarray, alpha: float) -> np.ndarray:
+    """正規方程式 (XᵀX + αI) β = Xᵀy を解く（切片には正則化をかけない）"""
+    penalty = np.full(spec.n_features, alpha, dtype=np.float64)
+    penalty[0] = 0.0
+    a = xtx + np.diag(penalty)
+    try:
+        return np.linalg.solve(a, xty)
+    except np.linalg.LinAlgError:
+        # データが少なく特異になる場合は最小二乗解を使う
+        return np.linalg.lstsq(a, xty, rcond=None)[0]
+
+class LinearModel:
+    """4つの目的変数をまとめて推論する線形（リッジ回帰）モデル
+
+    学習データそのものではなく十分統計量（XᵀX, Xᵀy, 件数）を保持するため、
+    データを追加した場合も統計量を足し合わせるだけで再学習できる。
+    """
+
+    def __init__(self, spec: FeatureSpec, coef: np.ndarray, xtx: np.ndarray, xty: np.ndarray,
+                 n_samples: int, alpha: float = 1.0, data_version: Optional[str] = None,
+                 trained_at: Optional[str] = None):
+        self.spec = spec
+        self.coef = coef
+        self.xtx = xtx
+        self.xty = xty
+        self.n_samples = n_samples
+        self.alpha = alpha
+        self.data_version = data_version
+        self.trained_at = trained_at or datetime.utcnow().isoformat()
+        self.version = self._compute_version()
+
+    def _compute_version(self) -> str:
+        """特徴量の設定と係数から決まるモデルバージョン"""
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.spec.to_dict(), sort_keys=True).encode('utf-8'))
+        digest.update(np.ascontiguousarray(self.coef, dtype=np.float64).tobytes())
+        return digest.hexdigest()[:12]
+
+    @classmethod
+    def from_stats(cls, spec: FeatureSpec, xtx: np.ndarray, xty: np.ndarray, n_samples: int,
+                   alpha: float = 1.0, data_version: Optional[str] = None) -> "LinearModel":
+        """十分統計量から係数を求めてモデルを作成する"""
+        coef = _solve(spec, xtx, xty, alpha)
+        return cls(spec, coef, xtx, xty, n_samples, alpha=alpha, data_version=data_version)
+
+    @staticmethod
+    def compute_stats(spec: FeatureSpec, columns: Mapping[str, np.ndarray]):
+        """学習データの列から十分統計量 (XᵀX, Xᵀy, 件数) を求める"""
+        X = spec.transform_columns(columns)
+        Y = np.column_stack([spec.encode_targets(columns[target]) for target in TARGETS])
+        return X.T @ X, X.T @ Y, len(X)
+
+    @classmethod
+    def fit(cls, columns: Mapping[str, np.ndarray], spec: FeatureSpec = FeatureSpec(),
+            alpha: float = 1.0, data_version: Optional[str] = None) -> "LinearModel":
+        """学習データの列（スナップショットなど）からモデルを学習する"""
+        xtx, xty, n_samples = cls.compute_stats(spec, columns)
+        return cls.from_stats(spec, xtx, xty, n_samples, alpha=alpha, data_version=data_version)
+
+    def partial_fit(self, columns: Mapping[str, np.ndarray]) -> "LinearModel":
+        """追加の学習データを十分統計量に足し込んだ新しいモデルを返す（元のモデルは変更しない）
+
+        係数は足し合わせた XᵀX, Xᵀy から解き直すため、全データで学習し直した場合と同じになる。
+        """
+        xtx, xty, n_samples = self.compute_stats(self.spec, columns)
+        return self.from_stats(
+            self.spec, self.xtx + xtx, self.xty + xty, self.n_samples + n_samples,
+            alpha=self.alpha, data_version=self.data_version
+        )
+
+    def predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """特徴量行列から推論値 (行数, 目的変数の数) を求める"""
+        return self.spec.decode_targets(X @ self.coef)
+
+    def predict_batch(self, features: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+        """複数レシピをまとめて推論する
+
+        Args:
+            features: INPUT_COLUMNS の列を持つ辞書。job_code の代わりに job（ジョブ名の並び）も指定できる。
+                      master_book_level / stars は省略時0
+
+        Returns:
+            Dict[str, np.ndarray]: 目的変数ごとの推論値
+        """
+        if 'job_code' in features:
+            job_code = np.asarray(features['job_code'])
+        else:
+            job_code = encode_jobs(features['job'])
+        recipe_level = np.asarray(features['recipe_level'])
+        zeros = np.zeros(len(recipe_level), dtype=np.int64)
+        master_book_level = features.get('master_book_level')
+        stars = features.get('stars')
+        X = self.spec.transform(
+            job_code,
+            recipe_level,
+            zeros if master_book_level is None else master_book_level,
+            zeros if stars is None else stars
+        )
+        predictions = self.predict_matrix(X)
+        return {target: predictions[:, i] for i, target in enumerate(TARGETS)}
+
+    def save(self, path: str) -> None:
+        """モデルをディレクトリに保存する（meta.json + 係数・十分統計量の .npy）"""
+        with atomic_directory(path) as tmp_path:
+            np.save(os.path.join(tmp_path, 'coef.npy'), np.asarray(self.coef, dtype=np.float64))
+            np.save(os.path.join(tmp_path, 'xtx.npy'), np.asarray(self.xtx, dtype=np.float64))
+            np.save(os.path.join(tmp_path, 'xty.npy'), np.asarray(self.xty, dtype=np.float64))
+            meta = {
+                'format_version': MODEL_FORMAT_VERSION,
+                'model_version': self.version,
+                'spec': self.spec.to_dict(),
+                'alpha': self.alpha,
+                'inputs': list(INPUT_COLUMNS),
+                'targets': list(TARGETS),
+                'n_samples': self.n_samples,
+                'data_version': self.data_version,
+                'trained_at': self.trained_at,
+            }
+            with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH, mmap: bool = True) -> "LinearModel":
+        """保存したモデルを読み込む（係数・十分統計量はメモリマップで開く）"""
+        with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('format_version') != MODEL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format: {meta.get('format_version')}")
+        if tuple(meta['targets']) != TARGETS:
+            raise ValueError(f"Unexpected model targets: {meta['targets']}")
+        mmap_mode = 'r' if mmap else None
+        return cls(
+            FeatureSpec.from_dict(meta['spec']),
+            np.load(os.path.join(path, 'coef.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, 'xtx.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, 'xty.npy'), mmap_mode=mmap_mode),
+            meta['n_samples'],
+            alpha=meta['alpha'],
+            data_version=meta.get('data_version'),
+            trained_at=meta.get('trained_at')
+        )
@@ -0,0 +1,94 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+from src.data.snapshot import JOB_CODES, JOBS
+
+# 推論の入力と出力
+INPUT_COLUMNS = ('job_code', 'recipe_level', 'master_book_level', 'stars')
+TARGETS = ('required_craftsmanship', 'required_control', 'progress_per_100', 'quality_per_100')
+
+# レシピレベルは 0-1 程度に正規化してから多項式にする（高次の項の桁あふれ防止）
+LEVEL_SCALE = 100.0
+
+def encode_jobs(jobs: Sequence[str]) -> np.ndarray:
+    """ジョブ名の並びを job_code（JOBS のインデックス）の配列に変換する"""
+    try:
+        return np.fromiter((JOB_CODES[job] for job in jobs), dtype=np.int8, count=len(jobs))
+    except KeyError as e:
+        raise ValueError(f"Unknown job: {e.args[0]}")
+
+@dataclass(frozen=True)
+class FeatureSpec:
+    """特徴量の作り方
+
+    Attributes:
+        degree: レシピレベルの多項式の次数
+        job_interactions: ジョブごとにレシピレベルの傾きを変えるか
+        log_target: 目的変数を log1p 変換して学習するか（誤差を比率で扱う）
+    """
+    degree: int = 3
+    job_interactions: bool = False
+    log_target: bool = True
+
+    @property
+    def n_features(self) -> int:
+        """切片を含む特徴量の数"""
+        # 切片 + レベルの多項式 + 秘伝書（有無・レベル）+ ☆ + ☆×レベル + ジョブ（CRP以外）
+        n = 1 + self.degree + 2 + 1 + 1 + (len(JOBS) - 1)
+        if self.job_interactions:
+            n += len(JOBS) - 1
+        return n
+
+    def transform(self, job_code: np.ndarray, recipe_level: np.ndarray,
+                  master_book_level: np.ndarray, stars: np.ndarray) -> np.ndarray:
+        """入力列から特徴量行列 (行数, n_features) を作成する"""
+        level = np.asarray(recipe_level, dtype=np.float64) / LEVEL_SCALE
+        master_book = np.asarray(master_book_level, dtype=np.float64)
+        star = np.asarray(stars, dtype=np.float64)
+        job = np.asarray(job_code, dtype=np.int64)
+
+        X = np.empty((len(level), self.n_features), dtype=np.float64)
+        X[:, 0] = 1.0
+        column = 1
+        power = np.ones_like(level)
+        for _ in range(self.degree):
+            power = power * level
+            X[:, column] = power
+            column += 1
+        X[:, column] = master_book > 0
+        X[:, column + 1] = master_book
+        X[:, column + 2] = star
+        X[:, column + 3] = star * level
+        column += 4
+
+        # ジョブのone-hot（先頭のジョブは切片に含める）
+        one_hot = X[:, column:column + len(JOBS) - 1]
+        one_hot[:] = 0.0
+        others = job > 0
+        one_hot[np.flatnonzero(others), job[others] - 1] = 1.0
+        column += len(JOBS) - 1
+        if self.job_interactions:
+            X[:, column:column + len(JOBS) - 1] = one_hot * level[:, None]
+        return X
+
+    def transform_columns(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """スナップショットの列（INPUT_COLUMNS を含む辞書）から特徴量行列を作成する"""
+        return self.transform(*(columns[name] for name in INPUT_COLUMNS))
+
+    def encode_targets(self, targets: np.ndarray) -> np.ndarray:
+        """目的変数を学習用の値に変換する"""
+        targets = np.asarray(targets, dtype=np.float64)
+        return np.log1p(targets) if self.log_target else targets
+
+    def decode_targets(self, values: np.ndarray) -> np.ndarray:
+        """学習用の値を目的変数に戻す"""
+        return np.expm1(values) if self.log_target else values
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FeatureSpec":
+        return cls(**data)
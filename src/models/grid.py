@@ -0,0 +1,87 @@
+from typing import Any, Dict, Mapping, Tuple
+
+import numpy as np
+
+from src.data.snapshot import JOBS
+from .engine import LinearModel
+from .features import TARGETS, encode_jobs
+
+# 事前計算する入力の範囲（範囲外の入力はモデルで直接推論する）
+GRID_MAX_LEVEL = 120
+GRID_MAX_MASTER_BOOK_LEVEL = 15
+GRID_MAX_STARS = 5
+
+class GridPredictor:
+    """入力の組み合わせをすべて事前に推論しておき、配列の添字参照で推論するラッパー
+
+    入力は ジョブ(8) × レシピレベル(0-120) × 秘伝書レベル(0-15) × ☆(0-5) の離散値なので、
+    モデルの公開時に全組み合わせ（約9万件）を1回の predict_batch で計算しておける。
+    範囲外の入力だけは元のモデルで推論する。LinearModel と同じ predict_batch を持つ。
+    """
+
+    def __init__(self, model: LinearModel):
+        self.model = model
+        self.version = model.version
+        self.shape = (len(JOBS), GRID_MAX_LEVEL + 1, GRID_MAX_MASTER_BOOK_LEVEL + 1, GRID_MAX_STARS + 1)
+        job, level, master_book, stars = (axis.ravel() for axis in np.meshgrid(
+            *(np.arange(size) for size in self.shape), indexing='ij'
+        ))
+        predictions = model.predict_batch({
+            'job_code': job,
+            'recipe_level': level,
+            'master_book_level': master_book,
+            'stars': stars,
+        })
+        # (ジョブ, レベル, 秘伝書レベル, ☆, 目的変数) の5次元配列
+        self.values = np.stack([predictions[target] for target in TARGETS], axis=-1).reshape(
+            self.shape + (len(TARGETS),)
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def _index(self, features: Mapping[str, Any]) -> Tuple[np.ndarray, ...]:
+        """入力の (ジョブ, レベル, 秘伝書レベル, ☆) の添字"""
+        if 'job_code' in features:
+            job_code = np.asarray(features['job_code'], dtype=np.int64)
+        else:
+            job_code = encode_jobs(features['job']).astype(np.int64)
+        recipe_level = np.asarray(features['recipe_level'], dtype=np.int64)
+        zeros = np.zeros(len(recipe_level), dtype=np.int64)
+        master_book_level = features.get('master_book_level')
+        master_book_level = zeros if master_book_level is None else np.asarray(master_book_level, dtype=np.int64)
+        stars = features.get('stars')
+        stars = zeros if stars is None else np.asarray(stars, dtype=np.int64)
+        return job_code, recipe_level, master_book_level, stars
+
+    def _inside(self, index: Tuple[np.ndarray, ...]) -> np.ndarray:
+        inside = np.ones(len(index[0]), dtype=bool)
+        for axis, size in zip(index, self.shape):
+            inside &= (axis >= 0) & (axis < size)
+        return inside
+
+    def covers(self, features: Mapping[str, Any]) -> np.ndarray:
+        """各行がグリッドの範囲内か（範囲外の行は predict_batch でモデルを直接使う）"""
+        return self._inside(self._index(features))
+
+    def predict_batch(self, features: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+        """LinearModel.predict_batch と同じ入出力で、グリッドの参照により推論する"""
+        index = self._index(features)
+        job_code, recipe_level, master_book_level, stars = index
+        inside = self._inside(index)
+
+        if inside.all():
+            values = self.values[index]
+        else:
+            values = np.empty((len(recipe_level), len(TARGETS)), dtype=self.values.dtype)
+            values[inside] = self.values[tuple(axis[inside] for axis in index)]
+            outside = ~inside
+            live = self.model.predict_batch({
+                'job_code': job_code[outside],
+                'recipe_level': recipe_level[outside],
+                'master_book_level': master_book_level[outside],
+                'stars': stars[outside],
+            })
+            values[outside] = np.column_stack([live[target] for target in TARGETS])
+        return {target: values[:, i] for i, target in enumerate(TARGETS)}
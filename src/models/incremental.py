@@ -0,0 +1,54 @@
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .engine import LinearModel
+from .features import INPUT_COLUMNS, TARGETS, FeatureSpec, encode_jobs
+
+def recipes_to_columns(recipes: Sequence[Any]) -> Dict[str, np.ndarray]:
+    """レシピ（RecipeCreate など属性で参照できるオブジェクト）のリストを学習用の列に変換する"""
+    n = len(recipes)
+    columns = {
+        'job_code': encode_jobs([recipe.job for recipe in recipes]),
+        'recipe_level': np.fromiter((recipe.recipe_level for recipe in recipes), dtype=np.int64, count=n),
+        'master_book_level': np.fromiter((recipe.master_book_level or 0 for recipe in recipes), dtype=np.int64, count=n),
+        'stars': np.fromiter((recipe.stars or 0 for recipe in recipes), dtype=np.int64, count=n),
+    }
+    for target in TARGETS:
+        columns[target] = np.fromiter((getattr(recipe, target) for recipe in recipes), dtype=np.float64, count=n)
+    return columns
+
+class StatsAccumulator:
+    """学習データをバッチごとに読みながら十分統計量（XᵀX, Xᵀy, 件数）を集計する
+
+    全件をメモリに載せずに、全データで学習した場合と同じモデルを作れる。
+    """
+
+    def __init__(self, spec: FeatureSpec):
+        self.spec = spec
+        self.xtx = np.zeros((spec.n_features, spec.n_features))
+        self.xty = np.zeros((spec.n_features, len(TARGETS)))
+        self.n_samples = 0
+
+    def add(self, columns: Mapping[str, np.ndarray]) -> None:
+        if len(columns[INPUT_COLUMNS[0]]) == 0:
+            return
+        xtx, xty, n_samples = LinearModel.compute_stats(self.spec, columns)
+        self.xtx += xtx
+        self.xty += xty
+        self.n_samples += n_samples
+
+    def add_batches(self, batches: Iterable[Mapping[str, np.ndarray]]) -> "StatsAccumulator":
+        for columns in batches:
+            self.add(columns)
+        return self
+
+    def to_model(self, alpha: float = 1.0, data_version: Optional[str] = None) -> LinearModel:
+        return LinearModel.from_stats(self.spec, self.xtx, self.xty, self.n_samples,
+                                      alpha=alpha, data_version=data_version)
+
+def coefficient_drift(model: LinearModel, reference: LinearModel) -> float:
+    """2つのモデルの係数の差（参照モデルの係数の最大絶対値に対する最大差の比）"""
+    reference_coef = np.asarray(reference.coef)
+    scale = float(np.max(np.abs(reference_coef))) or 1.0
+    return float(np.max(np.abs(np.asarray(model.coef) - reference_coef))) / scale
@@ -0,0 +1,64 @@
+from typing import Dict, Mapping
+
+import numpy as np
+
+from .features import TARGETS
+
+def relative_error(predicted: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """相対誤差 |予測 - 実測| / 実測（実測が0の行は誤差を無限大とする）"""
+    actual = np.asarray(actual, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        error = np.abs(np.asarray(predicted, dtype=np.float64) - actual) / np.abs(actual)
+    return np.where(actual == 0, np.inf, error)
+
+def within_tolerance(predicted: np.ndarray, actual: np.ndarray, tolerance: float) -> float:
+    """相対誤差が許容誤差以内の割合"""
+    if len(actual) == 0:
+        return float('nan')
+    return float(np.mean(relative_error(predicted, actual) <= tolerance))
+
+def tolerance_report(predictions: Mapping[str, np.ndarray], columns: Mapping[str, np.ndarray],
+                     tolerance: float = 0.05) -> Dict[str, float]:
+    """目的変数ごとに許容誤差以内の割合を求める"""
+    return {
+        target: within_tolerance(predictions[target], columns[target], tolerance)
+        for target in TARGETS
+    }
+
+# REQUIREMENTS.md 2.3 のレシピ難易度別の精度目標: カテゴリ -> (許容誤差, 許容誤差以内であるべき割合)
+CATEGORY_GOALS = {
+    'master_book_star': (0.05, 0.90),
+    'master_book': (0.05, 0.85),
+    'normal': (0.07, 0.80),
+}
+CATEGORIES = tuple(CATEGORY_GOALS)
+# 精度目標の判定に使う目的変数（工数進捗量・品質進捗量の誤差率）
+EVALUATED_TARGETS = ('progress_per_100', 'quality_per_100')
+
+def recipe_categories(columns: Mapping[str, np.ndarray]) -> np.ndarray:
+    """各行のカテゴリ（CATEGORIES のインデックス）: ☆付き → 秘伝書 → 通常 の順に判定する"""
+    stars = np.asarray(columns['stars'])
+    master_book_level = np.asarray(columns['master_book_level'])
+    return np.where(stars > 0, 0, np.where(master_book_level > 0, 1, 2))
+
+def category_report(predictions: Mapping[str, np.ndarray],
+                    columns: Mapping[str, np.ndarray]) -> Dict[str, Dict[str, float]]:
+    """カテゴリごとの件数と、目的変数ごとにカテゴリの許容誤差以内の割合を求める"""
+    categories = recipe_categories(columns)
+    report = {}
+    for code, category in enumerate(CATEGORIES):
+        tolerance, _ = CATEGORY_GOALS[category]
+        rows = np.flatnonzero(categories == code)
+        report[category] = {'rows': len(rows)}
+        for target in TARGETS:
+            report[category][target] = within_tolerance(
+                np.asarray(predictions[target])[rows], np.asarray(columns[target])[rows], tolerance
+            )
+    return report
+
+def meets_goal(report: Mapping[str, Mapping[str, float]], category: str) -> bool:
+    """カテゴリが精度目標を満たしているか（データのないカテゴリは満たしているとみなす）"""
+    if not report[category]['rows']:
+        return True
+    _, goal = CATEGORY_GOALS[category]
+    return all(report[category][target] >= goal for target in EVALUATED_TARGETS)
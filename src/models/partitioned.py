@@ -0,0 +1,255 @@
+"""パーティション（ジョブ・秘伝書レベル帯）ごとの推論モデル
+
+難易度の伸び方はジョブや秘伝書（パッチ）ごとに異なるため、学習データをパーティションに分けて
+それぞれ LinearModel を学習する。学習はパーティションごとにプロセスプールで並列に行い、
+各ワーカーはスナップショットのパスだけを受け取ってメモリマップで開く（配列をプロセス間でコピーしない）。
+前回の学習からデータバージョンが変わっていないパーティションは学習し直さない。
+
+ディレクトリ構成:
+    <path>/partitions.json   分け方・パーティションごとのモデル/データバージョン
+    <path>/<パーティション>/  LinearModel.save の出力（all は全データで学習した既定モデル）
+
+使い方:
+    python -m src.models.partitioned --by job --workers 4
+    python -m src.models.partitioned --by master_book --out data/processed/model_master_book
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from src.data.snapshot import DEFAULT_SNAPSHOT_PATH, JOBS, Snapshot, compute_data_version, load_snapshot
+from src.utils.files import atomic_directory
+from .engine import LinearModel
+from .features import TARGETS, FeatureSpec, encode_jobs
+
+PARTITIONS_FILE = 'partitions.json'
+PARTITIONS_FORMAT_VERSION = 1
+DEFAULT_PARTITIONED_MODEL_PATH = os.path.join('data', 'processed', 'model_partitioned')
+
+# 全データで学習する既定モデル（件数の少ないパーティションや学習データにないパーティションに使う）
+FALLBACK_PARTITION = 'all'
+# これより件数の少ないパーティションは学習せず既定モデルで推論する
+MIN_PARTITION_ROWS = 50
+
+# 秘伝書レベル帯の下限（0 は秘伝書なし）
+MASTER_BOOK_BANDS = (0, 1, 6, 11)
+MASTER_BOOK_BAND_NAMES = ('mb0', 'mb1-5', 'mb6-10', 'mb11+')
+
+PARTITION_SCHEMES = ('job', 'master_book')
+
+def partition_names(by: str) -> Tuple[str, ...]:
+    """分け方ごとのパーティション名（partition_codes の値の順）"""
+    if by == 'job':
+        return JOBS
+    if by == 'master_book':
+        return MASTER_BOOK_BAND_NAMES
+    raise ValueError(f"Unknown partition scheme: {by}")
+
+def partition_codes(by: str, features: Mapping[str, Any]) -> np.ndarray:
+    """入力の各行が属するパーティション（partition_names のインデックス）"""
+    if by == 'job':
+        if 'job_code' in features:
+            return np.asarray(features['job_code'], dtype=np.int64)
+        return encode_jobs(features['job']).astype(np.int64)
+    if by == 'master_book':
+        master_book_level = features.get('master_book_level')
+        if master_book_level is None:
+            return np.zeros(len(features['recipe_level']), dtype=np.int64)
+        master_book_level = np.maximum(np.asarray(master_book_level, dtype=np.int64), 0)
+        return np.searchsorted(MASTER_BOOK_BANDS, master_book_level, side='right') - 1
+    raise ValueError(f"Unknown partition scheme: {by}")
+
+# ワーカープロセスごとに1回だけ開くスナップショット
+_worker_snapshot: Optional[Snapshot] = None
+
+def _init_worker(snapshot_path: str) -> None:
+    global _worker_snapshot
+    _worker_snapshot = load_snapshot(snapshot_path, mmap=True)
+
+def _train_partition(task: Tuple[str, str, Dict[str, Any], float, Optional[str]]) -> Tuple[str, Optional[LinearModel], str, int]:
+    """1パーティション分の学習（ワーカープロセスで実行）
+
+    Returns:
+        (パーティション名, モデル（データが変わっていない・件数不足の場合は None）, データバージョン, 件数)
+    """
+    by, name, spec, alpha, previous_data_version = task
+    snapshot = _worker_snapshot
+    if name == FALLBACK_PARTITION:
+        columns, data_version = snapshot.columns, snapshot.data_version
+    else:
+        rows = np.flatnonzero(partition_codes(by, snapshot.columns) == partition_names(by).index(name))
+        columns = {column: values[rows] for column, values in snapshot.columns.items()}
+        data_version = compute_data_version(columns)
+    n_rows = len(columns['id'])
+    if data_version == previous_data_version or (name != FALLBACK_PARTITION and n_rows < MIN_PARTITION_ROWS):
+        return name, None, data_version, n_rows
+    model = LinearModel.fit(columns, spec=FeatureSpec.from_dict(spec), alpha=alpha, data_version=data_version)
+    return name, model, data_version, n_rows
+
+class PartitionedModel:
+    """パーティションごとの LinearModel をまとめたモデル（LinearModel と同じ predict_batch を持つ）"""
+
+    def __init__(self, by: str, models: Dict[str, LinearModel], data_version: Optional[str] = None):
+        if FALLBACK_PARTITION not in models:
+            raise ValueError(f"A '{FALLBACK_PARTITION}' model is required")
+        partition_names(by)
+        self.by = by
+        self.models = models
+        self.fallback = models[FALLBACK_PARTITION]
+        self.spec = self.fallback.spec
+        self.alpha = self.fallback.alpha
+        self.data_version = data_version
+        self.version = self._compute_version()
+
+    def _compute_version(self) -> str:
+        digest = hashlib.sha256(self.by.encode('utf-8'))
+        for name in sorted(self.models):
+            digest.update(f'{name}={self.models[name].version};'.encode('utf-8'))
+        return digest.hexdigest()[:12]
+
+    def predict_batch(self, features: Mapping[str, Any]) -> Dict[str, np.ndarray]:
+        """行ごとにパーティションのモデルで推論する（モデルのないパーティションは既定モデル）"""
+        codes = partition_codes(self.by, features)
+        columns = {name: np.asarray(values) for name, values in features.items() if values is not None}
+        predictions = {target: np.empty(len(codes), dtype=np.float64) for target in TARGETS}
+        names = partition_names(self.by)
+        unassigned = np.ones(len(codes), dtype=bool)
+        for code in np.unique(codes):
+            model = self.models.get(names[code]) if 0 <= code < len(names) else None
+            if model is None:
+                continue
+            rows = np.flatnonzero(codes == code)
+            unassigned[rows] = False
+            values = model.predict_batch({name: column[rows] for name, column in columns.items()})
+            for target in TARGETS:
+                predictions[target][rows] = values[target]
+        if unassigned.any():
+            rows = np.flatnonzero(unassigned)
+            values = self.fallback.predict_batch({name: column[rows] for name, column in columns.items()})
+            for target in TARGETS:
+                predictions[target][rows] = values[target]
+        return predictions
+
+    def save(self, path: str) -> None:
+        """パーティションごとのモデルと partitions.json をディレクトリに保存する"""
+        with atomic_directory(path) as tmp_path:
+            for name, model in self.models.items():
+                model.save(os.path.join(tmp_path, name))
+            manifest = {
+                'format_version': PARTITIONS_FORMAT_VERSION,
+                'model_version': self.version,
+                'by': self.by,
+                'data_version': self.data_version,
+                'partitions': {
+                    name: {
+                        'model_version': model.version,
+                        'data_version': model.data_version,
+                        'n_samples': model.n_samples,
+                    }
+                    for name, model in sorted(self.models.items())
+                },
+            }
+            with open(os.path.join(tmp_path, PARTITIONS_FILE), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PARTITIONED_MODEL_PATH, mmap: bool = True) -> "PartitionedModel":
+        with open(os.path.join(path, PARTITIONS_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != PARTITIONS_FORMAT_VERSION:
+            raise ValueError(f"Unsupported partitioned model format: {manifest.get('format_version')}")
+        models = {
+            name: LinearModel.load(os.path.join(path, name), mmap=mmap)
+            for name in manifest['partitions']
+        }
+        return cls(manifest['by'], models, data_version=manifest.get('data_version'))
+
+def train_partitioned(snapshot_path: str, by: str = 'job', spec: FeatureSpec = FeatureSpec(),
+                      alpha: float = 1.0, previous: Optional[PartitionedModel] = None,
+                      workers: Optional[int] = None) -> Tuple[PartitionedModel, List[str]]:
+    """パーティションごとのモデルをプロセスプールで並列に学習する
+
+    ワーカーにはスナップショットのパスだけを渡し、各ワーカーがメモリマップで開く。
+    previous と分け方・特徴量・正則化が同じで、データバージョンが変わっていないパーティションは
+    previous のモデルをそのまま使う。
+
+    Args:
+        snapshot_path: スナップショットのディレクトリ
+        by: 分け方（PARTITION_SCHEMES）
+        previous: 前回学習したモデル（省略時はすべて学習する）
+        workers: ワーカープロセス数（省略時はCPUコア数）
+
+    Returns:
+        (モデル, 学習し直したパーティション名の一覧)
+    """
+    names = (FALLBACK_PARTITION,) + partition_names(by)
+    reusable: Dict[str, LinearModel] = {}
+    if previous is not None and previous.by == by and previous.spec == spec and previous.alpha == alpha:
+        reusable = previous.models
+    tasks = [
+        (by, name, spec.to_dict(), alpha, reusable[name].data_version if name in reusable else None)
+        for name in names
+    ]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        _init_worker(snapshot_path)
+        results = [_train_partition(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(snapshot_path,)) as executor:
+            results = list(executor.map(_train_partition, tasks))
+
+    models: Dict[str, LinearModel] = {}
+    retrained = []
+    for name, model, data_version, n_rows in results:
+        if model is not None:
+            models[name] = model
+            retrained.append(name)
+        elif name in reusable and reusable[name].data_version == data_version:
+            models[name] = reusable[name]
+    # 先頭のタスクは既定モデル（データバージョンはスナップショット全体のもの）
+    return PartitionedModel(by, models, data_version=results[0][2]), retrained
+
+def main():
+    parser = argparse.ArgumentParser(description='Train per-partition prediction models in parallel')
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT_PATH, help='Snapshot directory')
+    parser.add_argument('--out', default=DEFAULT_PARTITIONED_MODEL_PATH, help='Output model directory')
+    parser.add_argument('--by', choices=PARTITION_SCHEMES, default='job', help='Partition scheme')
+    parser.add_argument('--degree', type=int, default=FeatureSpec.degree, help='Polynomial degree of recipe_level')
+    parser.add_argument('--alpha', type=float, default=1.0, help='Ridge regularization strength')
+    parser.add_argument('--job-interactions', action='store_true', help='Fit a separate level slope per job')
+    parser.add_argument('--no-log-target', action='store_true', help='Fit targets on a linear scale')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--full', action='store_true', help='Retrain every partition even if its data is unchanged')
+
+    args = parser.parse_args()
+
+    spec = FeatureSpec(
+        degree=args.degree,
+        job_interactions=args.job_interactions,
+        log_target=not args.no_log_target
+    )
+    previous = None
+    if not args.full and os.path.exists(os.path.join(args.out, PARTITIONS_FILE)):
+        previous = PartitionedModel.load(args.out)
+
+    start = perf_counter()
+    model, retrained = train_partitioned(args.snapshot, by=args.by, spec=spec, alpha=args.alpha,
+                                         previous=previous, workers=args.workers)
+    elapsed = perf_counter() - start
+    model.save(args.out)
+
+    print(f"✅ 学習完了: model_version={model.version}（{elapsed:.2f}秒）→ {args.out}")
+    for name, partition in sorted(model.models.items()):
+        mark = '学習' if name in retrained else '変更なし'
+        print(f"   {name}: {partition.n_samples}件, data_version={partition.data_version}（{mark}）")
+
+if __name__ == "__main__":
+    main()
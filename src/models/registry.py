@@ -0,0 +1,185 @@
+"""バージョン管理された推論モデルの保存場所
+
+ディレクトリ構成:
+    <root>/versions/<モデルバージョン>/   LinearModel.save の出力
+    <root>/ACTIVE                        APIが使うモデルバージョン
+    <root>/SHADOW                        比較用に並行して推論するモデルバージョン（任意）
+
+使い方:
+    python -m src.models.registry list
+    python -m src.models.registry activate <version>
+    python -m src.models.registry prune --keep 10
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional
+
+from .engine import META_FILE, LinearModel
+
+DEFAULT_REGISTRY_PATH = os.path.join('data', 'processed', 'models')
+ACTIVE_FILE = 'ACTIVE'
+SHADOW_FILE = 'SHADOW'
+
+class ModelRegistry:
+    """モデルをバージョンごとのディレクトリに保存し、読み込んだモデルを保持する
+
+    モデルは必要になった時点で初めて（メモリマップで）読み込み、以降は同じオブジェクトを返す。
+    """
+
+    def __init__(self, root: str = DEFAULT_REGISTRY_PATH):
+        self.root = root
+        self._loaded: Dict[str, LinearModel] = {}
+        self._lock = threading.Lock()
+
+    def _version_path(self, version: str) -> str:
+        if not version or os.sep in version or '/' in version or version.startswith('.'):
+            raise ValueError(f"Invalid model version: {version}")
+        return os.path.join(self.root, 'versions', version)
+
+    def publish(self, model: LinearModel) -> str:
+        """モデルを保存する（同じバージョンが保存済みなら何もしない）
+
+        Returns:
+            str: モデルバージョン
+        """
+        path = self._version_path(model.version)
+        if not os.path.exists(path):
+            model.save(path)
+        return model.version
+
+    def exists(self, version: str) -> bool:
+        return os.path.exists(os.path.join(self._version_path(version), META_FILE))
+
+    def list_versions(self) -> List[Dict[str, Any]]:
+        """保存済みのモデルの情報を学習日時順に返す"""
+        versions_dir = os.path.join(self.root, 'versions')
+        if not os.path.isdir(versions_dir):
+            return []
+        versions = []
+        for name in os.listdir(versions_dir):
+            meta_path = os.path.join(versions_dir, name, META_FILE)
+            if not os.path.exists(meta_path):
+                continue
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            versions.append({
+                'version': meta['model_version'],
+                'trained_at': meta.get('trained_at'),
+                'data_version': meta.get('data_version'),
+                'n_samples': meta.get('n_samples'),
+                'alpha': meta.get('alpha'),
+                'spec': meta.get('spec'),
+            })
+        return sorted(versions, key=lambda meta: meta['trained_at'] or '')
+
+    def load(self, version: str) -> LinearModel:
+        """モデルを読み込む（読み込み済みならそのオブジェクトを返す）
+
+        Raises:
+            KeyError: 保存されていないバージョンの場合
+        """
+        with self._lock:
+            model = self._loaded.get(version)
+            if model is None:
+                if not self.exists(version):
+                    raise KeyError(version)
+                model = LinearModel.load(self._version_path(version), mmap=True)
+                self._loaded[version] = model
+            return model
+
+    def unload(self, version: str) -> None:
+        """読み込み済みのモデルを手放す（使用中のリクエストが終われば解放される）"""
+        with self._lock:
+            self._loaded.pop(version, None)
+
+    def prune(self, keep: int) -> List[str]:
+        """学習日時の新しい keep 件と ACTIVE / SHADOW のモデルを残し、それ以外を削除する
+
+        読み込み済みのモデルは手放すだけで、使用中のリクエストはメモリマップのまま最後まで使える。
+
+        Returns:
+            List[str]: 削除したモデルバージョン
+        """
+        if keep < 1:
+            raise ValueError("keep must be greater than or equal to 1")
+        versions = [meta['version'] for meta in self.list_versions()]
+        retained = set(versions[-keep:]) | {self.active_version(), self.shadow_version()}
+        removed = [version for version in versions if version not in retained]
+        for version in removed:
+            self.unload(version)
+            shutil.rmtree(self._version_path(version), ignore_errors=True)
+        return removed
+
+    def _read_pointer(self, name: str) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, name), 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_pointer(self, name: str, version: Optional[str]) -> None:
+        """ポインタファイルを一時ファイル経由で置き換える"""
+        path = os.path.join(self.root, name)
+        if version is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{name}-', dir=self.root)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(tmp_path, path)
+
+    def active_version(self) -> Optional[str]:
+        return self._read_pointer(ACTIVE_FILE)
+
+    def shadow_version(self) -> Optional[str]:
+        return self._read_pointer(SHADOW_FILE)
+
+    def set_active(self, version: str) -> None:
+        if not self.exists(version):
+            raise KeyError(version)
+        self._write_pointer(ACTIVE_FILE, version)
+
+    def set_shadow(self, version: Optional[str]) -> None:
+        if version is not None and not self.exists(version):
+            raise KeyError(version)
+        self._write_pointer(SHADOW_FILE, version)
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage versioned prediction models')
+    parser.add_argument('--root', default=DEFAULT_REGISTRY_PATH, help='Registry directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='List stored model versions')
+    activate = subparsers.add_parser('activate', help='Set the version served by the API on next start')
+    activate.add_argument('version')
+    shadow = subparsers.add_parser('shadow', help='Set (or clear with "none") the shadow version')
+    shadow.add_argument('version')
+    prune = subparsers.add_parser('prune', help='Remove old versions (keeps the newest N plus active / shadow)')
+    prune.add_argument('--keep', type=int, default=10, help='Number of newest versions to keep')
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.root)
+
+    if args.command == 'list':
+        active, shadow_version = registry.active_version(), registry.shadow_version()
+        for meta in registry.list_versions():
+            mark = '*' if meta['version'] == active else ('s' if meta['version'] == shadow_version else ' ')
+            print(f"{mark} {meta['version']}  trained_at={meta['trained_at']}  "
+                  f"n_samples={meta['n_samples']}  data_version={meta['data_version']}")
+    elif args.command == 'activate':
+        registry.set_active(args.version)
+        print(f"✅ active: {args.version}（稼働中のAPIには POST /admin/models/{args.version}/activate で反映）")
+    elif args.command == 'prune':
+        removed = registry.prune(args.keep)
+        print(f"✅ removed {len(removed)} versions: {', '.join(removed) or '-'}")
+    else:
+        registry.set_shadow(None if args.version == 'none' else args.version)
+        print(f"✅ shadow: {args.version}")
+
+if __name__ == "__main__":
+    main()
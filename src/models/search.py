@@ -0,0 +1,171 @@
+"""交差検証によるハイパーパラメータ探索
+
+特徴量の設定（多項式の次数・ジョブごとの傾き）とリッジ回帰の正則化 alpha の組み合わせを
+k分割交差検証で評価し、REQUIREMENTS.md のカテゴリ別精度目標（☆付き/秘伝書/通常）で比較する。
+
+特徴量の設定ごとに特徴量行列を1回だけ作成し、分割ごとの十分統計量（XᵀX, Xᵀy）を求めておく。
+各分割の学習データの統計量は「全体 - その分割」で得られるため、alpha・分割を変えても
+15×15程度の連立方程式を解き直すだけで済む。特徴量の設定ごとにプロセスプールで並列に評価し、
+各ワーカーはスナップショットをメモリマップで開く。
+
+使い方:
+    python -m src.models.search --degrees 2 3 4 5 --alphas 0.001 0.01 0.1 1 10 --folds 5
+    python -m src.models.search --workers 4 --out data/processed/model   # 最良の設定で全データを学習して保存
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.data.snapshot import DEFAULT_SNAPSHOT_PATH, Snapshot, load_snapshot
+from .engine import LinearModel
+from .features import TARGETS, FeatureSpec
+from .metrics import CATEGORIES, EVALUATED_TARGETS, category_report, meets_goal
+
+DEFAULT_DEGREES = (2, 3, 4, 5)
+DEFAULT_ALPHAS = (0.001, 0.01, 0.1, 1.0, 10.0)
+DEFAULT_FOLDS = 5
+
+@dataclass
+class CandidateResult:
+    """1つのパラメータの組み合わせの交差検証の結果"""
+    spec: FeatureSpec
+    alpha: float
+    report: Dict[str, Dict[str, float]]
+
+    @property
+    def goals_met(self) -> int:
+        """精度目標を満たしたカテゴリの数"""
+        return sum(meets_goal(self.report, category) for category in CATEGORIES)
+
+    @property
+    def score(self) -> float:
+        """カテゴリ・目的変数ごとの許容誤差以内の割合の平均（データのないカテゴリは除く）"""
+        rates = [
+            self.report[category][target]
+            for category in CATEGORIES if self.report[category]['rows']
+            for target in EVALUATED_TARGETS
+        ]
+        return float(np.mean(rates)) if rates else float('nan')
+
+    def sort_key(self) -> Tuple[int, float]:
+        return (self.goals_met, self.score)
+
+def fold_assignments(rows: int, folds: int, seed: int = 0) -> np.ndarray:
+    """各行の分割番号（0 ～ folds-1、件数がほぼ均等になるようにシャッフル）"""
+    if folds < 2 or folds > rows:
+        raise ValueError(f"folds must be between 2 and the number of rows ({rows}): {folds}")
+    return np.random.default_rng(seed).permutation(np.arange(rows) % folds)
+
+def evaluate_spec(columns: Dict[str, np.ndarray], spec: FeatureSpec, alphas: Sequence[float],
+                  folds: int = DEFAULT_FOLDS, seed: int = 0) -> List[CandidateResult]:
+    """1つの特徴量の設定について、alpha ごとに交差検証の結果を求める"""
+    X = spec.transform_columns(columns)
+    Y = np.column_stack([spec.encode_targets(columns[target]) for target in TARGETS])
+    fold = fold_assignments(len(X), folds, seed)
+    fold_rows = [np.flatnonzero(fold == k) for k in range(folds)]
+
+    # 分割ごとの十分統計量（特徴量行列は alpha・分割の間で使い回す）
+    fold_stats = [(X[rows].T @ X[rows], X[rows].T @ Y[rows]) for rows in fold_rows]
+    total_xtx = sum(xtx for xtx, _ in fold_stats)
+    total_xty = sum(xty for _, xty in fold_stats)
+
+    results = []
+    for alpha in alphas:
+        predicted = np.empty((len(X), len(TARGETS)))
+        for rows, (xtx, xty) in zip(fold_rows, fold_stats):
+            model = LinearModel.from_stats(spec, total_xtx - xtx, total_xty - xty,
+                                           len(X) - len(rows), alpha=alpha)
+            predicted[rows] = model.predict_matrix(X[rows])
+        predictions = {target: predicted[:, i] for i, target in enumerate(TARGETS)}
+        results.append(CandidateResult(spec=spec, alpha=alpha, report=category_report(predictions, columns)))
+    return results
+
+# ワーカープロセスごとに1回だけ開くスナップショット
+_worker_snapshot: Optional[Snapshot] = None
+
+def _init_worker(snapshot_path: str) -> None:
+    global _worker_snapshot
+    _worker_snapshot = load_snapshot(snapshot_path, mmap=True)
+
+def _evaluate_task(task: Tuple[Dict[str, Any], Tuple[float, ...], int, int]) -> List[CandidateResult]:
+    """ワーカープロセスで1つの特徴量の設定を評価する"""
+    spec, alphas, folds, seed = task
+    return evaluate_spec(_worker_snapshot.columns, FeatureSpec.from_dict(spec), alphas, folds=folds, seed=seed)
+
+def search(snapshot_path: str, specs: Sequence[FeatureSpec], alphas: Sequence[float] = DEFAULT_ALPHAS,
+           folds: int = DEFAULT_FOLDS, seed: int = 0, workers: Optional[int] = None) -> List[CandidateResult]:
+    """特徴量の設定 × alpha の全組み合わせを交差検証し、良い順に並べて返す
+
+    Args:
+        snapshot_path: スナップショットのディレクトリ（ワーカーにはパスだけを渡す）
+        specs: 特徴量の設定の候補
+        alphas: 正則化の強さの候補
+        folds: 分割数
+        workers: ワーカープロセス数（省略時はCPUコア数）
+    """
+    tasks = [(spec.to_dict(), tuple(alphas), folds, seed) for spec in specs]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tasks) or 1))
+    if workers == 1:
+        _init_worker(snapshot_path)
+        results = [_evaluate_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(snapshot_path,)) as executor:
+            results = list(executor.map(_evaluate_task, tasks))
+    candidates = [candidate for spec_results in results for candidate in spec_results]
+    return sorted(candidates, key=CandidateResult.sort_key, reverse=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validated hyperparameter search for the prediction model')
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT_PATH, help='Snapshot directory')
+    parser.add_argument('--degrees', type=int, nargs='+', default=list(DEFAULT_DEGREES),
+                        help='Polynomial degrees of recipe_level to try')
+    parser.add_argument('--alphas', type=float, nargs='+', default=list(DEFAULT_ALPHAS),
+                        help='Ridge regularization strengths to try')
+    parser.add_argument('--interactions', choices=['off', 'on', 'both'], default='both',
+                        help='Whether to try a separate level slope per job')
+    parser.add_argument('--no-log-target', action='store_true', help='Fit targets on a linear scale')
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help='Number of cross-validation folds')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the fold assignment')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--top', type=int, default=10, help='Number of candidates to show')
+    parser.add_argument('--out', help='Train the best candidate on all data and save it to this directory')
+
+    args = parser.parse_args()
+
+    interactions = {'off': [False], 'on': [True], 'both': [False, True]}[args.interactions]
+    specs = [
+        FeatureSpec(degree=degree, job_interactions=job_interactions, log_target=not args.no_log_target)
+        for degree in args.degrees for job_interactions in interactions
+    ]
+
+    start = perf_counter()
+    candidates = search(args.snapshot, specs, args.alphas, folds=args.folds, seed=args.seed, workers=args.workers)
+    elapsed = perf_counter() - start
+    print(f"✅ 探索完了: {len(candidates)}通り × {args.folds}分割（{elapsed:.2f}秒）")
+
+    for rank, candidate in enumerate(candidates[:args.top], start=1):
+        spec = candidate.spec
+        print(f"{rank:3d}. degree={spec.degree} job_interactions={spec.job_interactions} "
+              f"alpha={candidate.alpha:g}  目標達成 {candidate.goals_met}/{len(CATEGORIES)}  score={candidate.score:.3f}")
+        for category in CATEGORIES:
+            result = candidate.report[category]
+            rates = '  '.join(f"{target}={result[target]:.1%}" for target in EVALUATED_TARGETS)
+            mark = '✓' if meets_goal(candidate.report, category) else '✗'
+            print(f"       {mark} {category}（{result['rows']}件）: {rates}")
+
+    if args.out and candidates:
+        best = candidates[0]
+        snapshot = load_snapshot(args.snapshot)
+        model = LinearModel.fit(snapshot.columns, spec=best.spec, alpha=best.alpha,
+                                data_version=snapshot.data_version)
+        model.save(args.out)
+        print(f"   最良の設定で学習: model_version={model.version} → {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""スナップショットから推論モデルを学習して保存する
+
+使い方:
+    python -m src.models.train --snapshot data/processed/snapshot --out data/processed/model
+    python -m src.models.train --degree 4 --alpha 0.1 --job-interactions
+    python -m src.models.train --publish --activate   # レジストリに保存して稼働中のモデルにする
+"""
+import argparse
+from time import perf_counter
+
+from src.data.snapshot import DEFAULT_SNAPSHOT_PATH, load_snapshot
+from .engine import DEFAULT_MODEL_PATH, LinearModel
+from .features import INPUT_COLUMNS, FeatureSpec
+from .metrics import CATEGORIES, EVALUATED_TARGETS, category_report, tolerance_report
+from .registry import DEFAULT_REGISTRY_PATH, ModelRegistry
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the recipe level prediction model from a snapshot')
+    parser.add_argument('--snapshot', default=DEFAULT_SNAPSHOT_PATH, help='Snapshot directory')
+    parser.add_argument('--out', default=DEFAULT_MODEL_PATH, help='Output model directory')
+    parser.add_argument('--degree', type=int, default=FeatureSpec.degree, help='Polynomial degree of recipe_level')
+    parser.add_argument('--alpha', type=float, default=1.0, help='Ridge regularization strength')
+    parser.add_argument('--job-interactions', action='store_true', help='Fit a separate level slope per job')
+    parser.add_argument('--no-log-target', action='store_true', help='Fit targets on a linear scale')
+    parser.add_argument('--publish', action='store_true', help='Also store the model as a new registry version')
+    parser.add_argument('--activate', action='store_true', help='Make the published version the active one')
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY_PATH, help='Model registry directory')
+
+    args = parser.parse_args()
+
+    snapshot = load_snapshot(args.snapshot)
+    spec = FeatureSpec(
+        degree=args.degree,
+        job_interactions=args.job_interactions,
+        log_target=not args.no_log_target
+    )
+
+    start = perf_counter()
+    model = LinearModel.fit(snapshot.columns, spec=spec, alpha=args.alpha, data_version=snapshot.data_version)
+    elapsed = perf_counter() - start
+    model.save(args.out)
+
+    predictions = model.predict_batch({name: snapshot[name] for name in INPUT_COLUMNS})
+    print(f"✅ 学習完了: {snapshot.rows}件, model_version={model.version}（{elapsed:.2f}秒）→ {args.out}")
+    for target, rate in tolerance_report(predictions, snapshot.columns).items():
+        print(f"   {target}: ±5%以内 {rate:.1%}（学習データ）")
+    report = category_report(predictions, snapshot.columns)
+    for category in CATEGORIES:
+        rates = '  '.join(f"{target}={report[category][target]:.1%}" for target in EVALUATED_TARGETS)
+        print(f"   {category}（{report[category]['rows']}件）: {rates}")
+
+    if args.publish or args.activate:
+        registry = ModelRegistry(args.registry)
+        registry.publish(model)
+        print(f"   レジストリに保存: {args.registry}/versions/{model.version}")
+        if args.activate:
+            registry.set_active(model.version)
+            print(f"   active: {model.version}（稼働中のAPIには POST /admin/models/{model.version}/activate で反映）")
+
+if __name__ == "__main__":
+    main()
@@ -1,66 +1,157 @@
 import csv
 import json
 import argparse
-from typing import List, Dict, Any
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, TextIO
 import logging
 
+# 行単位のエラー通知先（CSV上の行番号, エラー内容）
+ErrorHandler = Callable[[int, str], None]
+# 追加の検証処理（不正な場合はエラー内容、正常ならNoneを返す）
+Validator = Callable[[Dict[str, Any]], Optional[str]]
+
+def _log_row_error(line_no: int, message: str) -> None:
+    """行単位のエラーをログに出力する（既定のエラー通知先）"""
+    logging.warning(f"Skipping invalid row at line {line_no}: {message}")
+
+def parse_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """CSVの1行をレシピデータに変換する
+
+    Args:
+        row: csv.DictReader が返す1行分の辞書
+
+    Returns:
+        Dict[str, Any]: 数値型に変換したレシピデータ
+
+    Raises:
+        KeyError: 必須の列がない場合
+        ValueError: 数値に変換できない値がある場合
+    """
+    return {
+        'name': row['name'],
+        'job': row['job'],
+        'recipe_level': int(row['recipe_level']),
+        'master_book_level': int(row['master_book_level']),
+        'stars': int(row['stars']),
+        'patch_version': row['patch_version'],
+        'max_durability': int(row['max_durability']),
+        'max_quality': int(row['max_quality']),
+        'required_durability': int(row['required_durability']),
+        'required_craftsmanship': int(row['required_craftsmanship']),
+        'required_control': int(row['required_control']),
+        'progress_per_100': float(row['progress_per_100']),
+        'quality_per_100': float(row['quality_per_100'])
+    }
+
+def iter_recipes(csv_file: str, on_error: ErrorHandler = _log_row_error,
+                 validate: Optional[Validator] = None) -> Iterator[Dict[str, Any]]:
+    """CSVファイルを1行ずつ読み込み、レシピデータを順に返す
+
+    ファイル全体を読み込まないため、入力サイズに関係なくメモリ使用量は一定。
+    変換できない行はスキップし、行番号とエラー内容を on_error に通知する。
+
+    Args:
+        csv_file: 入力CSVファイルのパス
+        on_error: 行単位のエラー通知先（行番号, エラー内容）
+        validate: 変換後のレシピに対する追加の検証処理（任意）
+
+    Yields:
+        Dict[str, Any]: レシピデータ
+    """
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                recipe = parse_row(row)
+            except KeyError as e:
+                on_error(reader.line_num, f"missing column {e}")
+                continue
+            except (TypeError, ValueError) as e:
+                on_error(reader.line_num, str(e))
+                continue
+            error = validate(recipe) if validate else None
+            if error:
+                on_error(reader.line_num, error)
+                continue
+            yield recipe
+
 def convert_csv_to_json(csv_file: str) -> List[Dict[str, Any]]:
     """CSVファイルをJSONフォーマットに変換
-    
+
     Args:
         csv_file: 入力CSVファイルのパス
-        
+
     Returns:
-        List[Dict[str, Any]]: レシピデータのリスト
+        List[Dict[str, Any]]: レシピデータのリスト（変換できない行は除く）
     """
-    recipes = []
-    
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                # 数値型への変換
-                recipe = {
-                    'name': row['name'],
-                    'job': row['job'],
-                    'recipe_level': int(row['recipe_level']),
-                    'master_book_level': int(row['master_book_level']),
-                    'stars': int(row['stars']),
-                    'patch_version': row['patch_version'],
-                    'max_durability': int(row['max_durability']),
-                    'max_quality': int(row['max_quality']),
-                    'required_durability': int(row['required_durability']),
-                    'required_craftsmanship': int(row['required_craftsmanship']),
-                    'required_control': int(row['required_control']),
-                    'progress_per_100': float(row['progress_per_100']),
-                    'quality_per_100': float(row['quality_per_100'])
-                }
-                recipes.append(recipe)
-                
-        return recipes
-        
+        return list(iter_recipes(csv_file))
     except Exception as e:
         logging.error(f"Error converting CSV to JSON: {e}")
         return []
 
+def write_ndjson(recipes: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """レシピデータを1行1レシピのNDJSONとして書き出す
+
+    Returns:
+        int: 書き出した件数
+    """
+    count = 0
+    for recipe in recipes:
+        out.write(json.dumps(recipe, ensure_ascii=False))
+        out.write('\n')
+        count += 1
+    return count
+
+def write_json_array(recipes: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """レシピデータをJSON配列として1件ずつ書き出す
+
+    出力は json.dump(recipes, indent=2) と同じ形式になる。
+
+    Returns:
+        int: 書き出した件数
+    """
+    count = 0
+    out.write('[')
+    for recipe in recipes:
+        body = json.dumps(recipe, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+        out.write(('\n  ' if count == 0 else ',\n  ') + body)
+        count += 1
+    out.write('\n]' if count else ']')
+    return count
+
 def main():
     parser = argparse.ArgumentParser(description='Convert CSV to JSON for FF14 recipe data')
     parser.add_argument('input', help='Input CSV file path')
     parser.add_argument('output', help='Output JSON file path')
-    
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help='Output format: JSON array or one recipe per line (default: json)')
+
     args = parser.parse_args()
-    
-    # CSVからデータを読み込み
-    recipes = convert_csv_to_json(args.input)
-    
-    if recipes:
-        # JSONファイルに書き出し
+
+    # スキップした行は件数と先頭20件の行番号のみ保持する
+    skipped = {'count': 0, 'lines': []}
+    def on_error(line_no: int, message: str) -> None:
+        _log_row_error(line_no, message)
+        skipped['count'] += 1
+        if len(skipped['lines']) < 20:
+            skipped['lines'].append(line_no)
+
+    # CSVから1行ずつ読み込み、そのままファイルに書き出す
+    writer = write_ndjson if args.format == 'ndjson' else write_json_array
+    try:
         with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(recipes, f, ensure_ascii=False, indent=2)
-        print(f"✅ 変換完了: {len(recipes)}件のレシピを{args.output}に保存しました")
+            count = writer(iter_recipes(args.input, on_error=on_error), f)
+    except Exception as e:
+        logging.error(f"Error converting CSV to JSON: {e}")
+        count = 0
+
+    if count:
+        print(f"✅ 変換完了: {count}件のレシピを{args.output}に保存しました")
+        if skipped['count']:
+            print(f"⚠️ {skipped['count']}行をスキップしました（行番号: {', '.join(map(str, skipped['lines']))}"
+                  f"{' ...' if skipped['count'] > len(skipped['lines']) else ''}）")
     else:
         print("❌ 変換に失敗しました")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
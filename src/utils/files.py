@@ -0,0 +1,31 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+@contextmanager
+def atomic_directory(path: str) -> Iterator[str]:
+    """ディレクトリを丸ごと書き出して置き換える
+
+    with ブロックには一時ディレクトリのパスを渡し、ブロックが正常に終わった時点で
+    path と入れ替える。例外の場合は一時ディレクトリを削除し、既存の path はそのまま残す。
+    読み込み側が書きかけのファイルを開くことはない。
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_path = tempfile.mkdtemp(prefix='.tmp-', dir=parent)
+    try:
+        yield tmp_path
+        # 既存のディレクトリを退避してから入れ替える
+        old_path = None
+        if os.path.exists(path):
+            old_path = tempfile.mkdtemp(prefix='.old-', dir=parent)
+            os.rmdir(old_path)
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        if old_path:
+            shutil.rmtree(old_path, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
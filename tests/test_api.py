@@ -1,40 +1,60 @@
+import asyncio
+import json
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 import pytest
-from src.backend.api.main import app
+from src.backend.api.crud import estimate_cache, search_cache
+from src.backend.api.main import app, recipe_cache
 from src.backend.api.database import Base, get_db
 
 # テスト用のデータベースURL
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 # テスト用のエンジンとセッション
-engine = create_engine(
+engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
     poolclass=StaticPool,
 )
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+    class_=AsyncSession
+)
 
 # テスト用のデータベース依存関係
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 app.dependency_overrides[get_db] = override_get_db
 
+async def _create_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+async def _drop_tables():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    # aiosqlite の接続スレッドを終了させる
+    await engine.dispose()
+
 @pytest.fixture
 def client():
     # テストの前にデータベースを作成
-    Base.metadata.create_all(bind=engine)
+    asyncio.run(_create_tables())
+    # テストごとにIDが1から振り直されるため、前のテストのレシピをキャッシュから消す
+    recipe_cache.clear()
+    search_cache.clear()
+    estimate_cache.clear()
     with TestClient(app) as c:
         yield c
     # テストの後にデータベースを削除
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(_drop_tables())
 
 def test_create_recipe(client):
     """レシピ作成のテスト"""
@@ -91,6 +111,54 @@ def test_get_recipe(client):
     assert data["data"]["name"] == recipe_data["name"]
     assert data["data"]["job"] == recipe_data["job"]
 
+def test_get_recipe_etag(client, monkeypatch):
+    """レシピ詳細のETag・条件付きリクエスト・キャッシュ無効化のテスト"""
+    from src.backend.api import main
+
+    recipe_data = {
+        "name": "ETagレシピ",
+        "job": "ALC",
+        "recipe_level": 80,
+        "patch_version": "6.0",
+        "max_durability": 70,
+        "max_quality": 5000,
+        "required_durability": 70,
+        "required_craftsmanship": 2500,
+        "required_control": 2400,
+        "progress_per_100": 150,
+        "quality_per_100": 130
+    }
+    recipe_id = client.post("/recipes/", json=recipe_data).json()["data"]["id"]
+
+    response = client.get(f"/recipes/{recipe_id}")
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{recipe_id}-1"'
+    assert response.json()["data"]["version"] == 1
+
+    # キャッシュ済みのレシピはDBにアクセスせずに返す
+    async def fail_get_recipe(*args, **kwargs):
+        raise AssertionError("database should not be queried")
+    monkeypatch.setattr(main, "get_recipe", fail_get_recipe)
+    response = client.get(f"/recipes/{recipe_id}", headers={"If-None-Match": f'"{recipe_id}-1"'})
+    assert response.status_code == 304
+    assert response.headers["etag"] == f'"{recipe_id}-1"'
+    assert response.content == b""
+    response = client.get(f"/recipes/{recipe_id}", headers={"If-None-Match": '"other", W/"%d-1"' % recipe_id})
+    assert response.status_code == 304
+    assert client.get(f"/recipes/{recipe_id}").json()["data"]["name"] == "ETagレシピ"
+    monkeypatch.undo()
+
+    # 更新するとバージョンが上がり、古いETagでは304にならない
+    client.put(f"/recipes/{recipe_id}", json={"recipe_level": 81})
+    response = client.get(f"/recipes/{recipe_id}", headers={"If-None-Match": f'"{recipe_id}-1"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == f'"{recipe_id}-2"'
+    assert response.json()["data"]["recipe_level"] == 81
+
+    client.delete(f"/recipes/{recipe_id}")
+    assert client.get(f"/recipes/{recipe_id}").status_code == 404
+    assert client.get("/admin/cache/stats").json()["data"]["recipe"]["hits"] == 3
+
 def test_update_recipe(client):
     """レシピ更新のテスト"""
     # まずレシピを作成
@@ -210,4 +278,752 @@ def test_search_recipes(client):
     response = client.get("/recipes/search", params={"min_level": "90"})
     assert response.status_code == 200
     assert response.json()["success"] is True
-    assert len(response.json()["data"]) == 1 
\ No newline at end of file
+    assert len(response.json()["data"]) == 1 
+
+def test_search_result_cache(client):
+    """検索結果キャッシュと書き込みによる無効化のテスト"""
+    recipe_data = {
+        "name": "検索キャッシュ1",
+        "job": "WVR",
+        "recipe_level": 70,
+        "patch_version": "5.0",
+        "max_durability": 80,
+        "max_quality": 100,
+        "required_durability": 50,
+        "required_craftsmanship": 2000,
+        "required_control": 1900,
+        "progress_per_100": 150,
+        "quality_per_100": 140
+    }
+    client.post("/recipes/", json=recipe_data)
+    hits, misses = search_cache.hits, search_cache.misses
+
+    # 同じ条件（空文字の条件は未指定と同じ）は2回目以降キャッシュから返る
+    first = client.get("/recipes/search", params={"job": "WVR"}).json()
+    second = client.get("/recipes/search", params={"job": "WVR", "name": ""}).json()
+    assert first == second
+    assert first["meta"]["total"] == 1
+    stats = client.get("/admin/cache/stats").json()["data"]["search"]
+    assert (stats["hits"] - hits, stats["misses"] - misses) == (1, 1)
+
+    # 書き込みがあればデータのバージョンが変わり、DBから取得し直す
+    client.post("/recipes/", json={**recipe_data, "name": "検索キャッシュ2"})
+    assert client.get("/recipes/search", params={"job": "WVR"}).json()["meta"]["total"] == 2
+    recipe_id = first["data"][0]["id"]
+    client.put(f"/recipes/{recipe_id}", json={"job": "ALC"})
+    assert client.get("/recipes/search", params={"job": "WVR"}).json()["meta"]["total"] == 1
+    client.delete(f"/recipes/{recipe_id}")
+    assert client.get("/recipes/search", params={"job": "ALC"}).json()["meta"]["total"] == 0
+
+def test_binary_wire_formats(client):
+    """Accept ヘッダーによる MessagePack / Arrow の一覧・検索レスポンスのテスト"""
+    msgpack = pytest.importorskip("msgpack")
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+
+    for i, level in enumerate((60, 70)):
+        client.post("/recipes/", json={
+            "name": f"バイナリ{i}",
+            "job": "GSM",
+            "recipe_level": level,
+            "patch_version": "5.0",
+            "max_durability": 80,
+            "max_quality": 100,
+            "required_durability": 50,
+            "required_craftsmanship": 2000,
+            "required_control": 1900,
+            "progress_per_100": 150.5,
+            "quality_per_100": 140.25
+        })
+    expected = client.get("/recipes/search", params={"job": "GSM"}).json()
+
+    response = client.get("/recipes/search", params={"job": "GSM"}, headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert response.headers["vary"] == "Accept"
+    assert msgpack.unpackb(response.content) == expected
+
+    response = client.get("/recipes/", headers={"Accept": "application/vnd.apache.arrow.stream"})
+    assert response.status_code == 200
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    assert table.column("recipe_level").to_pylist() == [60, 70]
+    assert table.column("progress_per_100").type == pyarrow.float64()
+    assert json.loads(table.schema.metadata[b"meta"])["total"] == 2
+    assert table.column("collected_at").type == pyarrow.timestamp("us")
+
+    # 0件のページでも列（スキーマ）は同じ
+    response = client.get("/recipes/search", params={"job": "LTW"},
+                          headers={"Accept": "application/vnd.apache.arrow.stream"})
+    assert response.status_code == 200
+    empty = pyarrow.ipc.open_stream(response.content).read_all()
+    assert empty.num_rows == 0
+    assert empty.schema.remove_metadata() == table.schema.remove_metadata()
+
+    response = client.get("/recipes/", headers={"Accept": "text/csv"})
+    assert response.status_code == 406
+    assert response.json()["error"]["type"] == "not_acceptable"
+
+def test_search_single_flight(monkeypatch):
+    """同じ条件の同時検索は1回のDBアクセスを共有する"""
+    from src.backend.api import crud
+    from src.backend.api.models import RecipeSearchParams
+
+    calls = []
+
+    async def fake_execute_search(db, params):
+        calls.append(params)
+        await asyncio.sleep(0.01)
+        return {"total": 0, "count_mode": params.count, "items": [], "next_cursor": None}
+
+    monkeypatch.setattr(crud, "_execute_search", fake_execute_search)
+    search_cache.clear()
+    db = TestingSessionLocal()
+
+    async def run():
+        return await asyncio.gather(
+            *(crud.search_recipes(db, RecipeSearchParams(job="CUL")) for _ in range(5)),
+            crud.search_recipes(db, RecipeSearchParams(job="GSM"))
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results[:5])
+    assert not crud._search_inflight
+    search_cache.clear()
+
+def test_search_single_flight_first_caller_cancelled(monkeypatch):
+    """最初の呼び出し元がキャンセルされても、同じ条件を待つ呼び出し元には結果が返る"""
+    from src.backend.api import crud
+    from src.backend.api.models import RecipeSearchParams
+
+    calls = []
+
+    async def fake_execute_search(db, params):
+        calls.append(params)
+        await asyncio.sleep(0.05)
+        return {"total": 0, "count_mode": params.count, "items": [], "next_cursor": None}
+
+    monkeypatch.setattr(crud, "_execute_search", fake_execute_search)
+    search_cache.clear()
+    db = TestingSessionLocal()
+
+    async def run():
+        first = asyncio.create_task(crud.search_recipes(db, RecipeSearchParams(job="CUL")))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(crud.search_recipes(db, RecipeSearchParams(job="CUL")))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    result = asyncio.run(run())
+    assert result["total"] == 0
+    assert len(calls) == 1
+    assert not crud._search_inflight
+    search_cache.clear()
+
+def test_read_recipes(client):
+    """レシピ一覧取得のテスト（3テーブル結合の射影）"""
+    recipe_data = {
+        "name": "テストレシピ",
+        "job": "CRP",
+        "recipe_level": 90,
+        "master_book_level": 1,
+        "stars": 3,
+        "patch_version": "6.4",
+        "max_durability": 80,
+        "max_quality": 100,
+        "required_durability": 50,
+        "required_craftsmanship": 3500,
+        "required_control": 3200,
+        "progress_per_100": 120,
+        "quality_per_100": 100
+    }
+    client.post("/recipes/", json=recipe_data)
+
+    response = client.get("/recipes/")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["meta"]["total"] == 1
+    item = data["data"][0]
+    assert len(item) == 15
+    for key, value in recipe_data.items():
+        assert item[key] == value
+
+def test_cursor_pagination(client):
+    """カーソルによるページネーションのテスト"""
+    for i, level in enumerate([90, 85, 90, 80, 85]):
+        recipe_data = {
+            "name": f"テストレシピ{i}",
+            "job": "CRP",
+            "recipe_level": level,
+            "master_book_level": 1,
+            "stars": 1,
+            "patch_version": "6.4",
+            "max_durability": 80,
+            "max_quality": 100,
+            "required_durability": 50,
+            "required_craftsmanship": 3500,
+            "required_control": 3200,
+            "progress_per_100": 120,
+            "quality_per_100": 100
+        }
+        assert client.post("/recipes/", json=recipe_data).status_code == 200
+
+    # カーソルを辿って全件取得し、(recipe_level, id) 順であることを確認
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": "2", "job": "CRP"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/recipes/search", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        seen.extend((item["recipe_level"], item["id"]) for item in data["data"])
+        cursor = data["meta"]["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+    # 一覧取得でも同じ順序になる
+    response = client.get("/recipes/", params={"limit": 3})
+    first_page = response.json()
+    response = client.get("/recipes/", params={"limit": 3, "cursor": first_page["meta"]["next_cursor"]})
+    second_page = response.json()
+    ids = [item["id"] for item in first_page["data"] + second_page["data"]]
+    assert ids == [recipe_id for _, recipe_id in seen]
+    assert second_page["meta"]["next_cursor"] is None
+
+    # レベルが NULL の行はカーソルで辿れないため、登録・更新できない
+    from sqlalchemy import text
+    from sqlalchemy.exc import IntegrityError
+
+    async def insert_null_level():
+        async with TestingSessionLocal() as db:
+            await db.execute(text(
+                "INSERT INTO recipes (name, job, recipe_level, patch_version, version) "
+                "VALUES ('レベルなし', 'CRP', NULL, '6.4', 1)"
+            ))
+            await db.commit()
+
+    with pytest.raises(IntegrityError):
+        asyncio.run(insert_null_level())
+    response = client.put(f"/recipes/{seen[0][1]}", json={"recipe_level": None})
+    assert response.status_code in (400, 422)
+    assert client.get("/recipes/", params={"limit": 10}).json()["meta"]["total"] == 5
+
+    # 不正なカーソル
+    response = client.get("/recipes/", params={"cursor": "invalid"})
+    assert response.status_code == 400
+    response = client.get("/recipes/search", params={"cursor": "invalid"})
+    assert response.status_code == 400
+
+def test_count_modes(client):
+    """件数の取得方法（exact / estimate / none）のテスト"""
+    recipe_data = {
+        "name": "テストレシピ",
+        "job": "CRP",
+        "recipe_level": 90,
+        "master_book_level": 1,
+        "stars": 3,
+        "patch_version": "6.4",
+        "max_durability": 80,
+        "max_quality": 100,
+        "required_durability": 50,
+        "required_craftsmanship": 3500,
+        "required_control": 3200,
+        "progress_per_100": 120,
+        "quality_per_100": 100
+    }
+    client.post("/recipes/", json=recipe_data)
+
+    response = client.get("/recipes/search", params={"job": "CRP"})
+    assert response.json()["meta"]["total"] == 1
+    assert response.json()["meta"]["count_mode"] == "exact"
+
+    response = client.get("/recipes/search", params={"job": "CRP", "count": "estimate"})
+    assert response.json()["meta"]["total"] == 1
+    assert response.json()["meta"]["count_mode"] == "estimate"
+    # 条件ごとの件数は件数推定キャッシュに入る（TTLの間は数え直さない）
+    estimate = client.get("/admin/cache/stats").json()["data"]["estimate"]
+    assert (estimate["size"], estimate["misses"]) == (1, 1)
+    search_cache.clear()
+    client.get("/recipes/search", params={"job": "CRP", "count": "estimate"})
+    estimate = client.get("/admin/cache/stats").json()["data"]["estimate"]
+    assert estimate["hits"] == 1
+    assert estimate["ttl"] == 60.0
+
+    response = client.get("/recipes/", params={"count": "none"})
+    assert response.json()["meta"]["total"] is None
+    assert response.json()["meta"]["count_mode"] == "none"
+    assert len(response.json()["data"]) == 1
+
+    response = client.get("/recipes/", params={"count": "approximate"})
+    assert response.status_code == 400
+    response = client.get("/recipes/search", params={"count": "approximate"})
+    assert response.status_code == 400
+
+def test_bulk_create_recipes(client):
+    """NDJSONによる一括登録のテスト"""
+    import json
+
+    def recipe(name, job="CRP"):
+        return {
+            "name": name,
+            "job": job,
+            "recipe_level": 90,
+            "master_book_level": 1,
+            "stars": 3,
+            "patch_version": "6.4",
+            "max_durability": 80,
+            "max_quality": 100,
+            "required_durability": 50,
+            "required_craftsmanship": 3500,
+            "required_control": 3200,
+            "progress_per_100": 120,
+            "quality_per_100": 100
+        }
+
+    client.post("/recipes/", json=recipe("登録済みレシピ"))
+
+    lines = [
+        json.dumps(recipe("一括レシピ1")),
+        json.dumps(recipe("一括レシピ2")),
+        json.dumps(recipe("一括レシピ1")),        # バッチ内で重複
+        json.dumps(recipe("登録済みレシピ")),      # 登録済みと重複
+        json.dumps(recipe("一括レシピ1", "BSM")),  # 職業が異なるので登録可能
+        "{broken json",
+        "",
+        json.dumps({**recipe("不正レシピ"), "job": "XXX"}),
+        json.dumps(recipe("一括レシピ3")),
+    ]
+    body = "\n".join(lines).encode("utf-8")
+    response = client.post(
+        "/recipes/bulk",
+        params={"batch_size": 2},
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    assert data["meta"] == {"created": 4, "duplicate": 2, "invalid": 2, "omitted": 0}
+    # data には登録しなかった行だけが含まれる
+    statuses = [(result["line"], result["status"]) for result in data["data"]]
+    assert statuses == [(3, "duplicate"), (4, "duplicate"), (6, "invalid"), (8, "invalid")]
+
+    # 登録したレシピは3テーブルとも揃って取得できる
+    response = client.get("/recipes/search", params={"name": "一括レシピ1", "job": "CRP"})
+    (created,) = response.json()["data"]
+    response = client.get(f"/recipes/{created['id']}")
+    assert response.status_code == 200
+    assert response.json()["data"]["name"] == "一括レシピ1"
+    assert response.json()["data"]["quality_per_100"] == 100
+
+def test_bulk_create_recipes_unique_violation(client, monkeypatch):
+    """事前の重複確認をすり抜けた一意制約違反は、そのバッチを1行ずつ登録し直して duplicate にする"""
+    import json
+    from src.backend.api import crud
+
+    def recipe(name):
+        return {
+            "name": name,
+            "job": "ARM",
+            "recipe_level": 90,
+            "patch_version": "6.4",
+            "max_durability": 80,
+            "max_quality": 100,
+            "required_durability": 50,
+            "required_craftsmanship": 3500,
+            "required_control": 3200,
+            "progress_per_100": 120,
+            "quality_per_100": 100
+        }
+
+    client.post("/recipes/", json=recipe("衝突レシピ"))
+
+    # MySQLの照合順序の違いや同時登録で、登録済みの行が事前の確認で見つからない場合を再現する
+    existing_recipe_keys = crud._existing_recipe_keys
+
+    async def missing_conflicts(db, keys):
+        found = await existing_recipe_keys(db, keys)
+        return {key: recipe_id for key, recipe_id in found.items() if key[0] != "衝突レシピ"}
+
+    monkeypatch.setattr(crud, "_existing_recipe_keys", missing_conflicts)
+
+    lines = [json.dumps(recipe(name)) for name in ("一意レシピ1", "衝突レシピ", "一意レシピ2", "一意レシピ3")]
+    response = client.post("/recipes/bulk", params={"batch_size": 3}, content="\n".join(lines).encode("utf-8"))
+    assert response.status_code == 200
+    data = response.json()
+    assert data["meta"] == {"created": 3, "duplicate": 1, "invalid": 0, "omitted": 0}
+    assert [(result["line"], result["status"]) for result in data["data"]] == [(2, "duplicate")]
+    names = {item["name"] for item in client.get("/recipes/search", params={"job": "ARM"}).json()["data"]}
+    assert names == {"衝突レシピ", "一意レシピ1", "一意レシピ2", "一意レシピ3"}
+
+def test_bulk_create_recipes_database_error(client, monkeypatch):
+    """途中のバッチでデータベースエラーが発生した場合は、コミット済みの位置を返す"""
+    import json
+    from sqlalchemy.exc import OperationalError
+    from src.backend.api import main
+
+    bulk_create_recipes = main.bulk_create_recipes
+    calls = []
+
+    async def failing_second_batch(db, recipes):
+        calls.append(recipes)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+        return await bulk_create_recipes(db=db, recipes=recipes)
+
+    monkeypatch.setattr(main, "bulk_create_recipes", failing_second_batch)
+    lines = [json.dumps({
+        "name": f"中断レシピ{i}",
+        "job": "LTW",
+        "recipe_level": 50,
+        "patch_version": "6.4",
+        "max_durability": 80,
+        "max_quality": 100,
+        "required_durability": 50,
+        "required_craftsmanship": 3500,
+        "required_control": 3200,
+        "progress_per_100": 120,
+        "quality_per_100": 100
+    }) for i in range(5)]
+    response = client.post("/recipes/bulk", params={"batch_size": 2}, content="\n".join(lines).encode("utf-8"))
+    assert response.status_code == 500
+    details = response.json()["error"]["details"]
+    assert details["committed_through"] == 2
+    assert details["summary"]["created"] == 2
+
+def test_export_recipes(client):
+    """NDJSON / CSV でのエクスポートのテスト"""
+    import csv
+    import io
+    import json
+
+    for level, job in [(90, "CRP"), (80, "CRP"), (85, "BSM")]:
+        client.post("/recipes/", json={
+            "name": f"エクスポートレシピ{level}",
+            "job": job,
+            "recipe_level": level,
+            "master_book_level": 1,
+            "stars": 3,
+            "patch_version": "6.4",
+            "max_durability": 80,
+            "max_quality": 100,
+            "required_durability": 50,
+            "required_craftsmanship": 3500,
+            "required_control": 3200,
+            "progress_per_100": 120,
+            "quality_per_100": 100
+        })
+
+    response = client.get("/recipes/export", params={"job": "CRP"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["recipe_level"] for row in rows] == [80, 90]
+    assert rows[0]["required_craftsmanship"] == 3500
+    assert "collected_at" in rows[0]
+
+    response = client.get("/recipes/export", params={"format": "csv", "min_level": "85"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(row["job"], row["recipe_level"]) for row in rows] == [("BSM", "85"), ("CRP", "90")]
+
+    response = client.get("/recipes/export", params={"job": "XXX"})
+    assert response.status_code == 400
+
+@pytest.fixture
+def prediction_model(monkeypatch, tmp_path):
+    """合成データで学習した推論モデルを読み込ませる"""
+    import numpy as np
+    from src.backend.api import predictor
+    from src.models.engine import LinearModel
+
+    rng = np.random.default_rng(0)
+    level = rng.integers(1, 101, 500)
+    columns = {
+        "job_code": rng.integers(0, 8, 500),
+        "recipe_level": level,
+        "master_book_level": rng.integers(0, 13, 500),
+        "stars": rng.integers(0, 6, 500),
+        "required_craftsmanship": 50 * np.exp(level / 25),
+        "required_control": 40 * np.exp(level / 26),
+        "progress_per_100": 300 * np.exp(-level / 120),
+        "quality_per_100": 280 * np.exp(-level / 110),
+    }
+    model = LinearModel.fit(columns)
+    monkeypatch.setattr(predictor, "MODEL_PATH", str(tmp_path / "missing"))
+    # 登録したレシピはその場で追加学習する
+    monkeypatch.setattr(predictor, "MODEL_FOLD_INTERVAL_SECONDS", 0)
+    predictor.set_model(model)
+    predictor.prediction_cache.clear()
+    yield model
+    predictor.set_model(None)
+
+def test_predict_without_model(client, monkeypatch, tmp_path):
+    """モデル未学習時は503を返す"""
+    from src.backend.api import predictor
+    monkeypatch.setattr(predictor, "MODEL_PATH", str(tmp_path / "missing"))
+    predictor.set_model(None)
+    response = client.post("/predict", json={"job": "CRP", "recipe_level": 90})
+    assert response.status_code == 503
+    assert response.json()["error"]["type"] == "model_unavailable"
+
+def test_predict(client, prediction_model):
+    """単一・一括推論のテスト"""
+    recipe_data = {
+        "name": "推論レシピ",
+        "job": "CRP",
+        "recipe_level": 90,
+        "master_book_level": 1,
+        "stars": 3,
+        "patch_version": "6.4",
+        "max_durability": 80,
+        "max_quality": 100,
+        "required_durability": 50,
+        "required_craftsmanship": 3500,
+        "required_control": 3200,
+        "progress_per_100": 120,
+        "quality_per_100": 100
+    }
+    recipe_id = client.post("/recipes/", json=recipe_data).json()["data"]["id"]
+
+    # 目的変数を含むRecipeBase形式でもそのまま受け付ける
+    response = client.post("/predict", json=recipe_data)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] is True
+    # 登録したレシピは追加学習されるため、モデルバージョンが変わっている
+    assert data["meta"]["model_version"] != prediction_model.version
+    model_version = data["meta"]["model_version"]
+    single = data["data"]
+    assert set(single) == {"required_craftsmanship", "required_control", "progress_per_100", "quality_per_100"}
+
+    response = client.post("/predict/batch", json={
+        "recipes": [{"job": "CRP", "recipe_level": 90, "master_book_level": 1, "stars": 3},
+                    {"job": "BSM", "recipe_level": 50}],
+        "recipe_ids": [recipe_id, 99999]
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data["data"]] == [None, None, recipe_id]
+    assert data["meta"]["count"] == 3
+    assert data["meta"]["missing_ids"] == [99999]
+    assert data["data"][0]["required_craftsmanship"] == pytest.approx(single["required_craftsmanship"])
+    assert data["data"][2]["required_craftsmanship"] == pytest.approx(single["required_craftsmanship"])
+
+    # グリッドの範囲内の入力は推論キャッシュを使わない
+    response = client.get("/admin/cache/stats")
+    assert response.status_code == 200
+    stats = response.json()["data"]["prediction"]
+    assert stats["model_version"] == model_version
+    assert (stats["hits"], stats["misses"]) == (0, 0)
+
+    # グリッドの範囲外の入力は、同じ入力なら推論キャッシュから返る
+    outside = {"job": "CRP", "recipe_level": 200, "master_book_level": 1, "stars": 3}
+    first = client.post("/predict", json=outside).json()["data"]
+    assert client.post("/predict", json=outside).json()["data"] == first
+    stats = client.get("/admin/cache/stats").json()["data"]["prediction"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    response = client.post("/predict/batch", json={"recipes": [], "recipe_ids": []})
+    assert response.status_code in (400, 422)
+    response = client.post("/predict", json={"job": "XXX", "recipe_level": 90})
+    assert response.status_code in (400, 422)
+
+def test_model_hot_swap(client, prediction_model, monkeypatch, tmp_path):
+    """レジストリのモデルへの切り替えとシャドウ比較のテスト"""
+    import numpy as np
+    from src.backend.api import predictor
+    from src.models.engine import LinearModel
+    from src.models.features import FeatureSpec
+    from src.models.registry import ModelRegistry
+
+    registry = ModelRegistry(str(tmp_path / "models"))
+    monkeypatch.setattr(predictor, "registry", registry)
+    registry.publish(prediction_model)
+    other = LinearModel.from_stats(
+        FeatureSpec(), prediction_model.xtx, np.asarray(prediction_model.xty) * 1.01,
+        prediction_model.n_samples
+    )
+    registry.publish(other)
+
+    body = {"job": "CRP", "recipe_level": 90}
+    before = client.post("/predict", json=body).json()
+    assert before["meta"]["model_version"] == prediction_model.version
+
+    response = client.post(f"/admin/models/{other.version}/activate")
+    assert response.status_code == 200
+    assert response.json()["data"]["active"] == other.version
+    assert registry.active_version() == other.version
+    after = client.post("/predict", json=body).json()
+    assert after["meta"]["model_version"] == other.version
+    assert after["data"]["required_control"] != before["data"]["required_control"]
+
+    response = client.post(f"/admin/models/{prediction_model.version}/shadow")
+    assert response.json()["data"] == {"active": other.version, "shadow": prediction_model.version}
+    client.post("/predict/batch", json={"recipes": [body, {"job": "BSM", "recipe_level": 40}]})
+    response = client.get("/admin/models")
+    assert response.status_code == 200
+    data = response.json()
+    assert {meta["version"] for meta in data["data"]} == {prediction_model.version, other.version}
+    comparison = data["meta"]["shadow_comparison"]
+    assert comparison["count"] == 2
+    assert comparison["mean_relative_difference"]["required_control"] > 0
+
+    assert client.delete("/admin/models/shadow").json()["data"]["shadow"] is None
+    assert client.post("/admin/models/unknown/activate").status_code == 404
+
+def test_incremental_model_update(client, prediction_model, monkeypatch, tmp_path):
+    """レシピ登録時の追加学習と全データでの再学習のテスト"""
+    import json
+    from src.backend.api import predictor
+    from src.models.registry import ModelRegistry
+
+    registry = ModelRegistry(str(tmp_path / "models"))
+    monkeypatch.setattr(predictor, "registry", registry)
+
+    def recipe(name, level):
+        return {
+            "name": name,
+            "job": "CUL",
+            "recipe_level": level,
+            "patch_version": "6.4",
+            "max_durability": 80,
+            "max_quality": 100,
+            "required_durability": 50,
+            "required_craftsmanship": 3500,
+            "required_control": 3200,
+            "progress_per_100": 120,
+            "quality_per_100": 100
+        }
+
+    assert client.post("/recipes/", json=recipe("追加学習レシピ1", 90)).status_code == 200
+    model = predictor.get_model()
+    assert model.n_samples == prediction_model.n_samples + 1
+    assert model.version != prediction_model.version
+
+    body = "\n".join(json.dumps(recipe(f"追加学習レシピ{i}", 80 + i)) for i in range(2, 4))
+    client.post("/recipes/bulk", content=body.encode("utf-8"))
+    assert predictor.get_model().n_samples == prediction_model.n_samples + 3
+
+    response = client.post("/admin/models/refit")
+    assert response.status_code == 200
+    report = response.json()["data"]
+    assert report["rows"] == 3
+    assert report["incremental_rows"] == prediction_model.n_samples + 3
+    assert registry.active_version() == report["version"]
+    assert predictor.get_model().version == report["version"]
+
+def test_incremental_updates_coalesced(client, prediction_model, monkeypatch, tmp_path):
+    """一定間隔内に登録されたレシピはまとめて1回で追加学習する"""
+    import json
+    from src.backend.api import predictor
+
+    monkeypatch.setattr(predictor, "MODEL_FOLD_INTERVAL_SECONDS", 60)
+    body = "\n".join(json.dumps({
+        "name": f"まとめて反映{i}", "job": "ARM", "recipe_level": 60 + i, "patch_version": "6.4",
+        "max_durability": 80, "max_quality": 100, "required_durability": 50,
+        "required_craftsmanship": 3000, "required_control": 2800,
+        "progress_per_100": 150, "quality_per_100": 120
+    }) for i in range(3))
+    assert client.post("/recipes/bulk", content=body.encode("utf-8")).status_code == 200
+    assert client.post("/recipes/", json={
+        "name": "まとめて反映3", "job": "ARM", "recipe_level": 70, "patch_version": "6.4",
+        "max_durability": 80, "max_quality": 100, "required_durability": 50,
+        "required_craftsmanship": 3000, "required_control": 2800,
+        "progress_per_100": 150, "quality_per_100": 120
+    }).status_code == 200
+    # 間隔が過ぎるまではモデルを差し替えない
+    assert predictor.get_model().version == prediction_model.version
+
+    version = predictor.flush_folds()
+    model = predictor.get_model()
+    assert version == model.version
+    assert model.n_samples == prediction_model.n_samples + 4
+    assert predictor.flush_folds() is None
+
+def test_refit_replays_concurrent_folds(client, prediction_model, monkeypatch, tmp_path):
+    """再学習の読み込み中に追加学習したレシピは、読み込んでいないものだけ再学習したモデルに反映する"""
+    from src.backend.api import predictor
+    from src.backend.api.models import RecipeCreate
+    from src.models.registry import ModelRegistry
+
+    monkeypatch.setattr(predictor, "registry", ModelRegistry(str(tmp_path / "models")))
+    monkeypatch.setattr(predictor, "MODEL_FOLD_INTERVAL_SECONDS", 60)
+
+    def recipe(name, level):
+        return {
+            "name": name, "job": "GSM", "recipe_level": level, "patch_version": "6.4",
+            "max_durability": 80, "max_quality": 100, "required_durability": 50,
+            "required_craftsmanship": 3500, "required_control": 3200,
+            "progress_per_100": 120, "quality_per_100": 100
+        }
+
+    ids = [client.post("/recipes/", json=recipe(f"再学習前{i}", 50 + i)).json()["data"]["id"] for i in range(2)]
+    # 読み込み後に追加学習されるが、登録はすでに読み込まれているレシピ
+    predictor.flush_folds()
+    predictor.fold_in_recipes([RecipeCreate(**recipe("再学習前1", 51))], [ids[1]])
+    iter_recipe_batches = predictor.iter_recipe_batches
+
+    async def racing_batches(db, params):
+        async for batch in iter_recipe_batches(db, params):
+            yield batch
+        # 読み込み終了後に登録・追加学習されたレシピ
+        predictor.fold_in_recipes([RecipeCreate(**recipe("再学習中", 60))], [ids[1] + 1])
+        predictor.flush_folds()
+
+    monkeypatch.setattr(predictor, "iter_recipe_batches", racing_batches)
+    response = client.post("/admin/models/refit")
+    assert response.status_code == 200
+    report = response.json()["data"]
+    assert report["rows"] == 3
+    assert report["replayed_rows"] == 1
+    assert predictor.get_model().n_samples == 3
+    assert predictor._fold_log == []
+
+    # 再学習に含まれるレシピは後から追加学習を予約しても足し込まない
+    predictor.fold_in_recipes([RecipeCreate(**recipe("再学習前0", 50))], [ids[0]])
+    assert predictor.flush_folds() is None
+    assert predictor.get_model().n_samples == 3
+
+def test_refit_does_not_block_event_loop(client, prediction_model, monkeypatch, tmp_path):
+    """追加学習の反映がロックを持っている間も、再学習はイベントループを止めずに待つ"""
+    import threading
+    from src.backend.api import predictor
+    from src.models.engine import LinearModel
+    from src.models.registry import ModelRegistry
+
+    registry = ModelRegistry(str(tmp_path / "models"))
+    monkeypatch.setattr(predictor, "registry", registry)
+    monkeypatch.setattr(predictor, "MODEL_REGISTRY_KEEP_VERSIONS", 1)
+    registry.publish(prediction_model)
+
+    async def scenario():
+        predictor._update_lock.acquire()
+        # 万一イベントループが止まってもテストが終わるよう、別スレッドからロックを解放する
+        timer = threading.Timer(1.0, predictor._update_lock.release)
+        timer.start()
+        ticks = 0
+        async with TestingSessionLocal() as db:
+            task = asyncio.create_task(predictor.refit_from_database(db))
+            while not timer.finished.is_set() and ticks < 10:
+                await asyncio.sleep(0.01)
+                ticks += 1
+            report = await task
+        timer.join()
+        return ticks, report
+
+    ticks, report = asyncio.run(scenario())
+    assert ticks == 10
+    assert report["version"] != prediction_model.version
+    # 再学習で保存したモデルを ACTIVE にし、古いバージョンは削除する
+    assert [meta["version"] for meta in registry.list_versions()] == [report["version"]]
+    assert registry.active_version() == report["version"]
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+from src.backend.api.batching import MicroBatcher
+
+def test_micro_batcher_groups_concurrent_items():
+    calls = []
+
+    def handler(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    async def run():
+        batcher = MicroBatcher(handler, max_batch_size=4, max_wait_ms=5)
+        # 負荷が低いとき（1件ずつ）は待たずに1件で処理される
+        assert await batcher.submit(1) == 10
+        assert calls == [[1]]
+
+        # 同時に届いた項目はまとめて処理され、結果はそれぞれの呼び出し元に返る
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(2, 12)))
+        assert results == [i * 10 for i in range(2, 12)]
+        assert [len(batch) for batch in calls[1:]] == [4, 4, 2]
+        assert batcher.stats()["items"] == 11
+        assert batcher.stats()["largest_batch"] == 4
+        return batcher
+
+    asyncio.run(run())
+
+def test_micro_batcher_propagates_errors():
+    def handler(items):
+        raise RuntimeError("boom")
+
+    async def run():
+        batcher = MicroBatcher(handler)
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(run())
+    with pytest.raises(ValueError):
+        MicroBatcher(lambda items: items, max_batch_size=0)
@@ -0,0 +1,44 @@
+import json
+import pytest
+from src.utils.csv_to_json import convert_csv_to_json, iter_recipes, write_json_array, write_ndjson
+
+HEADER = ("name,job,recipe_level,master_book_level,stars,patch_version,max_durability,"
+          "max_quality,required_durability,required_craftsmanship,required_control,"
+          "progress_per_100,quality_per_100\n")
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "recipes.csv"
+    path.write_text(
+        HEADER
+        + "テストレシピ1,CRP,90,0,0,6.4,80,10000,70,3000,2800,230.5,200.3\n"
+        + "壊れた行,CRP,abc,0,0,6.4,80,10000,70,3000,2800,230.5,200.3\n"
+        + "テストレシピ2,BSM,89,0,1,6.4,70,9000,60,2900,2700,220.0,190.0\n",
+        encoding="utf-8"
+    )
+    return str(path)
+
+def test_iter_recipes_reports_line_numbers(csv_file):
+    errors = []
+    recipes = list(iter_recipes(csv_file, on_error=lambda line, msg: errors.append(line)))
+    assert [r["name"] for r in recipes] == ["テストレシピ1", "テストレシピ2"]
+    assert recipes[0]["recipe_level"] == 90
+    assert recipes[0]["progress_per_100"] == 230.5
+    assert errors == [3]
+
+def test_convert_csv_to_json_skips_invalid_rows(csv_file):
+    assert len(convert_csv_to_json(csv_file)) == 2
+
+def test_writers_match_json_dump(csv_file, tmp_path):
+    recipes = convert_csv_to_json(csv_file)
+
+    array_path = tmp_path / "out.json"
+    with open(array_path, "w", encoding="utf-8") as f:
+        assert write_json_array(iter(recipes), f) == 2
+    assert array_path.read_text(encoding="utf-8") == json.dumps(recipes, ensure_ascii=False, indent=2)
+
+    ndjson_path = tmp_path / "out.ndjson"
+    with open(ndjson_path, "w", encoding="utf-8") as f:
+        assert write_ndjson(iter(recipes), f) == 2
+    lines = ndjson_path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == recipes
@@ -0,0 +1,28 @@
+from src.data.ingest import expand_inputs, ingest
+
+HEADER = ("name,job,recipe_level,master_book_level,stars,patch_version,max_durability,"
+          "max_quality,required_durability,required_craftsmanship,required_control,"
+          "progress_per_100,quality_per_100\n")
+
+def _write_sheet(path, job, names):
+    rows = [f"{name},{job},90,0,0,6.4,80,10000,70,3000,2800,230.5,200.3\n" for name in names]
+    path.write_text(HEADER + "".join(rows), encoding="utf-8")
+
+def test_ingest_merges_and_deduplicates(tmp_path):
+    _write_sheet(tmp_path / "BSM.csv", "BSM", ["レシピA", "レシピB", "レシピA"])
+    _write_sheet(tmp_path / "CRP.csv", "CRP", ["レシピA", "レシピC"])
+    (tmp_path / "CUL.csv").write_text(
+        HEADER + "レシピD,CUL,0,0,0,6.4,80,10000,70,3000,2800,230.5,200.3\n", encoding="utf-8"
+    )
+
+    paths = expand_inputs([str(tmp_path)])
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["BSM.csv", "CRP.csv", "CUL.csv"]
+
+    result = ingest(paths, workers=2)
+    assert [(r["name"], r["job"]) for r in result.recipes] == [
+        ("レシピA", "BSM"), ("レシピB", "BSM"), ("レシピA", "CRP"), ("レシピC", "CRP")
+    ]
+    assert result.duplicates == 1
+    assert result.rows == 6
+    # レシピレベル0の行は行番号付きでスキップされる
+    assert [line for line, _ in result.files[2].errors] == [2]
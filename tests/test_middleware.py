@@ -81,4 +81,67 @@ def test_unexpected_error_handling():
     assert data["error"]["code"] == 500
     assert data["error"]["message"] == "An unexpected error occurred"
     assert data["error"]["type"] == "internal_server_error"
-    assert "Unexpected error" in data["error"]["details"]["error"] 
\ No newline at end of file
+    assert "Unexpected error" in data["error"]["details"]["error"]
+
+
+def create_logging_test_app():
+    """LoggingMiddleware を登録したテスト用のアプリケーションを作成"""
+    from fastapi.responses import StreamingResponse
+    from src.backend.api.middleware import LoggingMiddleware
+
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/test_ok")
+    async def test_ok():
+        return {"ok": True}
+
+    @app.get("/test_stream")
+    async def test_stream():
+        async def chunks():
+            for i in range(3):
+                yield f"{i}\n".encode()
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.get("/test_unhandled_error")
+    async def test_unhandled_error():
+        raise RuntimeError("Unexpected error")
+
+    return app
+
+
+def test_logging_middleware_logs_request(caplog):
+    """開始・完了ログに従来と同じフィールドが出力されることをテスト"""
+    client = StarletteTestClient(create_logging_test_app())
+    with caplog.at_level("INFO", logger="ff14_recipe_predictor"):
+        response = client.get("/test_ok")
+    assert response.status_code == 200
+
+    started, completed = [r for r in caplog.records if r.getMessage().startswith("Request ")]
+    assert started.getMessage() == "Request started: GET /test_ok"
+    assert started.ip_address == "testclient"
+    assert completed.getMessage() == "Request completed: GET /test_ok"
+    assert completed.request_id == started.request_id
+    assert completed.method == "GET"
+    assert completed.path == "/test_ok"
+    assert completed.status_code == 200
+    assert completed.duration_ms >= 0
+
+
+def test_logging_middleware_streams_response():
+    """ストリーミングレスポンスがそのまま返されることをテスト"""
+    client = StarletteTestClient(create_logging_test_app())
+    response = client.get("/test_stream")
+    assert response.status_code == 200
+    assert response.text == "0\n1\n2\n"
+
+
+def test_logging_middleware_translates_unhandled_error():
+    """ルートで処理されなかった例外がエラーレスポンスに変換されることをテスト"""
+    client = StarletteTestClient(create_logging_test_app())
+    response = client.get("/test_unhandled_error")
+    assert response.status_code == 500
+    data = response.json()
+    assert not data["success"]
+    assert data["error"]["type"] == "internal_error"
+    assert "Unexpected error" in data["error"]["details"]["error"]
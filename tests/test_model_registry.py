@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from src.models.engine import LinearModel
+from src.models.features import FeatureSpec
+from src.models.registry import ModelRegistry
+
+def _columns(scale):
+    rng = np.random.default_rng(0)
+    level = rng.integers(1, 101, 300)
+    return {
+        "job_code": rng.integers(0, 8, 300),
+        "recipe_level": level,
+        "master_book_level": rng.integers(0, 13, 300),
+        "stars": rng.integers(0, 6, 300),
+        "required_craftsmanship": scale * 50 * np.exp(level / 25),
+        "required_control": scale * 40 * np.exp(level / 26),
+        "progress_per_100": 300 * np.exp(-level / 120),
+        "quality_per_100": 280 * np.exp(-level / 110),
+    }
+
+def test_publish_load_and_pointers(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "models"))
+    assert registry.active_version() is None
+    assert registry.list_versions() == []
+
+    first = LinearModel.fit(_columns(1.0))
+    second = LinearModel.fit(_columns(1.1), spec=FeatureSpec(degree=2))
+    assert registry.publish(first) == first.version
+    assert registry.publish(first) == first.version  # 保存済みなら何もしない
+    registry.publish(second)
+    assert {meta["version"] for meta in registry.list_versions()} == {first.version, second.version}
+
+    # 読み込みは遅延し、同じバージョンは同じオブジェクトを返す
+    loaded = registry.load(first.version)
+    assert loaded is registry.load(first.version)
+    assert isinstance(loaded.coef, np.memmap)
+    np.testing.assert_allclose(loaded.coef, first.coef)
+
+    registry.set_active(first.version)
+    registry.set_shadow(second.version)
+    assert registry.active_version() == first.version
+    assert registry.shadow_version() == second.version
+    registry.set_shadow(None)
+    assert registry.shadow_version() is None
+
+    with pytest.raises(KeyError):
+        registry.set_active("unknown")
+    with pytest.raises(KeyError):
+        registry.load("unknown")
+    with pytest.raises(ValueError):
+        registry.load("../models")
+
+def test_prune_keeps_newest_active_and_shadow(tmp_path):
+    registry = ModelRegistry(str(tmp_path / "models"))
+    models = [LinearModel.fit(_columns(1.0 + i / 10)) for i in range(5)]
+    for model in models:
+        registry.publish(model)
+    registry.set_active(models[0].version)
+    registry.set_shadow(models[1].version)
+    loaded = registry.load(models[2].version)
+
+    removed = registry.prune(keep=2)
+    assert removed == [models[2].version]
+    assert [meta["version"] for meta in registry.list_versions()] == [model.version for model in models[:2] + models[3:]]
+    assert not registry.exists(models[2].version)
+    # 読み込み済みだったモデルもそのまま使える
+    np.testing.assert_allclose(loaded.coef, models[2].coef)
+    assert registry.prune(keep=2) == []
+    with pytest.raises(ValueError):
+        registry.prune(keep=0)
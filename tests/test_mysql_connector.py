@@ -216,10 +216,13 @@ def test_search_and_bulk_insert():
         ]
         
         # 1. 一括登録テスト
-        registered_ids = connector.bulk_insert_recipes(test_recipes)
+        inserted = connector.bulk_insert_recipes(test_recipes)
+        registered_ids = list(inserted.ids.values())
         result.add_result("レシピの一括登録", 
-                         len(registered_ids) == len(test_recipes),
-                         f"登録成功: {len(registered_ids)}/{len(test_recipes)}")
+                         sorted(inserted.ids) == list(range(len(test_recipes)))
+                         and not inserted.duplicates and not inserted.failed,
+                         f"登録成功: {len(inserted.ids)}/{len(test_recipes)}"
+                         f"（重複: {inserted.duplicates}, 失敗: {inserted.failed}）")
         
         # 2. 検索テスト
         search_results = connector.search_recipes(job='BSM', recipe_level=90)
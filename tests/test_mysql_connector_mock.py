@@ -0,0 +1,293 @@
+"""MySQLConnector のプール・プリペアドステートメントのテスト（MySQLの代わりにモックのプールを使う）"""
+import threading
+import time
+
+import pytest
+from mysql.connector.errors import Error, IntegrityError, PoolError
+
+from src.database import mysql_connector
+from src.database.mysql_connector import MySQLConnector
+
+
+class FakeDatabase:
+    """recipes / recipe_stats / training_data だけを持つメモリ上のDB"""
+
+    def __init__(self):
+        self.tables = {"recipes": {}, "recipe_stats": {}, "training_data": {}}
+        self.next_id = 1
+        self.commits = 0
+        self.rollbacks = 0
+        self.lock = threading.Lock()
+
+
+class FakeCursor:
+    def __init__(self, cnx, prepared=False):
+        self.cnx = cnx
+        self.prepared = prepared
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, query, params=()):
+        db = self.cnx.db
+        sql = " ".join(query.split())
+        with db.lock:
+            if sql.startswith("INSERT INTO recipes "):
+                name, job = params[0], params[1]
+                if any(row[:2] == (name, job) for row in db.tables["recipes"].values()):
+                    raise IntegrityError(msg="Duplicate entry for key 'uix_recipe_name_job'", errno=1062)
+                self.lastrowid = db.next_id
+                db.next_id += 1
+                self._write("recipes", self.lastrowid, tuple(params))
+            elif sql.startswith("INSERT INTO recipe_stats ") or sql.startswith("INSERT INTO training_data "):
+                table = sql.split()[2]
+                if any(not isinstance(value, (int, float)) for value in params):
+                    raise Error(msg=f"Incorrect value for {table}", errno=1366)
+                self._write(table, params[0], tuple(params[1:]))
+            elif sql.startswith("SELECT id, name, job FROM recipes"):
+                keys = set(zip(params[::2], params[1::2]))
+                self._rows = [
+                    (recipe_id, row[0], row[1])
+                    for recipe_id, row in db.tables["recipes"].items() if row[:2] in keys
+                ]
+            else:
+                self._rows = []
+
+    def _write(self, table, row_id, row):
+        self.cnx.db.tables[table][row_id] = row
+        self.cnx.undo.append((table, row_id))
+
+    def executemany(self, query, seq_params):
+        for params in seq_params:
+            self.execute(query, params)
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db, connection_id):
+        self.db = db
+        self.connection_id = connection_id
+        self.undo = []
+        self.prepared_cursors = 0
+        self.pings = 0
+
+    def cursor(self, prepared=False):
+        if prepared:
+            self.prepared_cursors += 1
+        return FakeCursor(self, prepared)
+
+    def commit(self):
+        self.undo = []
+        self.db.commits += 1
+
+    def rollback(self):
+        with self.db.lock:
+            for table, row_id in self.undo:
+                self.db.tables[table].pop(row_id, None)
+        self.undo = []
+        self.db.rollbacks += 1
+
+    def ping(self, **kwargs):
+        self.pings += 1
+
+
+class FakePooledConnection:
+    """MySQLConnectionPool.get_connection が返す接続（close でプールに返却する）"""
+
+    def __init__(self, pool, cnx):
+        self._pool = pool
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def close(self):
+        self._pool.release(self._cnx)
+
+
+class FakePool:
+    """mysql.connector の MySQLConnectionPool と同じく、空きがなければ待たずに PoolError を送出する"""
+    instances = []
+
+    def __init__(self, pool_name, pool_size, **kwargs):
+        self.db = FakeDatabase()
+        self.idle = [FakeConnection(self.db, i + 1) for i in range(pool_size)]
+        self.checkouts = 0
+        self.lock = threading.Lock()
+        FakePool.instances.append(self)
+
+    def get_connection(self):
+        with self.lock:
+            if not self.idle:
+                raise PoolError("Failed getting connection; pool exhausted")
+            self.checkouts += 1
+            return FakePooledConnection(self, self.idle.pop())
+
+    def release(self, cnx):
+        with self.lock:
+            self.idle.append(cnx)
+
+
+@pytest.fixture
+def connector(monkeypatch):
+    monkeypatch.setenv("MYSQL_PASSWORD", "test")
+    monkeypatch.setattr(mysql_connector, "MySQLConnectionPool", FakePool)
+    FakePool.instances.clear()
+
+    def create(pool_size=2):
+        connector = MySQLConnector(pool_size=pool_size)
+        assert connector.connect()
+        return connector, FakePool.instances[-1]
+
+    return create
+
+
+def test_pool_checkout_waits_for_free_connection(connector):
+    """プールの接続がすべて使われている場合は、エラーにせず空くまで待つ"""
+    connector, pool = connector(pool_size=1)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold():
+        with connector.session():
+            holding.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    holding.wait()
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(connector.insert_recipe("待機", "CRP", 90)))
+    waiter.start()
+    time.sleep(0.05)
+    assert not result
+    release.set()
+    holder.join()
+    waiter.join()
+    assert result == [1]
+
+
+def test_pool_used_from_many_threads(connector):
+    """プールの接続数より多いスレッドから使っても、すべての登録が成功する"""
+    connector, pool = connector(pool_size=2)
+    results = []
+
+    def insert(thread):
+        for i in range(20):
+            results.append(connector.insert_recipe(f"thread{thread}_{i}", "BSM", 50))
+
+    threads = [threading.Thread(target=insert, args=(t,)) for t in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 160
+    assert None not in results
+    assert len(pool.idle) == 2
+
+
+def test_session_checks_out_once(connector):
+    """作業単位の中の操作は1つの接続を使い、チェックアウトは1回だけ"""
+    connector, pool = connector(pool_size=2)
+    with connector.session():
+        recipe_id = connector.insert_recipe("作業単位", "ALC", 80)
+        assert connector.insert_recipe_stats(recipe_id, 80, 10000, 40)
+        assert connector.insert_training_data(recipe_id, 3000, 2800, 200.0, 180.0)
+        connector.search_recipes(job="ALC")
+    assert pool.checkouts == 1
+    # プールモードではチェックアウト時のプールの確認に任せ、独自の ping はしない
+    assert all(cnx.pings == 0 for cnx in pool.idle)
+
+
+def test_prepared_statements_reused(connector):
+    """同じ接続・同じSQLのプリペアドステートメントは1回だけ準備する"""
+    connector, pool = connector(pool_size=1)
+    for i in range(3):
+        connector.insert_recipe(f"準備済み{i}", "CUL", 10)
+    connector.search_recipes(job="CUL")
+    connector.search_recipes(job="CUL")
+    connector.search_recipes(job="CUL", stars=1)
+    (cnx,) = pool.idle
+    # INSERT 1文と検索条件の組み合わせ2通り
+    assert cnx.prepared_cursors == 3
+
+
+def test_prepared_inserts(connector):
+    """insert_recipe / insert_recipe_stats / insert_training_data はプリペアドステートメントで登録する"""
+    connector, pool = connector(pool_size=1)
+    recipe_id = connector.insert_recipe("単体登録", "LTW", 70, master_book_level=2, stars=1)
+    assert connector.insert_recipe_stats(recipe_id, 80, 10000, 40)
+    assert connector.insert_training_data(recipe_id, 3000, 2800, 200.0, 180.0)
+    assert not connector.insert_training_data(recipe_id, 3000, "不正な値", 200.0, 180.0)
+    # 同じ名前と職種は一意制約違反
+    assert connector.insert_recipe("単体登録", "LTW", 70) is None
+
+    (cnx,) = pool.idle
+    assert cnx.prepared_cursors == 3
+    assert pool.db.tables["recipes"][recipe_id][:3] == ("単体登録", "LTW", 70)
+    assert pool.db.tables["recipe_stats"][recipe_id] == (80, 10000, 40)
+    assert pool.db.tables["training_data"][recipe_id] == (3000, 2800, 200.0, 180.0)
+
+
+def make_recipe(name, **overrides):
+    recipe = {
+        "name": name,
+        "job": "WVR",
+        "recipe_level": 90,
+        "patch_version": "6.4",
+        "max_durability": 80,
+        "max_quality": 10000,
+        "required_durability": 40,
+        "required_craftsmanship": 3000,
+        "required_control": 2800,
+        "progress_per_100": 200.0,
+        "quality_per_100": 180.0,
+    }
+    recipe.update(overrides)
+    return recipe
+
+
+def test_bulk_insert_batches(connector):
+    """バッチごとに1トランザクションで3テーブルに登録し、重複した行を返す"""
+    connector, pool = connector(pool_size=1)
+    existing_id = connector.insert_recipe("登録済み", "WVR", 90)
+    commits = pool.db.commits
+
+    recipes = [make_recipe(f"一括{i}") for i in range(5)]
+    recipes.insert(1, make_recipe("登録済み"))
+    recipes.append(make_recipe("一括0"))
+    result = connector.bulk_insert_recipes(recipes, batch_size=3)
+
+    assert result.duplicates == [1, 6]
+    assert result.failed == {}
+    # IDは入力の行番号ごとに返る
+    assert sorted(result.ids) == [0, 2, 3, 4, 5]
+    assert existing_id not in result.ids.values()
+    for index, recipe_id in result.ids.items():
+        assert pool.db.tables["recipes"][recipe_id][0] == recipes[index]["name"]
+    assert pool.db.commits - commits == 2   # 7行を3件ずつ（3番目のバッチは重複のみ）
+    for table in ("recipes", "recipe_stats", "training_data"):
+        assert set(result.ids.values()) <= set(pool.db.tables[table])
+
+
+def test_bulk_insert_reports_failed_rows(connector):
+    """バッチ内の不正な行だけが失敗として返り、同じバッチの他の行は登録される"""
+    connector, pool = connector(pool_size=1)
+    recipes = [make_recipe(f"一括{i}") for i in range(5)]
+    recipes[1] = make_recipe("不正な値", required_control="abc")
+    recipes[3] = make_recipe("項目不足")
+    del recipes[3]["quality_per_100"]
+
+    result = connector.bulk_insert_recipes(recipes, batch_size=5)
+
+    assert sorted(result.failed) == [1, 3]
+    assert "quality_per_100" in result.failed[3]
+    assert sorted(result.ids) == [0, 2, 4]
+    assert pool.db.rollbacks >= 3
+    # 失敗した行はどのテーブルにも残らない
+    names = {row[0] for row in pool.db.tables["recipes"].values()}
+    assert names == {"一括0", "一括2", "一括4"}
+    assert set(pool.db.tables["training_data"]) == set(result.ids.values())
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+from src.models.cache import PredictionCache
+from src.utils.lru import LRUCache
+
+def test_lru_cache_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1      # a を最近使ったものにする
+    cache.put("c", 3)               # b が追い出される
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.stats() == {
+        "size": 2, "maxsize": 2, "ttl": None, "hits": 2, "misses": 1, "evictions": 1,
+        "expirations": 0, "hit_rate": 2 / 3
+    }
+
+def test_lru_cache_ttl(monkeypatch):
+    from src.utils import lru
+
+    now = [100.0]
+    monkeypatch.setattr(lru, "monotonic", lambda: now[0])
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.put("a", 1)
+    now[0] += 9.9
+    assert cache.get("a") == 1
+    now[0] += 0.1                   # 登録から10秒で期限切れ
+    assert cache.get("a") is None
+    assert "a" not in cache
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+def test_prediction_cache_keys_and_invalidation():
+    cache = PredictionCache(maxsize=10)
+    recipe = SimpleNamespace(job="CRP", recipe_level=90, master_book_level=None, stars=None)
+    same = SimpleNamespace(job="CRP", recipe_level=90, master_book_level=0, stars=0,
+                           crafter_level=None, craftsmanship=None, control=None)
+    stronger = SimpleNamespace(job="CRP", recipe_level=90, master_book_level=0, stars=0,
+                               crafter_level=90, craftsmanship=4000, control=3800)
+    assert cache.normalize(recipe) == cache.normalize(same)
+    # モデルが使わないキャラクター情報はキーに含めない
+    assert cache.normalize(recipe) == cache.normalize(stronger)
+    assert cache.normalize(recipe) != cache.normalize(SimpleNamespace(job="CRP", recipe_level=90,
+                                                                      master_book_level=1, stars=None))
+
+    cache.set_version("v1")
+    cache.put("v1", cache.normalize(recipe), {"required_control": 1.0})
+    assert cache.get("v1", cache.normalize(same)) == {"required_control": 1.0}
+
+    # モデルバージョンが変わると以前の結果は使われない
+    cache.set_version("v2")
+    assert cache.get("v2", cache.normalize(recipe)) is None
+    # 切り替え前のモデルで推論中だったリクエストの取得・登録は無視する
+    cache.put("v1", cache.normalize(recipe), {"required_control": 1.0})
+    assert cache.get("v1", cache.normalize(recipe)) is None
+    cache.set_version("v2")
+    stats = cache.stats()
+    assert stats["model_version"] == "v2"
+    assert stats["invalidations"] == 1
+    assert stats["stale"] == 2
+    assert stats["size"] == 0
+    # ヒット・ミスの回数は切り替えをまたいで累積する
+    assert (stats["hits"], stats["misses"]) == (1, 1)
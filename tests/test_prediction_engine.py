@@ -0,0 +1,204 @@
+import numpy as np
+import pytest
+from src.data.snapshot import JOBS
+from src.models.engine import LinearModel
+from src.models.features import TARGETS, FeatureSpec
+
+def _training_columns(rows=2000, seed=0):
+    """レシピレベルに対して指数的に増える合成データ"""
+    rng = np.random.default_rng(seed)
+    level = rng.integers(1, 101, rows)
+    columns = {
+        "job_code": rng.integers(0, len(JOBS), rows).astype(np.int8),
+        "recipe_level": level.astype(np.int16),
+        "master_book_level": rng.integers(0, 13, rows).astype(np.int16),
+        "stars": rng.integers(0, 6, rows).astype(np.int8),
+    }
+    boost = 1 + 0.05 * columns["stars"] + 0.02 * columns["master_book_level"]
+    columns["required_craftsmanship"] = np.round(50 * np.exp(level / 25) * boost)
+    columns["required_control"] = np.round(40 * np.exp(level / 26) * boost)
+    columns["progress_per_100"] = 300 * np.exp(-level / 120)
+    columns["quality_per_100"] = 280 * np.exp(-level / 110)
+    return columns
+
+def test_fit_and_predict_batch():
+    columns = _training_columns()
+    model = LinearModel.fit(columns, spec=FeatureSpec(degree=3), alpha=1e-6)
+    predictions = model.predict_batch(columns)
+    assert set(predictions) == set(TARGETS)
+    for target in TARGETS:
+        assert predictions[target].shape == (2000,)
+        error = np.abs(predictions[target] - columns[target]) / columns[target]
+        assert np.median(error) < 0.05
+
+    # ジョブ名の指定と1件ずつの推論はバッチ推論と一致する
+    single = model.predict_batch({"job": ["BSM"], "recipe_level": [90], "master_book_level": [0], "stars": [0]})
+    batch = model.predict_batch({"job_code": np.array([1, 1]), "recipe_level": np.array([90, 50])})
+    assert single["required_craftsmanship"][0] == pytest.approx(batch["required_craftsmanship"][0])
+
+    with pytest.raises(ValueError):
+        model.predict_batch({"job": ["XXX"], "recipe_level": [90]})
+
+def test_save_and_load(tmp_path):
+    model = LinearModel.fit(_training_columns(), data_version="abc")
+    path = str(tmp_path / "model")
+    model.save(path)
+
+    loaded = LinearModel.load(path)
+    assert loaded.version == model.version
+    assert loaded.data_version == "abc"
+    assert loaded.spec == model.spec
+    assert isinstance(loaded.coef, np.memmap)
+    inputs = {"job_code": np.array([0, 7]), "recipe_level": np.array([10, 100])}
+    np.testing.assert_allclose(
+        loaded.predict_batch(inputs)["quality_per_100"], model.predict_batch(inputs)["quality_per_100"]
+    )
+
+def test_from_stats_matches_fit():
+    columns = _training_columns()
+    spec = FeatureSpec(degree=2, job_interactions=True)
+    model = LinearModel.fit(columns, spec=spec)
+
+    # 十分統計量を分割して足し合わせても同じ係数になる
+    half = {name: values[:1000] for name, values in columns.items()}
+    rest = {name: values[1000:] for name, values in columns.items()}
+    xtx1, xty1, n1 = LinearModel.compute_stats(spec, half)
+    xtx2, xty2, n2 = LinearModel.compute_stats(spec, rest)
+    merged = LinearModel.from_stats(spec, xtx1 + xtx2, xty1 + xty2, n1 + n2)
+    np.testing.assert_allclose(merged.coef, model.coef, rtol=1e-8)
+    assert merged.n_samples == 2000
+
+def test_grid_predictor_matches_model():
+    from src.models.grid import GRID_MAX_LEVEL, GridPredictor
+
+    model = LinearModel.fit(_training_columns())
+    grid = GridPredictor(model)
+    assert grid.version == model.version
+
+    # グリッド内外の入力が混在していても、モデルで直接推論した値と一致する
+    inputs = {
+        "job_code": np.array([0, 3, 7, 7]),
+        "recipe_level": np.array([1, 55, GRID_MAX_LEVEL, GRID_MAX_LEVEL + 30]),
+        "master_book_level": np.array([0, 12, 3, 40]),
+        "stars": np.array([0, 5, 2, 1]),
+    }
+    expected = model.predict_batch(inputs)
+    actual = grid.predict_batch(inputs)
+    for target in TARGETS:
+        np.testing.assert_allclose(actual[target], expected[target], rtol=1e-12)
+
+    single = grid.predict_batch({"job": ["ALC"], "recipe_level": [90]})
+    assert single["required_control"][0] == pytest.approx(
+        model.predict_batch({"job": ["ALC"], "recipe_level": [90]})["required_control"][0]
+    )
+
+def test_partial_fit_matches_full_fit():
+    from types import SimpleNamespace
+    from src.models.incremental import StatsAccumulator, coefficient_drift, recipes_to_columns
+
+    columns = _training_columns()
+    first = {name: values[:1990] for name, values in columns.items()}
+    model = LinearModel.fit(first)
+
+    # 追加の10件をレシピオブジェクトとして足し込むと、全件で学習したモデルと一致する
+    recipes = [
+        SimpleNamespace(
+            job=JOBS[columns["job_code"][i]],
+            recipe_level=int(columns["recipe_level"][i]),
+            master_book_level=int(columns["master_book_level"][i]) or None,
+            stars=int(columns["stars"][i]) or None,
+            **{target: float(columns[target][i]) for target in TARGETS}
+        )
+        for i in range(1990, 2000)
+    ]
+    updated = model.partial_fit(recipes_to_columns(recipes))
+    full = LinearModel.fit(columns)
+    assert updated.n_samples == 2000
+    assert updated.version != model.version
+    assert coefficient_drift(updated, full) < 1e-9
+
+    accumulator = StatsAccumulator(FeatureSpec()).add_batches(
+        {name: values[start:start + 500] for name, values in columns.items()} for start in range(0, 2000, 500)
+    )
+    np.testing.assert_allclose(accumulator.to_model().coef, full.coef, rtol=1e-8)
+
+def test_partitioned_training_retrains_changed_partitions(tmp_path):
+    from src.data.snapshot import write_snapshot
+    from src.models.partitioned import FALLBACK_PARTITION, PartitionedModel, train_partitioned
+
+    columns = _training_columns()
+    columns["id"] = np.arange(1, 2001)
+    columns["max_durability"] = columns["max_quality"] = columns["required_durability"] = np.zeros(2000)
+    snapshot_path = str(tmp_path / "snapshot")
+    write_snapshot(snapshot_path, columns)
+
+    model, retrained = train_partitioned(snapshot_path, by="job", workers=2)
+    assert sorted(retrained) == sorted((FALLBACK_PARTITION,) + JOBS)
+    # 各ジョブの行はそのジョブのデータだけで学習したモデルで推論される
+    bsm = np.flatnonzero(columns["job_code"] == 1)
+    bsm_columns = {name: values[bsm] for name, values in columns.items()}
+    expected = LinearModel.fit(bsm_columns).predict_batch(bsm_columns)
+    actual = model.predict_batch({"job_code": columns["job_code"][bsm], "recipe_level": columns["recipe_level"][bsm],
+                                  "master_book_level": columns["master_book_level"][bsm], "stars": columns["stars"][bsm]})
+    np.testing.assert_allclose(actual["required_control"], expected["required_control"], rtol=1e-9)
+
+    path = str(tmp_path / "model")
+    model.save(path)
+    loaded = PartitionedModel.load(path)
+    assert loaded.version == model.version
+
+    # ALC の行だけ変更すると、ALC と全体モデルだけが学習し直される
+    alc = columns["job_code"] == 6
+    columns["required_control"] = np.where(alc, columns["required_control"] * 1.1, columns["required_control"])
+    write_snapshot(snapshot_path, columns)
+    updated, retrained = train_partitioned(snapshot_path, by="job", previous=loaded, workers=1)
+    assert sorted(retrained) == sorted([FALLBACK_PARTITION, "ALC"])
+    assert updated.models["CRP"] is loaded.models["CRP"]
+    assert updated.version != loaded.version
+
+def test_category_report():
+    from src.models.metrics import category_report, meets_goal, recipe_categories
+
+    columns = {
+        "stars": np.array([1, 0, 0, 0]),
+        "master_book_level": np.array([5, 3, 0, 0]),
+        **{target: np.full(4, 100.0) for target in TARGETS},
+    }
+    assert recipe_categories(columns).tolist() == [0, 1, 2, 2]
+    # 通常レシピは±7%まで許容する
+    predictions = {target: np.array([104.0, 106.0, 106.0, 110.0]) for target in TARGETS}
+    report = category_report(predictions, columns)
+    assert report["master_book_star"]["progress_per_100"] == 1.0
+    assert report["master_book"]["progress_per_100"] == 0.0
+    assert report["normal"] == {"rows": 2, **{target: 0.5 for target in TARGETS}}
+    assert meets_goal(report, "master_book_star")
+    assert not meets_goal(report, "normal")
+
+def test_cross_validation_search(tmp_path):
+    from src.data.snapshot import write_snapshot
+    from src.models.search import evaluate_spec, fold_assignments, search
+
+    columns = _training_columns()
+    columns["id"] = np.arange(1, 2001)
+    columns["max_durability"] = columns["max_quality"] = columns["required_durability"] = np.zeros(2000)
+    snapshot_path = str(tmp_path / "snapshot")
+    write_snapshot(snapshot_path, columns)
+
+    specs = [FeatureSpec(degree=1), FeatureSpec(degree=3), FeatureSpec(degree=3, job_interactions=True)]
+    candidates = search(snapshot_path, specs, alphas=[1e-4, 1.0], folds=4, workers=2)
+    assert len(candidates) == 6
+    keys = [candidate.sort_key() for candidate in candidates]
+    assert keys == sorted(keys, reverse=True)
+    assert candidates[0].goals_met == 3
+
+    # 分割ごとの統計量の差し引きで求めた結果は、学習用の行だけで学習し直した場合と一致する
+    fold = fold_assignments(2000, 4)
+    predicted = {target: np.empty(2000) for target in TARGETS}
+    for k in range(4):
+        train = {name: values[fold != k] for name, values in columns.items()}
+        valid = {name: values[fold == k] for name, values in columns.items()}
+        values = LinearModel.fit(train, spec=FeatureSpec(degree=3), alpha=1.0).predict_batch(valid)
+        for target in TARGETS:
+            predicted[target][fold == k] = values[target]
+    from src.models.metrics import category_report
+    assert evaluate_spec(columns, FeatureSpec(degree=3), [1.0], folds=4)[0].report == category_report(predicted, columns)
@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from src.backend.api import serialization
+from src.backend.api.models.responses import StandardResponse
+
+def _page():
+    return [
+        {
+            "id": i,
+            "name": f"レシピ{i}",
+            "job": "CRP",
+            "recipe_level": 90,
+            "master_book_level": None,
+            "collected_at": datetime(2024, 1, 9, 12, 30, 15, 123456 * (i % 2)),
+            "progress_per_100": 120.0,
+            "quality_per_100": 100.25 + i,
+        }
+        for i in range(3)
+    ]
+
+def test_dumps_matches_jsonable_encoder(monkeypatch):
+    content = {"success": True, "data": _page(), "meta": {"total": 3, "next_cursor": None}}
+    expected = JSONResponse(content=jsonable_encoder(content)).body
+    assert serialization.dumps(content) == expected
+    assert StandardResponse.success_response(data=content["data"], meta=content["meta"]).body == expected
+
+    # orjson がない環境でも同じ出力になる（浮動小数点数の表記が同じになる値の場合）
+    monkeypatch.setattr(serialization, "orjson", None)
+    assert serialization.dumps(content) == expected
+
+def test_dumps_floats_and_non_finite(monkeypatch):
+    """大きな値・小さな値はパースすると同じ値になり、NaN・無限大は null になる"""
+    import asyncio
+    import json
+    from src.backend.api.streaming import encode_ndjson
+
+    row = _page()[0]
+    rows = [
+        dict(row, progress_per_100=1e16, quality_per_100=1e-7),
+        dict(row, progress_per_100=float("nan"), quality_per_100=float("inf")),
+        dict(row, progress_per_100=-float("inf"), quality_per_100=123456789012345678.0),
+    ]
+    expected = [
+        (1e16, 1e-7),
+        (None, None),
+        (None, 123456789012345678.0),
+    ]
+
+    async def ndjson():
+        async def batches():
+            yield rows
+        return b"".join([chunk async for chunk in encode_ndjson(batches())])
+
+    for library in (serialization.orjson, None):
+        monkeypatch.setattr(serialization, "orjson", library)
+        parsed = json.loads(serialization.dumps({"data": rows}))["data"]
+        assert [(item["progress_per_100"], item["quality_per_100"]) for item in parsed] == expected
+        assert parsed[0]["collected_at"] == "2024-01-09T12:30:15"
+        # NDJSONのエクスポートも同じ規則でシリアライズする
+        lines = [json.loads(line) for line in asyncio.run(ndjson()).splitlines()]
+        assert [(item["progress_per_100"], item["quality_per_100"]) for item in lines] == expected
+
+def test_negotiate(monkeypatch):
+    from src.backend.api import wire
+
+    monkeypatch.setattr(wire, "msgpack", object())
+    monkeypatch.setattr(wire, "pyarrow", object())
+    assert wire.negotiate(None) == wire.JSON
+    assert wire.negotiate("*/*") == wire.JSON
+    assert wire.negotiate("application/msgpack") == wire.MSGPACK
+    assert wire.negotiate("application/x-msgpack") == wire.MSGPACK
+    assert wire.negotiate("application/json;q=0.5, application/vnd.apache.arrow.stream") == wire.ARROW
+    # 具体的に指定された形式はワイルドカードより優先する
+    assert wire.negotiate("*/*, application/msgpack") == wire.MSGPACK
+    assert wire.negotiate("application/*;q=0.9, application/json;q=0") == wire.MSGPACK
+    assert wire.negotiate("text/csv") is None
+
+    # ライブラリがない形式は選ばれない
+    monkeypatch.setattr(wire, "msgpack", None)
+    assert wire.negotiate("application/msgpack, application/json;q=0.1") == wire.JSON
+    assert wire.negotiate("application/msgpack") is None
@@ -0,0 +1,39 @@
+import numpy as np
+from src.data.snapshot import JOBS, load_snapshot, columns_from_batches, write_snapshot
+
+def _recipe(recipe_id, job, level):
+    return {
+        "id": recipe_id,
+        "name": f"レシピ{recipe_id}",
+        "job": job,
+        "recipe_level": level,
+        "master_book_level": 1,
+        "stars": None,
+        "max_durability": 80,
+        "max_quality": 10000,
+        "required_durability": 70,
+        "required_craftsmanship": 3000 + recipe_id,
+        "required_control": 2800,
+        "progress_per_100": 230.5,
+        "quality_per_100": 200.25
+    }
+
+def test_snapshot_roundtrip(tmp_path):
+    batches = [[_recipe(1, "CRP", 90), _recipe(2, "CUL", 80)], [_recipe(3, "BSM", 70)]]
+    path = str(tmp_path / "snapshot")
+    data_version = write_snapshot(path, columns_from_batches(batches))
+
+    snapshot = load_snapshot(path)
+    assert snapshot.data_version == data_version
+    assert len(snapshot) == 3
+    assert isinstance(snapshot["required_craftsmanship"], np.memmap)
+    assert snapshot["required_craftsmanship"].tolist() == [3001, 3002, 3003]
+    assert [JOBS[code] for code in snapshot["job_code"]] == ["CRP", "CUL", "BSM"]
+    assert snapshot["stars"].tolist() == [0, 0, 0]
+    assert snapshot["quality_per_100"].dtype == np.float64
+
+    # 同じ内容なら同じデータバージョン、内容が変われば別のバージョンになる
+    assert write_snapshot(path, columns_from_batches(batches)) == data_version
+    batches[1].append(_recipe(4, "ALC", 60))
+    assert write_snapshot(path, columns_from_batches(batches)) != data_version
+    assert len(load_snapshot(path)) == 4